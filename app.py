@@ -6,22 +6,46 @@ from flask import (
     make_response,
     redirect,
     url_for,
+    Response,
+    stream_with_context,
 )
 import os
 from dotenv import load_dotenv
 import logging
-import io
-import csv
+import gzip
+import itertools
 
-from portfolio.multi_chain import fetch_multi_chain_portfolio
+# Before the portfolio imports: their settings are read from the
+# environment at import time
+load_dotenv()
+
+from portfolio.multi_chain import fetch_multi_chain_portfolio, revalue_portfolio
 from portfolio.storage import save_snapshot
+from portfolio.analytics.performance import iter_portfolio_history
+from portfolio.wallets.normalize import normalize_evm_address
+from services.api import api
+from services.exporter import (
+    COLUMNAR_FORMATS,
+    HISTORY_COLUMNS,
+    POSITION_COLUMNS,
+    columnar_export,
+    gzip_stream,
+    history_rows,
+    iter_csv,
+    latest_snapshot,
+    position_csv_rows,
+    position_records,
+)
+from portfolio.prewarm import prewarm_enabled, start_price_prewarmer
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-load_dotenv()
-
 app = Flask(__name__)
+app.register_blueprint(api)
+
+if prewarm_enabled():
+    start_price_prewarmer()
 
 
 @app.route("/", methods=["GET", "POST"])
@@ -36,7 +60,11 @@ def dashboard():
         if not wallet_address:
             return render_template("wallet_input.html")
 
-        result = fetch_multi_chain_portfolio(wallet_address)
+        # mode=revalue re-prices the last known balances without hitting RPCs
+        if request.args.get("mode") == "revalue":
+            result = revalue_portfolio(wallet_address)
+        else:
+            result = fetch_multi_chain_portfolio(wallet_address)
 
         portfolio = result["portfolio"]
         total_value = result["total_value"]
@@ -52,6 +80,9 @@ def dashboard():
                 total_value=total_value,
                 total_pnl=total_pnl,
                 wallet=wallet_address,
+                chain_status=result.get("chain_status", {}),
+                holdings_age=result.get("holdings_age"),
+                pending_prices=result.get("pending_prices", 0),
             )
         )
 
@@ -70,55 +101,86 @@ def dashboard():
         return "Internal Server Error", 500
 
 
+def _portfolio_for_export(wallet_address: str):
+    """Latest snapshot when fresh enough, otherwise a full fetch."""
+    wallet_address = normalize_evm_address(wallet_address)
+    latest = latest_snapshot(wallet_address)
+    if latest is not None:
+        return latest["positions"], latest["total_value"]
+
+    result = fetch_multi_chain_portfolio(wallet_address)
+    return result["portfolio"], result["total_value"]
+
+
+def _export_response(body, mimetype: str, filename: str):
+    """Attachment response; `body` is bytes or a stream of text chunks."""
+    gzip_ok = "gzip" in request.accept_encodings
+    if isinstance(body, bytes):
+        body = gzip.compress(body) if gzip_ok else body
+    else:
+        body = stream_with_context(gzip_stream(body) if gzip_ok else body)
+
+    response = Response(body, mimetype=mimetype)
+    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    response.headers["Vary"] = "Accept-Encoding"
+    if gzip_ok:
+        response.headers["Content-Encoding"] = "gzip"
+    return response
+
+
 @app.route("/export-csv")
 def export_csv():
     wallet = request.args.get("wallet")
     if not wallet:
         return "No wallet specified", 400
 
-    result = fetch_multi_chain_portfolio(wallet)
-    portfolio = result["portfolio"]
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    writer.writerow(
-        [
-            "Asset",
-            "Chain",
-            "Quantity",
-            "Value (USD)",
-            "Invested (USD)",
-            "P/L (USD)",
-            "P/L (%)",
-        ]
+    positions, total_value = _portfolio_for_export(wallet)
+    return _export_response(
+        iter_csv(position_csv_rows(positions, total_value)),
+        "text/csv",
+        f"portfolio_{wallet[:10]}.csv",
     )
 
-    for item in portfolio:
-        writer.writerow(
-            [
-                item["symbol"],
-                item["chain"].capitalize(),
-                f"{item['amount']:.8g}",
-                f"{item['current_value']:.2f}",
-                f"{item['invested']:.2f}",
-                f"{item['pnl']:.2f}",
-                f"{item['pnl_pct']:.2f}",
-            ]
-        )
 
-    writer.writerow([])
-    writer.writerow(["Total Portfolio Value", f"{result['total_value']:.2f}"])
+@app.route("/export")
+def export():
+    """
+    ?wallet=...&format=csv|parquet|arrow, plus history=1 (optionally with
+    start and end unix times) for every snapshot's positions.
+    """
+    wallet = request.args.get("wallet")
+    if not wallet:
+        return "No wallet specified", 400
 
-    output.seek(0)
+    fmt = request.args.get("format", "csv")
+    if fmt != "csv" and fmt not in COLUMNAR_FORMATS:
+        return f"Unknown format: {fmt}", 400
 
-    response = make_response(output.getvalue())
-    response.headers["Content-Type"] = "text/csv"
-    response.headers["Content-Disposition"] = (
-        f"attachment; filename=portfolio_{wallet[:10]}.csv"
-    )
+    if request.args.get("history") in {"1", "true"}:
+        history = iter_portfolio_history(
+            normalize_evm_address(wallet),
+            start=request.args.get("start", type=int),
+            end=request.args.get("end", type=int),
+        )
+        name, columns, rows = "history", HISTORY_COLUMNS, history_rows(history)
+    else:
+        positions, _ = _portfolio_for_export(wallet)
+        name, columns = "portfolio", POSITION_COLUMNS
+        rows = position_records(positions)
 
-    return response
+    filename = f"{name}_{wallet[:10]}"
+    if fmt == "csv":
+        chunks = iter_csv(itertools.chain([columns], rows))
+        return _export_response(chunks, "text/csv", f"{filename}.csv")
+
+    try:
+        body = columnar_export(rows, columns, fmt)
+    except ImportError:
+        logger.warning("%s export requested but pyarrow is not installed", fmt)
+        return f"{fmt} export needs pyarrow installed", 501
+
+    mimetype, extension = COLUMNAR_FORMATS[fmt]
+    return _export_response(body, mimetype, f"{filename}.{extension}")
 
 
 @app.route("/change-wallet")
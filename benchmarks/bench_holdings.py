@@ -0,0 +1,99 @@
+"""
+Memory and throughput of the HoldingTable path (slotted Holdings, columnar
+valuation and merge) against per-position dicts over plain dataclasses.
+
+    python -m benchmarks.bench_holdings --holdings 20000
+"""
+
+import argparse
+import dataclasses
+import logging
+import random
+import time
+import tracemalloc
+
+from portfolio.merge.deduplicate import deduplicate_positions, deduplicate_table
+from portfolio.models import Holding, HoldingTable
+from portfolio.valuation import value_holdings, value_table
+
+# Holding as it was before slots
+DictHolding = dataclasses.make_dataclass(
+    "DictHolding",
+    [(f.name, f.type, f) for f in dataclasses.fields(Holding)],
+)
+
+
+def _holdings(cls, n: int, seed: int = 7):
+    rng = random.Random(seed)
+    holdings = [
+        cls(
+            # Airdrop spam: many distinct tokens, a few duplicated across sources
+            symbol=f"SPAM{rng.randrange(n * 9 // 10)}",
+            amount=rng.random() * 10 ** rng.randint(0, 9),
+            chain=rng.choice(["ethereum", "base", "arbitrum"]),
+            cost_basis=rng.random(),
+            contract_address=f"0x{rng.getrandbits(160):040x}",
+            decimals=18,
+            is_erc20=True,
+        )
+        for _ in range(n)
+    ]
+    prices = [rng.random() if rng.random() < 0.1 else 0.0 for _ in range(n)]
+    return holdings, prices
+
+
+def _dicts(holdings, prices):
+    return deduplicate_positions(value_holdings(holdings, prices))
+
+
+def _table(holdings, prices):
+    return deduplicate_table(*value_table(HoldingTable.from_holdings(holdings), prices))
+
+
+def _peak_kib(fn) -> float:
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def _best_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run(n: int, repeat: int) -> None:
+    old, prices = _holdings(DictHolding, n)
+    new, _ = _holdings(Holding, n)
+    assert _dicts(old, prices) == _table(new, prices)
+
+    old_kib = _peak_kib(lambda: _holdings(DictHolding, n))
+    new_kib = _peak_kib(lambda: _holdings(Holding, n))
+    print(f"{n:,} holdings: objects {old_kib:,.0f} KiB | slotted {new_kib:,.0f} KiB")
+
+    old_kib = _peak_kib(lambda: _dicts(old, prices))
+    new_kib = _peak_kib(lambda: _table(new, prices))
+    old_ms = _best_ms(lambda: _dicts(old, prices), repeat)
+    new_ms = _best_ms(lambda: _table(new, prices), repeat)
+    print(
+        f"  value + merge: dicts {old_ms:.2f} ms, peak {old_kib:,.0f} KiB | "
+        f"table {new_ms:.2f} ms, peak {new_kib:,.0f} KiB "
+        f"({old_ms / new_ms:.1f}x, {old_kib / new_kib:.1f}x less memory)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--holdings", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    # Capped-value warnings would dominate both timings
+    logging.disable(logging.WARNING)
+    for n in (1_000, 5_000, args.holdings):
+        run(n, args.repeat)
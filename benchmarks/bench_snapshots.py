@@ -0,0 +1,194 @@
+"""
+Snapshot write and history read cost on a large portfolio_positions table.
+
+    python -m benchmarks.bench_snapshots --positions 1000000
+
+Seeds a throwaway database with the requested number of position rows spread
+over many wallets, then times persist_portfolio_snapshot() and a per-wallet
+history read, with and without the history indexes. The per-snapshot read is
+compared with the joined history engine, in full and downsampled to 20 points.
+
+Finally a single wallet is refreshed repeatedly with a few prices moving each
+time, to show how many position rows delta encoding stores compared with
+full copies, and what reading back the latest snapshot costs.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from portfolio.analytics.performance import get_portfolio_history
+from portfolio.cache import snapshots, sqlite
+from portfolio.cache.snapshots import SNAPSHOT_KEYFRAME_INTERVAL
+
+POSITIONS_PER_SNAPSHOT = 50
+WALLETS = 200
+
+
+def _positions(n: int) -> list[dict]:
+    return [
+        {
+            "symbol": f"TKN{i}",
+            "chain": random.choice(["ethereum", "base", "arbitrum"]),
+            "amount": random.random() * 100,
+            "invested": 0.0,
+            "current_value": random.random() * 1000,
+        }
+        for i in range(n)
+    ]
+
+
+def _seed(total_positions: int) -> None:
+    count = total_positions // POSITIONS_PER_SNAPSHOT
+    conn = sqlite._get_conn()
+    now = int(time.time())
+
+    with conn:
+        for s in range(count):
+            cur = conn.execute(
+                """
+                INSERT INTO portfolio_snapshots
+                (wallet_address, total_value, total_pnl, created_at)
+                VALUES (?, ?, 0, ?)
+                """,
+                (f"0xwallet{s % WALLETS}", random.random() * 1e5, now - count + s),
+            )
+            conn.executemany(
+                """
+                INSERT INTO portfolio_positions
+                (snapshot_id, symbol, chain, amount, cost_basis, current_value)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (cur.lastrowid, p["symbol"], p["chain"], p["amount"], 0, 1.0)
+                    for p in _positions(POSITIONS_PER_SNAPSHOT)
+                ],
+            )
+        # Every seeded snapshot is a keyframe
+        conn.execute("UPDATE portfolio_snapshots SET base_id = id")
+
+
+def _read_history(wallet: str) -> int:
+    conn = sqlite._get_conn()
+    rows = 0
+    snapshot_ids = conn.execute(
+        """
+        SELECT id FROM portfolio_snapshots
+        WHERE wallet_address = ? ORDER BY created_at
+        """,
+        (wallet,),
+    ).fetchall()
+    for (snapshot_id,) in snapshot_ids:
+        rows += len(
+            conn.execute(
+                """
+                SELECT symbol, chain, amount, cost_basis, current_value
+                FROM portfolio_positions WHERE snapshot_id = ?
+                """,
+                (snapshot_id,),
+            ).fetchall()
+        )
+    return rows
+
+
+def _reprice(positions: list[dict], share: float) -> None:
+    for p in random.sample(positions, max(1, int(len(positions) * share))):
+        p["current_value"] = random.random() * 1000
+
+
+def _delta_storage(refreshes: int, share: float) -> None:
+    wallet = "0xdelta"
+    positions = _positions(POSITIONS_PER_SNAPSHOT)
+    summary = {"total_value": 1.0, "total_pnl": 0.0}
+
+    for _ in range(refreshes):
+        _reprice(positions, share)
+        summary["total_value"] = sum(p["current_value"] for p in positions)
+        snapshots.persist_portfolio_snapshot(wallet, summary, positions)
+
+    stored = (
+        sqlite._get_conn()
+        .execute(
+            """
+            SELECT COUNT(*) FROM portfolio_positions p
+            JOIN portfolio_snapshots s ON s.id = p.snapshot_id
+            WHERE s.wallet_address = ?
+            """,
+            (wallet,),
+        )
+        .fetchone()[0]
+    )
+    latest_ms = _timed(lambda: get_portfolio_history(wallet, limit=1), 20)
+    print(
+        f"{refreshes} refreshes, {share:.0%} repriced each: {stored:,} position rows "
+        f"stored vs {refreshes * POSITIONS_PER_SNAPSHOT:,} full copies "
+        f"(keyframe every {SNAPSHOT_KEYFRAME_INTERVAL}) | "
+        f"latest snapshot read {latest_ms:.2f} ms"
+    )
+
+
+def _timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run(total_positions: int, writes: int, reads: int) -> None:
+    sqlite.DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+    sqlite.init_db()
+
+    start = time.perf_counter()
+    _seed(total_positions)
+    print(
+        f"seeded {total_positions:,} position rows in {time.perf_counter() - start:.1f}s"
+    )
+
+    summary = {"total_value": 1.0, "total_pnl": 0.0}
+    positions = _positions(POSITIONS_PER_SNAPSHOT)
+
+    def write():
+        _reprice(positions, 0.1)
+        snapshots.persist_portfolio_snapshot("0xwallet0", summary, positions)
+
+    for label in ("indexed", "no indexes"):
+        write_ms = _timed(write, writes)
+        read_ms = _timed(
+            lambda: _read_history(f"0xwallet{random.randrange(WALLETS)}"), reads
+        )
+        joined_ms = _timed(
+            lambda: get_portfolio_history(f"0xwallet{random.randrange(WALLETS)}"),
+            reads,
+        )
+        sampled_ms = _timed(
+            lambda: get_portfolio_history(
+                f"0xwallet{random.randrange(WALLETS)}", points=20
+            ),
+            reads,
+        )
+        print(
+            f"{label:>10}: snapshot write {write_ms:7.2f} ms | "
+            f"history read {read_ms:8.2f} ms | joined {joined_ms:8.2f} ms | "
+            f"20 points {sampled_ms:8.2f} ms"
+        )
+
+        conn = sqlite._get_conn()
+        conn.execute("DROP INDEX IF EXISTS idx_snapshots_wallet_history")
+        conn.execute("DROP INDEX IF EXISTS idx_snapshots_wallet_base")
+        conn.execute("DROP INDEX IF EXISTS idx_positions_snapshot")
+
+    sqlite.DB_PATH = os.path.join(tempfile.mkdtemp(), "delta.db")
+    sqlite.init_db()
+    _delta_storage(writes, 0.1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--positions", type=int, default=1_000_000)
+    parser.add_argument("--writes", type=int, default=200)
+    parser.add_argument("--reads", type=int, default=5)
+    args = parser.parse_args()
+
+    run(args.positions, args.writes, args.reads)
@@ -0,0 +1,72 @@
+"""
+Batch valuation against the per-holding calculate_position() loop.
+
+    python -m benchmarks.bench_valuation --holdings 10000
+"""
+
+import argparse
+import logging
+import random
+import time
+
+from portfolio.calculator import calculate_position
+from portfolio.models import Holding
+from portfolio.valuation import value_holdings
+
+
+def _holdings(n: int):
+    holdings = [
+        Holding(
+            symbol=f"SPAM{i}",
+            amount=random.random() * 10 ** random.randint(0, 9),
+            chain="ethereum",
+            cost_basis=random.random(),
+            is_erc20=True,
+        )
+        for i in range(n)
+    ]
+    # Spam-heavy wallets: most tokens are unpriced
+    prices = [random.random() if random.random() < 0.1 else 0.0 for _ in range(n)]
+    return holdings, prices
+
+
+def _loop(holdings, prices):
+    positions = []
+    for h, price in zip(holdings, prices):
+        pos = calculate_position(h, price)
+        if pos:
+            positions.append(pos)
+    return positions
+
+
+def _best_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run(n: int, repeat: int) -> None:
+    holdings, prices = _holdings(n)
+    assert _loop(holdings, prices) == value_holdings(holdings, prices)
+
+    loop_ms = _best_ms(lambda: _loop(holdings, prices), repeat)
+    batch_ms = _best_ms(lambda: value_holdings(holdings, prices), repeat)
+    print(
+        f"{n:,} holdings: loop {loop_ms:.2f} ms | batch {batch_ms:.2f} ms "
+        f"({loop_ms / batch_ms:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--holdings", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    # Capped-value warnings would dominate both timings
+    logging.disable(logging.WARNING)
+    for n in (100, 1_000, args.holdings):
+        run(n, args.repeat)
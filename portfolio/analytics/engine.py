@@ -0,0 +1,144 @@
+import json
+import hashlib
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from portfolio.cache.lru import LRUCache
+from portfolio.chains.tokens import NATIVE_SYMBOLS
+
+EXPOSURE_STABLECOINS = {"USDC", "USDT", "DAI"}
+DIMENSIONS = ("asset", "chain", "class")
+
+_memo = LRUCache(256)
+
+
+def _as_dict(row) -> dict:
+    if isinstance(row, dict):
+        return row
+    try:
+        return vars(row)
+    except TypeError:
+        return {name: getattr(row, name) for name in row.__slots__}
+
+
+@dataclass
+class PositionTable:
+    """Positions or holdings as columns, read from the rows exactly once."""
+
+    symbol: List[str] = field(default_factory=list)
+    chain: List[str] = field(default_factory=list)
+    asset_class: List[str] = field(default_factory=list)
+    value: List[float] = field(default_factory=list)
+    pnl: List[float] = field(default_factory=list)
+    invested: List[float] = field(default_factory=list)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable) -> "PositionTable":
+        table = cls()
+        for row in rows:
+            r = _as_dict(row)
+            symbol = r.get("symbol", "UNKNOWN")
+            chain = r.get("chain", "unknown")
+
+            # Positions carry their value; raw holdings are amount * price
+            value = r.get("current_value")
+            if value is None:
+                value = r.get("amount", 0.0) * r.get("price", 0.0)
+
+            # Merged positions drop is_erc20, so fall back on the chain's
+            # native symbol
+            is_erc20 = r.get("is_erc20")
+            if is_erc20 is None:
+                is_erc20 = (symbol or "").upper() != NATIVE_SYMBOLS.get(chain)
+
+            if not is_erc20:
+                asset_class = "native"
+            elif (symbol or "").upper() in EXPOSURE_STABLECOINS:
+                asset_class = "stablecoin"
+            else:
+                asset_class = "erc20"
+
+            table.symbol.append(symbol)
+            table.chain.append(chain)
+            table.asset_class.append(asset_class)
+            table.value.append(value)
+            table.pnl.append(r.get("pnl", 0.0))
+            table.invested.append(r.get("invested", 0.0))
+        return table
+
+
+def _group_sums(keys: List[str], weights: np.ndarray) -> Dict[str, float]:
+    if not keys:
+        return {}
+    # dict.fromkeys keeps first-seen order, like the defaultdicts it replaces
+    labels = list(dict.fromkeys(keys))
+    index = {k: i for i, k in enumerate(labels)}
+    # bincount adds in row order, matching a sequential += exactly
+    sums = np.bincount([index[k] for k in keys], weights, len(labels))
+    return dict(zip(labels, sums.tolist()))
+
+
+@dataclass(frozen=True)
+class PortfolioAnalytics:
+    total_value: float
+    total_pnl: float
+    total_invested: float
+    value_by: Dict[str, Dict[str, float]]
+    pnl_by: Dict[str, Dict[str, float]]
+
+    @property
+    def summary(self) -> Dict:
+        return {
+            "total_value": round(self.total_value, 2),
+            "total_pnl": round(self.total_pnl, 2),
+        }
+
+    def allocation(self, dimension: str) -> Dict[str, float]:
+        """Percentage of total value per asset, chain or asset class."""
+        if self.total_value == 0:
+            return {}
+        return {
+            k: round(v / self.total_value * 100, 2)
+            for k, v in self.value_by[dimension].items()
+        }
+
+
+def portfolio_version(positions: Iterable[dict]) -> str:
+    """Content hash of a position list, usable as analyze_positions' version."""
+    payload = json.dumps(list(positions), sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def analyze_positions(
+    rows: Iterable, version: Optional[str] = None
+) -> PortfolioAnalytics:
+    """
+    Totals plus value and PnL broken down by asset, chain and asset class,
+    from one pass over `rows` (position dicts or Holdings). With a version
+    (e.g. portfolio_version()) the result is memoized, so the dashboard,
+    exports and API share one computation per portfolio state.
+    """
+    if version is not None:
+        cached = _memo.get(version)
+        if cached is not None:
+            return cached
+
+    table = rows if isinstance(rows, PositionTable) else PositionTable.from_rows(rows)
+    value = np.asarray(table.value, dtype=float)
+    pnl = np.asarray(table.pnl, dtype=float)
+
+    columns = {"asset": table.symbol, "chain": table.chain, "class": table.asset_class}
+    result = PortfolioAnalytics(
+        # Python's sum keeps the old left-to-right totals bit-for-bit
+        total_value=sum(table.value),
+        total_pnl=sum(table.pnl),
+        total_invested=sum(table.invested),
+        value_by={d: _group_sums(columns[d], value) for d in DIMENSIONS},
+        pnl_by={d: _group_sums(columns[d], pnl) for d in DIMENSIONS},
+    )
+
+    if version is not None:
+        _memo.set(version, result)
+    return result
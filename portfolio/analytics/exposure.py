@@ -1,23 +1,9 @@
-from collections import defaultdict
-from typing import Dict
+from typing import Dict, Optional
 
+from portfolio.analytics.engine import analyze_positions
 
-def asset_class_exposure(positions: list[dict]) -> Dict[str, float]:
-    totals = defaultdict(float)
-    total_value = 0.0
 
-    for p in positions:
-        value = p.get("current_value", 0)
-        total_value += value
-
-        if not p.get("is_erc20"):
-            totals["native"] += value
-        elif p.get("symbol", "").upper() in {"USDC", "USDT", "DAI"}:
-            totals["stablecoin"] += value
-        else:
-            totals["erc20"] += value
-
-    if total_value == 0:
-        return {}
-
-    return {k: round(v / total_value * 100, 2) for k, v in totals.items()}
+def asset_class_exposure(
+    positions: list[dict], version: Optional[str] = None
+) -> Dict[str, float]:
+    return analyze_positions(positions, version).allocation("class")
@@ -0,0 +1,177 @@
+import os
+import math
+import time
+from typing import Dict, NamedTuple, Optional
+
+from portfolio.cache.snapshots import PositionState, persist_portfolio_snapshot
+from portfolio.cache.sqlite import _get_conn
+
+# Decay per snapshot of the EWMA variance behind volatility (RiskMetrics)
+METRICS_EWMA_LAMBDA = float(os.getenv("METRICS_EWMA_LAMBDA", "0.94"))
+
+RETURN_WINDOWS = {"24h": 86_400, "7d": 7 * 86_400, "30d": 30 * 86_400}
+SECONDS_PER_YEAR = 365 * 86_400
+
+
+class MetricsState(NamedTuple):
+    snapshot_id: int
+    updated_at: int
+    total_value: float
+    twr_index: float
+    peak_index: float
+    max_drawdown: float
+    # Per-second variance of period returns; None until two periods exist
+    ewma_variance: Optional[float]
+    periods: int
+
+
+def period_return(prev: PositionState, curr: PositionState) -> Optional[float]:
+    """
+    Market return between two snapshots: what the previous holdings are
+    worth at the new prices, over what they were worth. Deposits and
+    withdrawals change amounts, not prices, so they don't count as return.
+    Positions gone from the new snapshot are assumed flat.
+    """
+    prev_value = sum(v[2] or 0.0 for v in prev.values())
+    if prev_value <= 0:
+        return None
+
+    carried = 0.0
+    for key, (amount, _, value) in prev.items():
+        now = curr.get(key)
+        if now and now[0] and amount:
+            carried += amount * (now[2] or 0.0) / now[0]
+        else:
+            carried += value or 0.0
+    return carried / prev_value - 1
+
+
+def advance(
+    state: Optional[MetricsState],
+    prev: Optional[PositionState],
+    curr: PositionState,
+    total_value: float,
+    now: int,
+) -> MetricsState:
+    """Fold one new snapshot into the running metrics (snapshot_id unset)."""
+    if state is None or prev is None:
+        return MetricsState(0, now, total_value, 1.0, 1.0, 0.0, None, 0)
+
+    r = period_return(prev, curr)
+    if r is None:
+        return state._replace(updated_at=now, total_value=total_value)
+
+    index = state.twr_index * (1 + r)
+    peak = max(state.peak_index, index)
+
+    variance = state.ewma_variance
+    elapsed = now - state.updated_at
+    if elapsed > 0:
+        sample = r * r / elapsed
+        variance = (
+            sample
+            if variance is None
+            else METRICS_EWMA_LAMBDA * variance + (1 - METRICS_EWMA_LAMBDA) * sample
+        )
+
+    return MetricsState(
+        snapshot_id=0,
+        updated_at=now,
+        total_value=total_value,
+        twr_index=index,
+        peak_index=peak,
+        max_drawdown=min(state.max_drawdown, index / peak - 1),
+        ewma_variance=variance,
+        periods=state.periods + 1,
+    )
+
+
+def load_state(conn, wallet_address: str) -> Optional[MetricsState]:
+    row = conn.execute(
+        f"""
+        SELECT {", ".join(MetricsState._fields)}
+        FROM portfolio_metrics WHERE wallet_address = ?
+        """,
+        (wallet_address,),
+    ).fetchone()
+    return MetricsState(*row) if row else None
+
+
+def save_state(conn, wallet_address: str, state: MetricsState) -> None:
+    conn.execute(
+        f"""
+        INSERT OR REPLACE INTO portfolio_metrics
+        (wallet_address, {", ".join(MetricsState._fields)})
+        VALUES (?, {", ".join("?" * len(MetricsState._fields))})
+        """,
+        (wallet_address, *state),
+    )
+
+
+def fold_snapshot(
+    conn,
+    wallet_address: str,
+    snapshot_id: int,
+    prev: Optional[PositionState],
+    curr: PositionState,
+    total_value: float,
+    now: int,
+) -> None:
+    """persist_portfolio_snapshot() hook: fold a new snapshot into the metrics."""
+    running = advance(load_state(conn, wallet_address), prev, curr, total_value, now)
+    conn.execute(
+        "UPDATE portfolio_snapshots SET twr_index = ? WHERE id = ?",
+        (running.twr_index, snapshot_id),
+    )
+    save_state(conn, wallet_address, running._replace(snapshot_id=snapshot_id))
+
+
+def record_snapshot(wallet_address: str, summary: dict, positions: list[dict]):
+    """Persist a snapshot and update the wallet's running metrics with it."""
+    return persist_portfolio_snapshot(
+        wallet_address, summary, positions, on_write=fold_snapshot
+    )
+
+
+def _index_at(conn, wallet_address: str, at: int) -> Optional[float]:
+    row = conn.execute(
+        """
+        SELECT twr_index FROM portfolio_snapshots
+        WHERE wallet_address = ? AND created_at <= ? AND twr_index IS NOT NULL
+        ORDER BY created_at DESC LIMIT 1
+        """,
+        (wallet_address, at),
+    ).fetchone()
+    return row[0] if row else None
+
+
+def get_performance_metrics(wallet_address: str, now: Optional[int] = None) -> Dict:
+    """
+    Running metrics for a wallet, read from its metrics row plus one indexed
+    seek per return window; history is never rescanned.
+    """
+    conn = _get_conn()
+    state = load_state(conn, wallet_address)
+    if state is None:
+        return {}
+
+    now = int(time.time()) if now is None else now
+    windows = {}
+    for name, seconds in RETURN_WINDOWS.items():
+        start = _index_at(conn, wallet_address, now - seconds)
+        windows[name] = state.twr_index / start - 1 if start else None
+
+    volatility = None
+    if state.ewma_variance is not None:
+        volatility = math.sqrt(state.ewma_variance * SECONDS_PER_YEAR)
+
+    return {
+        "as_of": state.updated_at,
+        "total_value": state.total_value,
+        "time_weighted_return": state.twr_index - 1,
+        "max_drawdown": state.max_drawdown,
+        "current_drawdown": state.twr_index / state.peak_index - 1,
+        "annualized_volatility": volatility,
+        "returns": windows,
+        "periods": state.periods,
+    }
@@ -1,79 +1,180 @@
-from typing import List, Dict
-from datetime import datetime
-import sqlite3
+import json
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
-from portfolio.cache.sqlite import DB_PATH
+from portfolio.cache.sqlite import _get_conn
+from portfolio.cache.snapshots import REPLAY_COLUMNS, positions_list, replay
 
+DOWNSAMPLE_METHODS = ("lttb", "bucket")
+
+# (id, created_at, total_value, total_pnl, base_id)
+SnapshotRow = Tuple[int, int, float, float, int]
 
-def get_portfolio_history(wallet_address: str) -> List[Dict]:
-    """
-    Fetch historical portfolio snapshots for a wallet.
-    """
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
 
-    cur.execute(
-        """
-        SELECT id, snapshot_time, total_value, total_pnl
+def _select_snapshots(
+    wallet_address: str,
+    start: Optional[int],
+    end: Optional[int],
+    limit: Optional[int],
+) -> List[SnapshotRow]:
+    """Snapshot header rows in the window, served from the covering index."""
+    query = """
+        SELECT id, created_at, total_value, total_pnl, base_id
         FROM portfolio_snapshots
-        WHERE wallet_address = ?
-        ORDER BY snapshot_time ASC
-        """,
-        (wallet_address,),
-    )
+        WHERE wallet_address = ? AND created_at >= ? AND created_at <= ?
+    """
+    params = [wallet_address, start or 0, end if end is not None else 2**62]
 
-    rows = cur.fetchall()
-    history = []
-
-    for snap_id, snap_time, total_value, total_pnl in rows:
-        cur.execute(
-            """
-            SELECT symbol, chain, amount, cost_basis, current_value
-            FROM portfolio_positions
-            WHERE snapshot_id = ?
-            """,
-            (snap_id,),
+    if limit:
+        # Most recent `limit` snapshots of the window, oldest first
+        rows = _get_conn().execute(
+            query + " ORDER BY created_at DESC, id DESC LIMIT ?", (*params, limit)
         )
+        return list(reversed(rows.fetchall()))
 
-        positions = [
-            {
-                "symbol": r[0],
-                "chain": r[1],
-                "amount": r[2],
-                "cost_basis": r[3],
-                "current_value": r[4],
-            }
-            for r in cur.fetchall()
-        ]
+    return _get_conn().execute(query + " ORDER BY created_at, id", params).fetchall()
 
-        history.append(
-            {
-                "snapshot_time": snap_time,
-                "total_value": total_value,
-                "total_pnl": total_pnl,
-                "positions": positions,
-            }
-        )
 
-    conn.close()
-    return history
+def _lttb(rows: List[SnapshotRow], points: int) -> List[SnapshotRow]:
+    """
+    Largest-Triangle-Three-Buckets on (created_at, total_value): keeps the
+    first and last snapshot and, per bucket in between, the one that best
+    preserves the shape of the curve.
+    """
+    if points >= len(rows):
+        return rows
+    if points < 3:
+        return [rows[0], rows[-1]][-points:]
+
+    sampled = [rows[0]]
+    size = (len(rows) - 2) / (points - 2)
+    prev = rows[0]
+
+    for i in range(points - 2):
+        lo = int(i * size) + 1
+        hi = int((i + 1) * size) + 1
+
+        # Average of the next bucket is the third triangle vertex
+        nxt = rows[hi : min(int((i + 2) * size) + 1, len(rows))] or [rows[-1]]
+        avg_t = sum(r[1] for r in nxt) / len(nxt)
+        avg_v = sum(r[2] or 0.0 for r in nxt) / len(nxt)
+
+        best, best_area = rows[lo], -1.0
+        for row in rows[lo:hi]:
+            area = abs(
+                (prev[1] - avg_t) * ((row[2] or 0.0) - (prev[2] or 0.0))
+                - (prev[1] - row[1]) * (avg_v - (prev[2] or 0.0))
+            )
+            if area > best_area:
+                best, best_area = row, area
+
+        sampled.append(best)
+        prev = best
+
+    sampled.append(rows[-1])
+    return sampled
+
+
+def _bucket(rows: List[SnapshotRow], points: int) -> List[SnapshotRow]:
+    """Last snapshot of each of `points` equal time buckets."""
+    if points >= len(rows) or points < 1:
+        return rows
+
+    first, last = rows[0][1], rows[-1][1]
+    width = (last - first) / points or 1
+    by_bucket: Dict[int, SnapshotRow] = {}
+    for row in rows:
+        by_bucket[min(int((row[1] - first) / width), points - 1)] = row
+    return list(by_bucket.values())
+
+
+def _downsample(rows: List[SnapshotRow], points: int, method: str):
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"Unknown downsample method: {method}")
+    return _lttb(rows, points) if method == "lttb" else _bucket(rows, points)
+
+
+def _snapshot(row: SnapshotRow, positions: Optional[List[Dict]]) -> Dict:
+    snap = {
+        "snapshot_time": row[1],
+        "total_value": row[2],
+        "total_pnl": row[3],
+    }
+    if positions is not None:
+        snap["positions"] = positions
+    return snap
+
+
+def iter_portfolio_history(
+    wallet_address: str,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    limit: Optional[int] = None,
+    points: Optional[int] = None,
+    downsample: str = "lttb",
+    include_positions: bool = True,
+) -> Iterator[Dict]:
+    """
+    Stream a wallet's snapshots (oldest first) within [start, end] unix
+    times. `limit` keeps the most recent N; `points` downsamples to at most
+    that many snapshots. Snapshots are picked from the covering index, then
+    their positions are replayed from one joined query that only reads the
+    keyframes and deltas they depend on.
+    """
+    rows = _select_snapshots(wallet_address, start, end, limit)
+    if points:
+        rows = _downsample(rows, points, downsample)
+    if not rows:
+        return
+    if not include_positions:
+        yield from (_snapshot(row, None) for row in rows)
+        return
+
+    wanted = {row[0]: row for row in rows}
+    bases = sorted({row[4] for row in rows})
+    cur = _get_conn().execute(
+        f"""
+        SELECT {REPLAY_COLUMNS}
+        FROM portfolio_snapshots s
+        LEFT JOIN portfolio_positions p ON p.snapshot_id = s.id
+        WHERE s.wallet_address = ?
+          AND s.base_id IN (SELECT value FROM json_each(?))
+          AND s.id BETWEEN ? AND ?
+        ORDER BY s.base_id, s.id, p.id
+        """,
+        (wallet_address, json.dumps(bases), bases[0], max(wanted)),
+    )
+
+    for snapshot_id, state in replay(cur):
+        row = wanted.get(snapshot_id)
+        if row is not None:
+            yield _snapshot(row, positions_list(state))
 
 
-def compute_performance_metrics(history: List[Dict]) -> Dict:
+def get_portfolio_history(wallet_address: str, **kwargs) -> List[Dict]:
     """
-    This function is intentionally lightweight and defensive.
-    It exists to keep backward compatibility with earlier pipeline stages.
+    Fetch historical portfolio snapshots for a wallet.
+    See iter_portfolio_history() for the window and downsampling options.
     """
+    return list(iter_portfolio_history(wallet_address, **kwargs))
 
-    if not history:
-        return {}
 
-    initial_value = history[0].get("total_value") or 1.0
-    latest = history[-1]
+def compute_performance_metrics(history: Iterable[Dict]) -> Dict:
+    """
+    This function is intentionally lightweight and defensive.
+    It exists to keep backward compatibility with earlier pipeline stages.
+    Accepts a list or a stream such as iter_portfolio_history(), which it
+    consumes in a single pass.
+    """
 
+    initial_value = None
+    latest = None
     performance_timeline = []
 
     for h in history:
+        if latest is None:
+            initial_value = h.get("total_value") or 1.0
+        latest = h
+
         total_value = h.get("total_value", 0.0)
         pnl = h.get("total_pnl", 0.0)
         roi = (total_value - initial_value) / initial_value if initial_value else 0.0
@@ -87,6 +188,9 @@ def compute_performance_metrics(history: List[Dict]) -> Dict:
             }
         )
 
+    if latest is None:
+        return {}
+
     return {
         "initial_value": initial_value,
         "latest_value": latest.get("total_value", 0.0),
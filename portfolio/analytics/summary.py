@@ -1,19 +1,17 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+from portfolio.analytics.engine import analyze_positions
 
 
 def calculate_total_value(positions: List[dict]) -> float:
-    return sum(p.get("current_value", 0.0) for p in positions)
+    return analyze_positions(positions).total_value
 
 
 def calculate_total_pnl(positions: List[dict]) -> float:
-    return sum(p.get("pnl", 0.0) for p in positions)
-
+    return analyze_positions(positions).total_pnl
 
-def build_portfolio_summary(positions: List[dict]) -> Dict:
-    total_value = calculate_total_value(positions)
-    total_pnl = calculate_total_pnl(positions)
 
-    return {
-        "total_value": round(total_value, 2),
-        "total_pnl": round(total_pnl, 2),
-    }
+def build_portfolio_summary(
+    positions: List[dict], version: Optional[str] = None
+) -> Dict:
+    return analyze_positions(positions, version).summary
@@ -0,0 +1,210 @@
+import logging
+import sqlite3
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (version, description, statements). Versions are applied in order and
+# recorded in PRAGMA user_version; never edit a released migration, add one.
+MIGRATIONS: List[Tuple[int, str, List[str]]] = [
+    (
+        1,
+        "base schema",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS holdings_cache (
+                wallet TEXT NOT NULL,
+                chain TEXT NOT NULL,
+                asset_key TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                updated_at INTEGER NOT NULL,
+                PRIMARY KEY (wallet, chain, asset_key)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS prices_cache (
+                asset_key TEXT NOT NULL,
+                currency TEXT NOT NULL,
+                price REAL NOT NULL,
+                updated_at INTEGER NOT NULL,
+                PRIMARY KEY (asset_key, currency)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS token_metadata (
+                chain TEXT NOT NULL,
+                contract TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                decimals INTEGER NOT NULL,
+                updated_at INTEGER NOT NULL,
+                PRIMARY KEY (chain, contract)
+            ) WITHOUT ROWID
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS portfolio_snapshots (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                wallet_address TEXT NOT NULL,
+                total_value REAL,
+                total_pnl REAL,
+                created_at INTEGER DEFAULT (strftime('%s','now'))
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS portfolio_positions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                snapshot_id INTEGER NOT NULL,
+                symbol TEXT,
+                chain TEXT,
+                amount REAL,
+                cost_basis REAL,
+                current_value REAL
+            )
+            """,
+        ],
+    ),
+    (
+        2,
+        "snapshot history indexes",
+        [
+            # Covers the per-wallet history scan without touching the table
+            """
+            CREATE INDEX IF NOT EXISTS idx_snapshots_wallet_created
+            ON portfolio_snapshots (wallet_address, created_at, total_value, total_pnl)
+            """,
+            # Position rows are written contiguously per snapshot, so a plain
+            # snapshot_id index already reads them in rowid order
+            """
+            CREATE INDEX IF NOT EXISTS idx_positions_snapshot
+            ON portfolio_positions (snapshot_id)
+            """,
+        ],
+    ),
+    (
+        3,
+        "delta-encoded snapshots",
+        [
+            # base_id is the keyframe a snapshot replays from: its own id for
+            # keyframes (full position sets), an earlier id for deltas
+            "ALTER TABLE portfolio_snapshots ADD COLUMN base_id INTEGER",
+            "ALTER TABLE portfolio_snapshots ADD COLUMN content_hash TEXT",
+            "UPDATE portfolio_snapshots SET base_id = id",
+            # slot tells apart positions sharing (chain, symbol); removed
+            # marks a tombstone in a delta
+            "ALTER TABLE portfolio_positions ADD COLUMN slot INTEGER NOT NULL DEFAULT 0",
+            "ALTER TABLE portfolio_positions ADD COLUMN removed INTEGER NOT NULL DEFAULT 0",
+            "DROP INDEX IF EXISTS idx_snapshots_wallet_created",
+            """
+            CREATE INDEX IF NOT EXISTS idx_snapshots_wallet_history
+            ON portfolio_snapshots
+            (wallet_address, created_at, total_value, total_pnl, base_id)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_snapshots_wallet_base
+            ON portfolio_snapshots (wallet_address, base_id)
+            """,
+        ],
+    ),
+    (
+        4,
+        "incremental performance metrics",
+        [
+            # Cumulative time-weighted return index as of each snapshot
+            "ALTER TABLE portfolio_snapshots ADD COLUMN twr_index REAL",
+            """
+            CREATE TABLE IF NOT EXISTS portfolio_metrics (
+                wallet_address TEXT PRIMARY KEY,
+                snapshot_id INTEGER NOT NULL,
+                updated_at INTEGER NOT NULL,
+                total_value REAL NOT NULL,
+                twr_index REAL NOT NULL,
+                peak_index REAL NOT NULL,
+                max_drawdown REAL NOT NULL,
+                ewma_variance REAL,
+                periods INTEGER NOT NULL
+            )
+            """,
+        ],
+    ),
+    (
+        5,
+        "token reputation skip decisions",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS token_reputation (
+                chain TEXT NOT NULL,
+                contract TEXT NOT NULL,
+                reason TEXT NOT NULL,
+                updated_at INTEGER NOT NULL,
+                PRIMARY KEY (chain, contract)
+            ) WITHOUT ROWID
+            """,
+        ],
+    ),
+    (
+        6,
+        "drop stored metadata fallbacks",
+        [
+            # UNKNOWN/18 was stored when a lookup failed and then never
+            # retried; tokens that really lack a symbol are simply re-resolved
+            """
+            DELETE FROM token_metadata
+            WHERE symbol = 'UNKNOWN' AND decimals = 18 AND chain != '*'
+            """,
+        ],
+    ),
+    (
+        7,
+        "drop legacy metadata fallbacks",
+        [
+            # The legacy JSON import kept the old failure fallback too
+            """
+            DELETE FROM token_metadata
+            WHERE symbol = 'UNKNOWN' AND decimals = 18
+            """,
+        ],
+    ),
+    (
+        8,
+        "snapshot last seen time",
+        [
+            # When a complete render last produced this snapshot; NULL for
+            # rows written before partial renders stopped being recorded
+            "ALTER TABLE portfolio_snapshots ADD COLUMN seen_at INTEGER",
+        ],
+    ),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """
+    Bring the database up to SCHEMA_VERSION. Each migration runs in its own
+    IMMEDIATE transaction and re-checks the version inside it, so several
+    workers starting at once apply every step exactly once.
+    """
+    if get_schema_version(conn) >= SCHEMA_VERSION:
+        return SCHEMA_VERSION
+
+    conn.commit()
+    for version, description, statements in MIGRATIONS:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if get_schema_version(conn) >= version:
+                conn.rollback()
+                continue
+
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+            logger.info("Applied schema migration %d: %s", version, description)
+        except Exception:
+            conn.rollback()
+            raise
+
+    return get_schema_version(conn)
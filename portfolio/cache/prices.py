@@ -0,0 +1,158 @@
+import os
+import time
+from typing import Dict, Iterable, NamedTuple
+
+from portfolio.cache import sqlite
+from portfolio.cache.lru import LRUCache
+
+CURRENCY = "usd"
+
+# How long a price is served as fresh, per asset class
+PRICE_TTLS = {
+    "native": int(os.getenv("PRICE_TTL_NATIVE", "60")),
+    "erc20": int(os.getenv("PRICE_TTL_ERC20", "300")),
+}
+# Tokens GeckoTerminal had no price for are remembered this long
+NEGATIVE_TTL = int(os.getenv("PRICE_TTL_NEGATIVE", "3600"))
+# Past its TTL a price is still served for this long while it is refreshed
+STALE_WHILE_REVALIDATE = int(os.getenv("PRICE_STALE_SECONDS", "1800"))
+
+PRICE_LRU_SIZE = int(os.getenv("PRICE_LRU_SIZE", "20000"))
+
+_LOOKUP_CHUNK = 500
+
+_lru = LRUCache(PRICE_LRU_SIZE)
+
+
+class CachedPrice(NamedTuple):
+    # None means "known to be unpriceable" (negative entry)
+    price: float | None
+    updated_at: int
+    fresh: bool
+
+
+def asset_key(chain: str, contract: str | None = None) -> str:
+    return f"{chain}:{contract.lower() if contract else 'native'}"
+
+
+def price_ttl(key: str, price: float | None) -> int:
+    if price is None:
+        return NEGATIVE_TTL
+    return PRICE_TTLS["native" if key.endswith(":native") else "erc20"]
+
+
+def _classify(key: str, price: float | None, updated_at: int, now: int):
+    age = now - updated_at
+    ttl = price_ttl(key, price)
+    if age < ttl:
+        return CachedPrice(price, updated_at, True)
+    # Negative entries are not worth serving stale: just retry them
+    if price is not None and age < ttl + STALE_WHILE_REVALIDATE:
+        return CachedPrice(price, updated_at, False)
+    return None
+
+
+def get_cached_prices(keys: Iterable[str]) -> Dict[str, CachedPrice]:
+    """
+    Cached prices for `keys`, checking the in-process LRU before the
+    prices_cache table. Entries too old to serve, even stale, are omitted.
+    """
+    now = int(time.time())
+    found: Dict[str, CachedPrice] = {}
+    missing = []
+
+    for key in dict.fromkeys(keys):
+        entry = _lru.get(key)
+        cached = _classify(key, *entry, now) if entry else None
+        if cached and cached.fresh:
+            found[key] = cached
+        else:
+            # Another worker may have refreshed it in the shared table
+            missing.append(key)
+            if cached:
+                found[key] = cached
+
+    if not missing:
+        return found
+
+    sqlite.ensure_db()
+    with sqlite._get_conn() as conn:
+        cur = conn.cursor()
+        for i in range(0, len(missing), _LOOKUP_CHUNK):
+            chunk = missing[i : i + _LOOKUP_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            cur.execute(
+                f"""
+                SELECT asset_key, price, updated_at FROM prices_cache
+                WHERE currency = ? AND asset_key IN ({marks})
+                """,
+                (CURRENCY, *chunk),
+            )
+            for key, price, updated_at in cur.fetchall():
+                price = price if price > 0 else None
+                current = found.get(key)
+                if current and current.updated_at >= updated_at:
+                    continue
+
+                _lru.set(key, (price, updated_at))
+                cached = _classify(key, price, updated_at, now)
+                if cached:
+                    found[key] = cached
+
+    return found
+
+
+def set_cached_prices(prices: Dict[str, float | None]) -> None:
+    """
+    Write prices through both tiers. A None price records a negative entry
+    (stored as 0, which is never a real cached price).
+    """
+    if not prices:
+        return
+
+    now = int(time.time())
+    for key, price in prices.items():
+        _lru.set(key, (price, now))
+
+    sqlite.ensure_db()
+    with sqlite._get_conn() as conn:
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO prices_cache (asset_key, currency, price, updated_at)
+            VALUES (?, ?, ?, ?)
+            """,
+            [(key, CURRENCY, price or 0.0, now) for key, price in prices.items()],
+        )
+
+
+def get_priced_before(keys: Iterable[str]) -> set:
+    """
+    The keys with a positive price on record, however old; unlike
+    get_cached_prices() this ignores every TTL.
+    """
+    found, missing = set(), []
+    for key in dict.fromkeys(keys):
+        entry = _lru.get(key)
+        if entry and entry[0]:
+            found.add(key)
+        else:
+            missing.append(key)
+
+    if not missing:
+        return found
+
+    sqlite.ensure_db()
+    with sqlite._get_conn() as conn:
+        cur = conn.cursor()
+        for i in range(0, len(missing), _LOOKUP_CHUNK):
+            chunk = missing[i : i + _LOOKUP_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            cur.execute(
+                f"""
+                SELECT asset_key FROM prices_cache
+                WHERE currency = ? AND price > 0 AND asset_key IN ({marks})
+                """,
+                (CURRENCY, *chunk),
+            )
+            found.update(key for (key,) in cur.fetchall())
+    return found
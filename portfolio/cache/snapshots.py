@@ -0,0 +1,280 @@
+import os
+import json
+import time
+import hashlib
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from portfolio.cache import sqlite
+from portfolio.cache.lru import LRUCache
+
+# A full position set is written every this many snapshots of a wallet,
+# which bounds how many deltas a read has to replay
+SNAPSHOT_KEYFRAME_INTERVAL = int(os.getenv("SNAPSHOT_KEYFRAME_INTERVAL", "48"))
+
+# (chain, symbol, slot) -> (amount, cost_basis, current_value)
+PositionState = Dict[Tuple[str, str, int], Tuple[float, float, float]]
+
+# on_write(conn, wallet_address, snapshot_id, previous_state, state,
+#          total_value, created_at), run inside the write transaction
+SnapshotHook = Callable[
+    [object, str, int, Optional[PositionState], PositionState, float, int], None
+]
+
+# Joined snapshot/position columns replay() expects, ordered by s.id, p.id
+REPLAY_COLUMNS = """
+    s.id, s.base_id,
+    p.symbol, p.chain, p.slot, p.amount, p.cost_basis, p.current_value, p.removed
+"""
+
+
+class _Tip(NamedTuple):
+    snapshot_id: int
+    base_id: int
+    length: int
+    content_hash: Optional[str]
+    state: PositionState
+
+
+# Latest snapshot per (db, wallet), so writes don't replay from the keyframe
+_tips = LRUCache(1024)
+
+
+def _keyed(positions: Iterable[dict]) -> PositionState:
+    state: PositionState = {}
+    seen: Dict[Tuple[str, str], int] = {}
+    for p in positions:
+        ident = (p.get("chain"), p.get("symbol"))
+        slot = seen.get(ident, 0)
+        seen[ident] = slot + 1
+        state[(*ident, slot)] = (
+            p.get("amount"),
+            p.get("invested"),
+            p.get("current_value"),
+        )
+    return state
+
+
+def content_hash(summary: dict, state: PositionState) -> str:
+    payload = json.dumps(
+        [
+            summary.get("total_value", 0.0),
+            summary.get("total_pnl", 0.0),
+            sorted(
+                ([str(k[0]), str(k[1]), k[2], *v] for k, v in state.items()),
+                key=lambda r: r[:3],
+            ),
+        ]
+    )
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def replay(rows: Iterable[tuple]) -> Iterator[Tuple[int, PositionState]]:
+    """
+    Rebuild snapshots from REPLAY_COLUMNS rows: a keyframe resets the state,
+    a delta overwrites changed positions and drops tombstoned ones. The
+    yielded dict is reused for the next delta, so copy it to keep it.
+    """
+    state: PositionState = {}
+    current = None
+    seen: Dict[Tuple[str, str], int] = {}
+
+    for snapshot_id, base_id, symbol, chain, slot, *values, removed in rows:
+        if snapshot_id != current:
+            if current is not None:
+                yield current, state
+            current = snapshot_id
+            if base_id == snapshot_id:
+                state, seen = {}, {}
+
+        if removed is None:
+            # LEFT JOIN row of a snapshot without position rows
+            continue
+
+        if base_id == snapshot_id:
+            # Slots are implied by row order in keyframes, which also
+            # covers snapshots written before slots existed
+            slot = seen.get((chain, symbol), 0)
+            seen[(chain, symbol)] = slot + 1
+
+        key = (chain, symbol, slot)
+        if removed:
+            state.pop(key, None)
+        else:
+            state[key] = tuple(values)
+
+    if current is not None:
+        yield current, state
+
+
+def positions_list(state: PositionState) -> List[Dict]:
+    positions = [
+        {
+            "symbol": symbol,
+            "chain": chain,
+            "amount": amount,
+            "cost_basis": cost_basis,
+            "current_value": current_value,
+        }
+        for (chain, symbol, _), (amount, cost_basis, current_value) in state.items()
+    ]
+    positions.sort(key=lambda p: p["current_value"] or 0.0, reverse=True)
+    return positions
+
+
+def _load_tip(conn, wallet_address: str) -> Optional[_Tip]:
+    row = conn.execute(
+        """
+        SELECT id, base_id, content_hash FROM portfolio_snapshots
+        WHERE wallet_address = ? AND base_id = (
+            SELECT MAX(base_id) FROM portfolio_snapshots WHERE wallet_address = ?
+        )
+        ORDER BY id DESC LIMIT 1
+        """,
+        (wallet_address, wallet_address),
+    ).fetchone()
+    if row is None:
+        return None
+
+    snapshot_id, base_id, digest = row
+    cached = _tips.get((sqlite.DB_PATH, wallet_address))
+    if cached and cached.snapshot_id == snapshot_id:
+        return cached
+
+    cur = conn.execute(
+        f"""
+        SELECT {REPLAY_COLUMNS}
+        FROM portfolio_snapshots s
+        LEFT JOIN portfolio_positions p ON p.snapshot_id = s.id
+        WHERE s.wallet_address = ? AND s.base_id = ? AND s.id <= ?
+        ORDER BY s.id, p.id
+        """,
+        (wallet_address, base_id, snapshot_id),
+    )
+    length, state = 0, {}
+    for _, state in replay(cur):
+        length += 1
+    return _Tip(snapshot_id, base_id, length, digest, dict(state))
+
+
+def persist_portfolio_snapshot(
+    wallet_address: str,
+    summary: dict,
+    positions: list[dict],
+    on_write: Optional[SnapshotHook] = None,
+):
+    """
+    Record a snapshot as a keyframe or as a delta against the wallet's
+    previous one. `on_write` sees the previous and new position state in
+    the same transaction. A snapshot identical to the previous one is not
+    written; its seen_at is refreshed and its id returned instead.
+    """
+    state = _keyed(positions)
+    digest = content_hash(summary, state)
+    now = int(time.time())
+    total_value = summary.get("total_value", 0.0)
+
+    conn = sqlite._get_conn()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        tip = _load_tip(conn, wallet_address)
+        if tip and tip.content_hash == digest:
+            conn.execute(
+                "UPDATE portfolio_snapshots SET seen_at = ? WHERE id = ?",
+                (now, tip.snapshot_id),
+            )
+            conn.commit()
+            return tip.snapshot_id
+
+        rows = [(k, v, 0) for k, v in state.items()]
+        keyframe = tip is None or tip.length >= SNAPSHOT_KEYFRAME_INTERVAL
+        if not keyframe:
+            delta = [(k, v, 0) for k, v in state.items() if tip.state.get(k) != v]
+            delta += [
+                (k, (None, None, None), 1) for k in tip.state.keys() - state.keys()
+            ]
+            # A delta as big as the set saves nothing and lengthens replays
+            keyframe = len(delta) >= len(rows)
+            rows = rows if keyframe else delta
+
+        cur = conn.execute(
+            """
+            INSERT INTO portfolio_snapshots
+            (wallet_address, total_value, total_pnl, created_at,
+             base_id, content_hash, seen_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                wallet_address,
+                total_value,
+                summary.get("total_pnl", 0.0),
+                now,
+                None if keyframe else tip.base_id,
+                digest,
+                now,
+            ),
+        )
+        snapshot_id = cur.lastrowid
+        base_id = snapshot_id if keyframe else tip.base_id
+        if keyframe:
+            conn.execute(
+                "UPDATE portfolio_snapshots SET base_id = id WHERE id = ?",
+                (snapshot_id,),
+            )
+
+        conn.executemany(
+            """
+            INSERT INTO portfolio_positions
+            (snapshot_id, symbol, chain, slot, amount, cost_basis, current_value, removed)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (snapshot_id, symbol, chain, slot, *values, removed)
+                for (chain, symbol, slot), values, removed in rows
+            ],
+        )
+        if on_write is not None:
+            on_write(
+                conn,
+                wallet_address,
+                snapshot_id,
+                tip.state if tip else None,
+                state,
+                total_value,
+                now,
+            )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    _tips.set(
+        (sqlite.DB_PATH, wallet_address),
+        _Tip(snapshot_id, base_id, 1 if keyframe else tip.length + 1, digest, state),
+    )
+    return snapshot_id
+
+
+def last_seen(wallet_address: str) -> Optional[int]:
+    """When the wallet's latest snapshot was last persisted, if ever."""
+    row = (
+        sqlite._get_conn()
+        .execute(
+            """
+            SELECT seen_at FROM portfolio_snapshots
+            WHERE wallet_address = ?
+            ORDER BY created_at DESC, id DESC LIMIT 1
+            """,
+            (wallet_address,),
+        )
+        .fetchone()
+    )
+    return row[0] if row else None
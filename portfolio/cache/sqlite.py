@@ -2,65 +2,77 @@ import sqlite3
 import json
 import os
 import time
+import threading
+from dataclasses import asdict
 from typing import Optional, List
 from contextlib import closing
 
 from portfolio.models import Holding
+from portfolio.cache.migrations import migrate
 
 DB_PATH = "data/cache.db"
 
-
-def _get_conn():
-    os.makedirs("data", exist_ok=True)
-    return sqlite3.connect(DB_PATH)
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "16384"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+# Compiled statements kept per connection; connections now live per thread
+SQLITE_STATEMENT_CACHE = 256
+
+_local = threading.local()
+
+
+def _open_conn(path: str) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(
+        path,
+        timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+        cached_statements=SQLITE_STATEMENT_CACHE,
+    )
+    # WAL: readers never block the writer and vice versa, across processes
+    conn.execute("PRAGMA journal_mode=WAL")
+    # NORMAL is durable across app crashes in WAL mode, and much cheaper
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    conn.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+def _get_conn() -> sqlite3.Connection:
+    """
+    The calling thread's connection to DB_PATH, opened and tuned on first
+    use and reused afterwards. Use it as `with _get_conn() as conn:` to get
+    a transaction; the connection itself stays open.
+    """
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+
+    conn = conns.get(DB_PATH)
+    if conn is None:
+        conn = conns[DB_PATH] = _open_conn(DB_PATH)
+    return conn
+
+
+def close_thread_connections() -> None:
+    for conn in getattr(_local, "conns", {}).values():
+        conn.close()
+    _local.conns = {}
 
 
 def init_db():
-    with _get_conn() as conn:
-        cur = conn.cursor()
+    migrate(_get_conn())
 
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS holdings_cache (
-            wallet TEXT NOT NULL,
-            chain TEXT NOT NULL,
-            asset_key TEXT NOT NULL,
-            payload TEXT NOT NULL,
-            updated_at INTEGER NOT NULL,
-            PRIMARY KEY (wallet, chain, asset_key)
-        )
-        """)
-
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS prices_cache (
-            asset_key TEXT NOT NULL,
-            currency TEXT NOT NULL,
-            price REAL NOT NULL,
-            updated_at INTEGER NOT NULL,
-            PRIMARY KEY (asset_key, currency)
-        )
-        """)
-
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS portfolio_snapshots (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            wallet_address TEXT NOT NULL,
-            total_value REAL,
-            total_pnl REAL,
-            created_at INTEGER DEFAULT (strftime('%s','now'))
-        )
-        """)
-
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS portfolio_positions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            snapshot_id INTEGER NOT NULL,
-            symbol TEXT,
-            chain TEXT,
-            amount REAL,
-            cost_basis REAL,
-            current_value REAL
-        )
-        """)
+
+_initialized_dbs: set = set()
+
+
+def ensure_db():
+    """Run init_db() once per database path for this process."""
+    if DB_PATH not in _initialized_dbs:
+        init_db()
+        _initialized_dbs.add(DB_PATH)
 
 
 def _holding_key(h: Holding) -> str:
@@ -88,60 +100,69 @@ def get_cached_holdings(wallet: str, chain: str, max_age_seconds: int):
     return [Holding(**json.loads(r[0])) for r in rows]
 
 
-def set_cached_holdings(wallet: str, chain: str, holdings: List[Holding]):
-    now = int(time.time())
+def get_latest_cached_holdings(wallet: str, chain: str):
+    """
+    Most recent cached holdings for a wallet/chain regardless of age,
+    with the unix time they were written. Rows left over from older
+    refreshes (assets since sold) are ignored.
+    """
     with _get_conn() as conn:
         cur = conn.cursor()
-        for h in holdings:
-            cur.execute(
-                """
-                INSERT OR REPLACE INTO holdings_cache
-                (wallet, chain, asset_key, payload, updated_at)
-                VALUES (?, ?, ?, ?, ?)
-                """,
-                (
-                    wallet,
-                    chain,
-                    _holding_key(h),
-                    json.dumps(h.__dict__),
-                    now,
-                ),
+        cur.execute(
+            """
+            SELECT payload, updated_at FROM holdings_cache
+            WHERE wallet=? AND chain=? AND updated_at = (
+                SELECT MAX(updated_at) FROM holdings_cache
+                WHERE wallet=? AND chain=?
             )
+            """,
+            (wallet, chain, wallet, chain),
+        )
+
+        rows = cur.fetchall()
 
+    if not rows:
+        return [], None
 
-def persist_portfolio_snapshot(
-    wallet_address: str, summary: dict, positions: list[dict]
-):
+    return [Holding(**json.loads(r[0])) for r in rows], rows[0][1]
+
+
+def get_cached_assets(max_age_seconds: int):
+    """
+    Distinct (chain, contract) pairs across the wallets cached within
+    `max_age_seconds`, with a symbol, how many wallets hold each and their
+    combined amount. Natives have a None contract.
+    """
     with _get_conn() as conn:
         cur = conn.cursor()
         cur.execute(
             """
-            INSERT INTO portfolio_snapshots(wallet_address, total_value, total_pnl)
-            VALUES (?, ?, ?)
+            SELECT
+                chain,
+                json_extract(payload, '$.contract_address') AS contract,
+                MAX(json_extract(payload, '$.symbol')),
+                COUNT(DISTINCT wallet),
+                SUM(json_extract(payload, '$.amount'))
+            FROM holdings_cache
+            WHERE updated_at >= ?
+            GROUP BY chain, contract
             """,
-            (
-                wallet_address,
-                summary.get("total_value", 0.0),
-                summary.get("total_pnl", 0.0),
-            ),
+            (int(time.time()) - max_age_seconds,),
         )
-        snapshot_id = cur.lastrowid
-
-        for p in positions:
-            cur.execute(
-                """
-                INSERT INTO portfolio_positions
-                (snapshot_id, symbol, chain, amount, cost_basis, current_value)
-                VALUES (?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    snapshot_id,
-                    p.get("symbol"),
-                    p.get("chain"),
-                    p.get("amount"),
-                    p.get("invested"),
-                    p.get("current_value"),
-                ),
-            )
+        return cur.fetchall()
 
-        return snapshot_id
+
+def set_cached_holdings(wallet: str, chain: str, holdings: List[Holding]):
+    now = int(time.time())
+    rows = [
+        (wallet, chain, _holding_key(h), json.dumps(asdict(h)), now) for h in holdings
+    ]
+    with _get_conn() as conn:
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO holdings_cache
+            (wallet, chain, asset_key, payload, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
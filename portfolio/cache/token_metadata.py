@@ -1,32 +1,162 @@
-import json
 import os
-from typing import Dict
+import json
+import time
+import logging
+import threading
+from typing import Dict, Iterable
+
+from portfolio.cache import sqlite
+from portfolio.cache.lru import LRUCache
 
+logger = logging.getLogger(__name__)
+
+# Legacy flat file, imported once into the token_metadata table
 CACHE_FILE = "data/token_metadata.json"
 
+# Entries migrated from CACHE_FILE were never chain-scoped; they are kept
+# under this pseudo-chain and only used when no chain-specific entry exists.
+LEGACY_CHAIN = "*"
+
+TOKEN_METADATA_LRU_SIZE = int(os.getenv("TOKEN_METADATA_LRU_SIZE", "20000"))
+
+# SQLite caps host parameters per statement; stay well below it
+_LOOKUP_CHUNK = 500
+
+_lru = LRUCache(TOKEN_METADATA_LRU_SIZE)
+_ready_dbs: set = set()
+_ready_lock = threading.Lock()
+
+
+def _is_lookup_fallback(meta: dict) -> bool:
+    # What a failed lookup used to store; never a real answer worth keeping
+    return meta["symbol"] == "UNKNOWN" and int(meta["decimals"]) == 18
+
+
+def _migrate_legacy_file() -> None:
+    if not os.path.exists(CACHE_FILE):
+        return
+
+    with sqlite._get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT 1 FROM token_metadata WHERE chain = ? LIMIT 1", (LEGACY_CHAIN,)
+        )
+        if cur.fetchone():
+            return
+
+        try:
+            with open(CACHE_FILE, "r") as f:
+                legacy = json.load(f)
+        except Exception:
+            logger.exception("Could not read legacy token metadata %s", CACHE_FILE)
+            return
+
+        now = int(time.time())
+        rows = [
+            (LEGACY_CHAIN, addr.lower(), meta["symbol"], int(meta["decimals"]), now)
+            for addr, meta in legacy.items()
+            if isinstance(meta, dict)
+            and "symbol" in meta
+            and "decimals" in meta
+            and not _is_lookup_fallback(meta)
+        ]
+        # INSERT OR IGNORE: a concurrent worker migrating too is harmless
+        cur.executemany(
+            """
+            INSERT OR IGNORE INTO token_metadata
+            (chain, contract, symbol, decimals, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
+
+    logger.info("Migrated %d token metadata entries from %s", len(rows), CACHE_FILE)
+
 
-def load_token_cache() -> Dict[str, dict]:
+def _ensure_store() -> None:
+    if sqlite.DB_PATH in _ready_dbs:
+        return
+
+    with _ready_lock:
+        if sqlite.DB_PATH in _ready_dbs:
+            return
+        sqlite.ensure_db()
+        _migrate_legacy_file()
+        _ready_dbs.add(sqlite.DB_PATH)
+
+
+def get_token_metadata_many(chain: str, contracts: Iterable[str]) -> Dict[str, dict]:
     """
-    Load cached ERC-20 token metadata.
-    Format:
-    {
-        "0xabc...": {
-            "symbol": "USDC",
-            "decimals": 6
-        }
-    }
+    Metadata for every known contract on `chain`, keyed by lowercase address.
+    Unknown contracts are simply absent from the result.
     """
-    if not os.path.exists(CACHE_FILE):
-        return {}
+    _ensure_store()
+
+    found: Dict[str, dict] = {}
+    missing = []
+    for contract in dict.fromkeys(c.lower() for c in contracts if c):
+        meta = _lru.get((chain, contract))
+        if meta is not None:
+            found[contract] = meta
+        else:
+            missing.append(contract)
+
+    if not missing:
+        return found
+
+    with sqlite._get_conn() as conn:
+        cur = conn.cursor()
+        for i in range(0, len(missing), _LOOKUP_CHUNK):
+            chunk = missing[i : i + _LOOKUP_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            cur.execute(
+                f"""
+                SELECT chain, contract, symbol, decimals FROM token_metadata
+                WHERE chain IN (?, ?) AND contract IN ({marks})
+                """,
+                (chain, LEGACY_CHAIN, *chunk),
+            )
+            # Chain-scoped rows win over legacy ones
+            for row_chain, contract, symbol, decimals in sorted(
+                cur.fetchall(), key=lambda r: r[0] != LEGACY_CHAIN
+            ):
+                found[contract] = {"symbol": symbol, "decimals": decimals}
+
+    for contract in missing:
+        if contract in found:
+            _lru.set((chain, contract), found[contract])
+
+    return found
+
+
+def get_token_metadata(chain: str, contract: str) -> dict | None:
+    return get_token_metadata_many(chain, [contract]).get(contract.lower())
+
+
+def save_token_metadata(chain: str, entries: Dict[str, dict]) -> None:
+    """
+    Write-through of newly resolved entries only; existing rows are untouched.
+    """
+    if not entries:
+        return
+
+    _ensure_store()
 
-    try:
-        with open(CACHE_FILE, "r") as f:
-            return json.load(f)
-    except Exception:
-        return {}
+    now = int(time.time())
+    rows = [
+        (chain, contract.lower(), meta["symbol"], int(meta["decimals"]), now)
+        for contract, meta in entries.items()
+    ]
 
+    with sqlite._get_conn() as conn:
+        conn.executemany(
+            """
+            INSERT OR IGNORE INTO token_metadata
+            (chain, contract, symbol, decimals, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
 
-def save_token_cache(cache: Dict[str, dict]) -> None:
-    os.makedirs("data", exist_ok=True)
-    with open(CACHE_FILE, "w") as f:
-        json.dump(cache, f, indent=2, sort_keys=True)
+    for contract, meta in entries.items():
+        _lru.set((chain, contract.lower()), meta)
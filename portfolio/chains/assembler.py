@@ -1,5 +1,6 @@
 import logging
 from portfolio.chains.registry import CHAINS
+from portfolio.chains.fetcher import fetch_chains_concurrently
 
 logger = logging.getLogger(__name__)
 
@@ -7,15 +8,11 @@ logger = logging.getLogger(__name__)
 def build_holdings_for_wallet(wallet_address: str):
     holdings = []
 
-    for chain in CHAINS:
-        if not chain.is_enabled():
-            continue
+    chains = [chain for chain in CHAINS if chain.is_enabled()]
 
-        try:
-            chain_holdings = chain.fetch_holdings(wallet_address)
-            if chain_holdings:
-                holdings.extend(chain_holdings)
-        except Exception:
-            logger.exception("Chain failed: %s", chain.name)
+    for result in fetch_chains_concurrently(wallet_address, chains):
+        if result.status != "ok":
+            logger.warning("Chain %s returned %s", result.chain, result.status)
+        holdings.extend(result.holdings)
 
     return holdings
@@ -2,8 +2,11 @@ import os
 import logging
 from typing import List
 
-from portfolio.wallets.alchemy import fetch_erc20_holdings
+from portfolio.wallets.alchemy import fetch_erc20_holdings, ALCHEMY_KEY, CHAIN_URLS
 from portfolio.wallets.evm import fetch_eth_balance
+from portfolio.wallets.multicall import fetch_balances
+from portfolio.chains.tokens import KNOWN_TOKENS, NATIVE_SYMBOLS
+from portfolio.chains.provider import select_provider
 from portfolio.models import Holding
 from portfolio.cache.sqlite import init_db, get_cached_holdings, set_cached_holdings
 
@@ -29,15 +32,6 @@ ALCHEMY_BASE = {
     # No Alchemy for BSC alchemy_getTokenBalances
 }
 
-NATIVE_SYMBOLS = {
-    "ethereum": "ETH",
-    "arbitrum": "ETH",
-    "optimism": "ETH",
-    "base": "ETH",
-    "polygon": "POL",
-    "bsc": "BNB",
-}
-
 
 class EVMChain:
     def __init__(self, name, symbol, rpc_env_key, chain_id):
@@ -55,15 +49,24 @@ class EVMChain:
             or self.symbol in FALLBACK_RPCS
         )
 
-    def _get_rpc_url(self) -> str | None:
+    def _get_rpc_urls(self) -> List[str]:
+        """RPC endpoints in priority order: env RPC, Alchemy, public fallback."""
+        urls = []
         if os.getenv(self.rpc_env_key):
-            return os.getenv(self.rpc_env_key)
+            urls.append(os.getenv(self.rpc_env_key))
 
         alchemy_key = os.getenv("ALCHEMY_API_KEY")
         if alchemy_key and self.symbol in ALCHEMY_BASE:
-            return f"{ALCHEMY_BASE[self.symbol]}{alchemy_key}"
+            urls.append(f"{ALCHEMY_BASE[self.symbol]}{alchemy_key}")
 
-        return FALLBACK_RPCS.get(self.symbol)
+        if self.symbol in FALLBACK_RPCS:
+            urls.append(FALLBACK_RPCS[self.symbol])
+
+        return list(dict.fromkeys(urls))
+
+    def _get_rpc_url(self) -> str | None:
+        urls = self._get_rpc_urls()
+        return urls[0] if urls else None
 
     def fetch_holdings(self, wallet_address: str) -> List[Holding]:
         cached = get_cached_holdings(
@@ -82,34 +85,68 @@ class EVMChain:
 
         holdings: List[Holding] = []
 
-        rpc_url = self._get_rpc_url()
-        if not rpc_url:
+        provider = select_provider(self.symbol, self._get_rpc_urls())
+        if not provider:
             logger.error("No RPC available for %s", self.symbol)
             return holdings
 
-        # Native token
+        # Alchemy discovers every ERC-20 where it's available; elsewhere (BSC,
+        # or no API key) read balanceOf for the known token set instead.
+        use_alchemy = bool(ALCHEMY_KEY) and self.symbol in CHAIN_URLS
+        known_tokens = {} if use_alchemy else KNOWN_TOKENS.get(self.symbol, {})
+
+        # Native balance + known tokens in one Multicall3 eth_call
+        token_balances: dict[str, int] = {}
         try:
-            native_amount = fetch_eth_balance(wallet_address, rpc_url)
-            logger.info(
-                "Native balance on %s: %.6f %s",
+            with provider.track():
+                native_wei, token_balances = fetch_balances(
+                    provider.rpc_url, wallet_address, list(known_tokens)
+                )
+            native_amount = native_wei / 10**18
+        except Exception:
+            logger.warning(
+                "Multicall failed on %s, falling back to eth_getBalance",
                 self.symbol,
-                native_amount,
-                self.native_symbol,
+                exc_info=True,
+            )
+            provider = select_provider(self.symbol, self._get_rpc_urls())
+            native_amount = fetch_eth_balance(
+                wallet_address, provider.rpc_url, self.symbol
             )
-            if native_amount > 0:
-                holdings.append(
-                    Holding(
-                        symbol=self.native_symbol,
-                        amount=native_amount,
-                        chain=self.symbol,
-                        is_erc20=False,
-                    )
+
+        logger.info(
+            "Native balance on %s: %.6f %s",
+            self.symbol,
+            native_amount,
+            self.native_symbol,
+        )
+        if native_amount > 0:
+            holdings.append(
+                Holding(
+                    symbol=self.native_symbol,
+                    amount=native_amount,
+                    chain=self.symbol,
+                    is_erc20=False,
                 )
-        except Exception:
-            logger.exception("Native balance fetch failed for %s", self.symbol)
+            )
 
-        # ERC-20 tokens - skip Alchemy for BSC (no support for alchemy_getTokenBalances)
-        if self.symbol != "bsc":
+        for contract, raw in token_balances.items():
+            if raw <= 0:
+                continue
+            meta = known_tokens[contract]
+            holdings.append(
+                Holding(
+                    symbol=meta["symbol"],
+                    amount=raw / (10 ** meta["decimals"]),
+                    chain=self.symbol,
+                    is_erc20=True,
+                    contract_address=contract,
+                    decimals=meta["decimals"],
+                    source="multicall",
+                )
+            )
+
+        if use_alchemy:
             try:
                 erc20s = fetch_erc20_holdings(wallet_address, self.symbol)
                 logger.info("Fetched %d ERC20 holdings on %s", len(erc20s), self.symbol)
@@ -118,7 +155,9 @@ class EVMChain:
                 logger.exception("ERC20 fetch failed for %s", self.symbol)
         else:
             logger.info(
-                "Skipping Alchemy ERC20 fetch on BSC (not supported) - only native BNB shown"
+                "Read %d known-token balances on %s via Multicall3",
+                len(known_tokens),
+                self.symbol,
             )
 
         set_cached_holdings(wallet_address, self.symbol, holdings)
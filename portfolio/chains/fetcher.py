@@ -0,0 +1,177 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from portfolio.models import Holding
+from portfolio.cache.sqlite import get_latest_cached_holdings
+from portfolio.chains.registry import get_enabled_chains
+
+logger = logging.getLogger(__name__)
+
+# Deadline for a single chain (RPC + Alchemy + retries), and for the whole fan-out
+CHAIN_FETCH_TIMEOUT = float(os.getenv("CHAIN_FETCH_TIMEOUT", "15"))
+PORTFOLIO_FETCH_TIMEOUT = float(os.getenv("PORTFOLIO_FETCH_TIMEOUT", "25"))
+
+# Wallets fetched at once by a batch; the shared pool has one worker per
+# enabled chain for each of them
+MULTI_WALLET_WORKERS = int(os.getenv("MULTI_WALLET_WORKERS", "4"))
+
+STATUS_OK = "ok"
+STATUS_STALE = "stale"
+STATUS_UNAVAILABLE = "unavailable"
+STATUS_ERROR = "error"
+
+
+@dataclass
+class ChainFetchResult:
+    chain: str
+    status: str
+    holdings: List[Holding] = field(default_factory=list)
+    elapsed: float = 0.0
+    # Unix time of the cached data served for stale results
+    as_of: Optional[int] = None
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_size = 0
+# Tasks submitted to _executor and not finished yet
+_busy = 0
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """
+    The process-wide fan-out pool. Its threads live on between requests,
+    so their per-thread SQLite connections and HTTP sessions are reused.
+    """
+    global _executor, _executor_size
+    with _executor_lock:
+        if _executor is None:
+            _executor_size = max(1, len(get_enabled_chains())) * MULTI_WALLET_WORKERS
+            _executor = ThreadPoolExecutor(
+                max_workers=_executor_size, thread_name_prefix="chain-fetch"
+            )
+        return _executor
+
+
+def _release(_future: Future) -> None:
+    global _busy
+    with _executor_lock:
+        _busy -= 1
+
+
+def _submit(fn, *args) -> Future:
+    """
+    Run `fn` on the shared pool when one of its workers is free, otherwise
+    on a one-off thread. Chains that overran their deadline keep running
+    and hold their workers; new requests must never queue behind them.
+    """
+    global _busy
+    executor = _get_executor()
+    with _executor_lock:
+        shared = _busy < _executor_size
+        if shared:
+            _busy += 1
+
+    if shared:
+        future = executor.submit(fn, *args)
+        future.add_done_callback(_release)
+        return future
+
+    overflow = ThreadPoolExecutor(
+        max_workers=1, thread_name_prefix="chain-fetch-overflow"
+    )
+    future = overflow.submit(fn, *args)
+    overflow.shutdown(wait=False)
+    return future
+
+
+def _fallback_result(wallet_address: str, chain, status: str, elapsed: float):
+    """
+    A chain missed its deadline or failed: serve whatever it last cached,
+    however old, instead of blocking the page on it.
+    """
+    try:
+        holdings, updated_at = get_latest_cached_holdings(wallet_address, chain.symbol)
+    except Exception:
+        logger.exception("Stale cache lookup failed for %s", chain.symbol)
+        holdings, updated_at = [], None
+
+    if holdings:
+        return ChainFetchResult(
+            chain=chain.symbol,
+            status=STATUS_STALE,
+            holdings=holdings,
+            elapsed=elapsed,
+            as_of=updated_at,
+        )
+
+    return ChainFetchResult(chain=chain.symbol, status=status, elapsed=elapsed)
+
+
+def fetch_chains_concurrently(
+    wallet_address: str,
+    chains,
+    per_chain_timeout: float | None = None,
+    total_timeout: float | None = None,
+) -> List[ChainFetchResult]:
+    """
+    Fan out chain.fetch_holdings() across all chains at once.
+
+    Every chain gets its own deadline (capped by the whole-request deadline).
+    Chains that miss it come back as stale (last cached holdings) or
+    unavailable; their workers keep running in the background and still
+    populate the holdings cache for the next load.
+    """
+    chains = list(chains)
+    if not chains:
+        return []
+
+    per_chain_timeout = per_chain_timeout or CHAIN_FETCH_TIMEOUT
+    total_timeout = total_timeout or PORTFOLIO_FETCH_TIMEOUT
+
+    start = time.monotonic()
+    overall_deadline = start + total_timeout
+
+    futures = [
+        (chain, _submit(chain.fetch_holdings, wallet_address)) for chain in chains
+    ]
+
+    results: List[ChainFetchResult] = []
+    for chain, future in futures:
+        deadline = min(start + per_chain_timeout, overall_deadline)
+        remaining = max(0.0, deadline - time.monotonic())
+
+        try:
+            holdings = future.result(timeout=remaining)
+        except FutureTimeout:
+            elapsed = time.monotonic() - start
+            logger.warning(
+                "Chain %s missed its %.1fs deadline", chain.symbol, deadline - start
+            )
+            results.append(
+                _fallback_result(wallet_address, chain, STATUS_UNAVAILABLE, elapsed)
+            )
+            continue
+        except Exception:
+            elapsed = time.monotonic() - start
+            logger.exception("Failed fetching holdings for chain %s", chain.name)
+            results.append(
+                _fallback_result(wallet_address, chain, STATUS_ERROR, elapsed)
+            )
+            continue
+
+        results.append(
+            ChainFetchResult(
+                chain=chain.symbol,
+                status=STATUS_OK,
+                holdings=holdings or [],
+                elapsed=time.monotonic() - start,
+            )
+        )
+
+    return results
@@ -1,22 +1,124 @@
 import os
+import time
 import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
 from web3 import Web3
 
+from portfolio import http_client
+
 logger = logging.getLogger(__name__)
 
+# Consecutive failed calls before a provider is benched, and for how long
+PROVIDER_MAX_FAILURES = int(os.getenv("PROVIDER_MAX_FAILURES", "3"))
+PROVIDER_COOLDOWN_SECONDS = float(os.getenv("PROVIDER_COOLDOWN_SECONDS", "60"))
+
 
 class ChainProvider:
-    def __init__(self, chain):
+    """
+    One RPC endpoint for one chain. The Web3 instance is built on first use
+    and shares the process-wide HTTP session; health is tracked from the
+    outcome of real calls rather than is_connected() probes.
+    """
+
+    def __init__(self, chain: str, rpc_url: str):
         self.chain = chain
-        self.rpc_url = os.getenv(chain.rpc_env_key)
-        if not self.rpc_url:
-            raise ValueError(f"RPC URL not set for {chain.symbol}")
-        self.web3 = Web3(Web3.HTTPProvider(self.rpc_url))
+        self.rpc_url = rpc_url
+        self._web3: Web3 | None = None
+        self._lock = threading.Lock()
+
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.benched_until = 0.0
 
-    def fetch_native_balance(self, wallet_address):
+    @property
+    def web3(self) -> Web3:
+        if self._web3 is None:
+            with self._lock:
+                if self._web3 is None:
+                    self._web3 = Web3(
+                        Web3.HTTPProvider(
+                            self.rpc_url,
+                            request_kwargs={"timeout": 10},
+                            session=http_client.get_session(),
+                        )
+                    )
+        return self._web3
+
+    def is_healthy(self) -> bool:
+        return time.monotonic() >= self.benched_until
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.successes += 1
+            self.consecutive_failures = 0
+            self.benched_until = 0.0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= PROVIDER_MAX_FAILURES:
+                self.benched_until = time.monotonic() + PROVIDER_COOLDOWN_SECONDS
+                logger.warning(
+                    "RPC for %s benched for %.0fs after %d failures",
+                    self.chain,
+                    PROVIDER_COOLDOWN_SECONDS,
+                    self.consecutive_failures,
+                )
+
+    @contextmanager
+    def track(self):
+        """Record the outcome of any call made against this endpoint."""
         try:
-            balance = self.web3.eth.get_balance(wallet_address)
-            return self.web3.fromWei(balance, "ether")
+            yield self
         except Exception:
-            logger.exception("Failed native balance fetch")
-            return 0.0
+            self.record_failure()
+            raise
+        self.record_success()
+
+    def fetch_native_balance(self, wallet_address: str) -> float:
+        with self.track():
+            balance = self.web3.eth.get_balance(wallet_address)
+        return float(self.web3.from_wei(balance, "ether"))
+
+
+_providers: Dict[Tuple[str, str], ChainProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_provider(chain: str, rpc_url: str) -> ChainProvider:
+    key = (chain, rpc_url)
+    provider = _providers.get(key)
+    if provider is None:
+        with _providers_lock:
+            provider = _providers.setdefault(key, ChainProvider(chain, rpc_url))
+    return provider
+
+
+def select_provider(chain: str, rpc_urls: List[str]) -> ChainProvider | None:
+    """
+    First healthy provider in priority order (env RPC, Alchemy, public
+    fallback). If every candidate is benched, the preferred one is still
+    returned rather than giving up on the chain.
+    """
+    providers = [get_provider(chain, url) for url in rpc_urls]
+    for provider in providers:
+        if provider.is_healthy():
+            return provider
+    return providers[0] if providers else None
+
+
+def get_provider_health() -> List[dict]:
+    return [
+        {
+            "chain": p.chain,
+            "healthy": p.is_healthy(),
+            "successes": p.successes,
+            "failures": p.failures,
+        }
+        for p in list(_providers.values())
+    ]
@@ -0,0 +1,83 @@
+NATIVE_SYMBOLS = {
+    "ethereum": "ETH",
+    "arbitrum": "ETH",
+    "optimism": "ETH",
+    "base": "ETH",
+    "polygon": "POL",
+    "bsc": "BNB",
+}
+
+# Well-known tokens read via Multicall3 balanceOf on chains where Alchemy
+# token discovery isn't available (BSC, or no ALCHEMY_API_KEY).
+KNOWN_TOKENS = {
+    "ethereum": {
+        "0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48": {"symbol": "USDC", "decimals": 6},
+        "0xdac17f958d2ee523a2206206994597c13d831ec7": {"symbol": "USDT", "decimals": 6},
+        "0x6b175474e89094c44da98b954eedeac495271d0f": {"symbol": "DAI", "decimals": 18},
+        "0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2": {
+            "symbol": "WETH",
+            "decimals": 18,
+        },
+        "0x2260fac5e5542a773aa44fbcfedf7c193bc2c599": {"symbol": "WBTC", "decimals": 8},
+    },
+    "arbitrum": {
+        "0xaf88d065e77c8cc2239327c5edb3a432268e5831": {"symbol": "USDC", "decimals": 6},
+        "0xfd086bc7cd5c481dcc9c85ebe478a1c0b69fcbb9": {"symbol": "USDT", "decimals": 6},
+        "0x82af49447d8a07e3bd95bd0d56f35241523fbab1": {
+            "symbol": "WETH",
+            "decimals": 18,
+        },
+        "0x912ce59144191c1204e64559fe8253a0e49e6548": {"symbol": "ARB", "decimals": 18},
+    },
+    "optimism": {
+        "0x0b2c639c533813f4aa9d7837caf62653d097ff85": {"symbol": "USDC", "decimals": 6},
+        "0x4200000000000000000000000000000000000006": {
+            "symbol": "WETH",
+            "decimals": 18,
+        },
+        "0x4200000000000000000000000000000000000042": {"symbol": "OP", "decimals": 18},
+    },
+    "base": {
+        "0x833589fcd6edb6e08f4c7c32d4f71b54bda02913": {"symbol": "USDC", "decimals": 6},
+        "0x4200000000000000000000000000000000000006": {
+            "symbol": "WETH",
+            "decimals": 18,
+        },
+    },
+    "polygon": {
+        "0x3c499c542cef5e3811e1192ce70d8cc03d5c3359": {"symbol": "USDC", "decimals": 6},
+        "0xc2132d05d31c914a87c6611c10748aeb04b58e8f": {"symbol": "USDT", "decimals": 6},
+        "0x7ceb23fd6bc0add59e62ac25578270cff1b9f619": {
+            "symbol": "WETH",
+            "decimals": 18,
+        },
+    },
+    "bsc": {
+        "0x55d398326f99059ff775485246999027b3197955": {
+            "symbol": "USDT",
+            "decimals": 18,
+        },
+        "0x8ac76a51cc950d9822d68b83fe1ad97b32cd580d": {
+            "symbol": "USDC",
+            "decimals": 18,
+        },
+        "0xe9e7cea3dedca5984780bafc599bd69add087d56": {
+            "symbol": "BUSD",
+            "decimals": 18,
+        },
+        "0x1af3f329e8be154074d8769d1ffa4ee058b1dbc3": {"symbol": "DAI", "decimals": 18},
+        "0xbb4cdb9cbd36b01bd1cbaebf2de08d9173bc095c": {
+            "symbol": "WBNB",
+            "decimals": 18,
+        },
+        "0x2170ed0880ac9a755fd29b2688956bd959f933f8": {"symbol": "ETH", "decimals": 18},
+        "0x7130d2a12b9bcbfae4f2634d864a1ee1ce3ead9c": {
+            "symbol": "BTCB",
+            "decimals": 18,
+        },
+        "0x0e09fabb73bd3ade0a17ecc321fd13a19e81ce82": {
+            "symbol": "CAKE",
+            "decimals": 18,
+        },
+    },
+}
@@ -0,0 +1,206 @@
+import os
+import time
+import logging
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from portfolio.cache import sqlite
+from portfolio.cache.prices import asset_key, get_cached_prices
+from portfolio.filters.scam import classify, contract_lists
+from portfolio.pricing import STABLECOIN_SYMBOLS
+
+logger = logging.getLogger(__name__)
+
+# How long a contract's skip decision is trusted before it is re-checked
+REPUTATION_TTL = int(os.getenv("REPUTATION_TTL", "86400"))
+
+# Balances under this many base units of an 18-decimal token are dust
+# airdrops; scaled to each token's own decimals (0 disables)
+REPUTATION_DUST_RAW = int(os.getenv("REPUTATION_DUST_RAW", "1000"))
+
+# More than any real token's total supply
+IMPLAUSIBLE_RAW = 2**128
+
+_LOOKUP_CHUNK = 500
+
+_stats: Counter = Counter()
+_stats_lock = threading.Lock()
+
+
+def _stored_skips(chain: str, contracts: List[str]) -> Dict[str, str]:
+    since = int(time.time()) - REPUTATION_TTL
+    found: Dict[str, str] = {}
+
+    sqlite.ensure_db()
+    with sqlite._get_conn() as conn:
+        cur = conn.cursor()
+        for i in range(0, len(contracts), _LOOKUP_CHUNK):
+            chunk = contracts[i : i + _LOOKUP_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            cur.execute(
+                f"""
+                SELECT contract, reason FROM token_reputation
+                WHERE chain = ? AND updated_at > ? AND contract IN ({marks})
+                """,
+                (chain, since, *chunk),
+            )
+            found.update(cur.fetchall())
+    return found
+
+
+def _save_skips(chain: str, skips: Dict[str, str]) -> None:
+    if not skips:
+        return
+
+    now = int(time.time())
+    with sqlite._get_conn() as conn:
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO token_reputation
+            (chain, contract, reason, updated_at)
+            VALUES (?, ?, ?, ?)
+            """,
+            [(chain, contract, reason, now) for contract, reason in skips.items()],
+        )
+
+
+def contract_skips(
+    chain: str, contracts: Iterable[str], metadata: Dict[str, dict]
+) -> Dict[str, str]:
+    """
+    Contracts on `chain` not worth any upstream call, with the reason, from
+    local knowledge only: the denylist, a scam symbol in already cached
+    `metadata`, or a cached "no price" answer. Decisions are stored per
+    (chain, contract) for REPUTATION_TTL; allowlisted contracts are never
+    skipped, and stablecoins never for lack of a price since they are
+    valued at $1 then.
+    """
+    deny, allow = contract_lists()
+    contracts = [
+        c
+        for c in dict.fromkeys(c.lower() for c in contracts)
+        if (chain, c) not in allow
+    ]
+    if not contracts:
+        return {}
+
+    stable = {
+        c
+        for c in contracts
+        if c in metadata
+        and (metadata[c].get("symbol") or "").upper() in STABLECOIN_SYMBOLS
+    }
+
+    skips = {
+        c: reason
+        for c, reason in _stored_skips(chain, contracts).items()
+        if not (reason == "unpriceable" and c in stable)
+    }
+
+    fresh: Dict[str, str] = {}
+    for contract in contracts:
+        if contract in skips:
+            continue
+        if (chain, contract) in deny:
+            fresh[contract] = "denylisted_contract"
+        elif contract in metadata:
+            # Only with its real symbol; the placeholder would pass
+            is_scam, reason = classify(metadata[contract]["symbol"], chain, contract)
+            if is_scam:
+                fresh[contract] = reason
+
+    rest = [
+        c for c in contracts if c not in skips and c not in fresh and c not in stable
+    ]
+    cached = get_cached_prices(asset_key(chain, c) for c in rest)
+    for contract in rest:
+        entry = cached.get(asset_key(chain, contract))
+        if entry is not None and entry.price is None:
+            fresh[contract] = "unpriceable"
+
+    _save_skips(chain, fresh)
+    skips.update(fresh)
+    return skips
+
+
+def _balance_skip(raw: int, meta: Optional[dict]) -> str:
+    if raw >= IMPLAUSIBLE_RAW:
+        return "implausible_balance"
+    # Dust only means something in whole tokens, so it needs the decimals;
+    # stablecoins are worth keeping down to the cent
+    if meta is None or (meta.get("symbol") or "").upper() in STABLECOIN_SYMBOLS:
+        return ""
+    if raw * 10**18 < REPUTATION_DUST_RAW * 10 ** int(meta["decimals"]):
+        return "dust_balance"
+    return ""
+
+
+def prefilter_balances(
+    chain: str, balances: List[Tuple[str, int]], metadata: Dict[str, dict]
+) -> List[Tuple[str, int]]:
+    """
+    The (contract, raw_balance) pairs worth resolving and pricing. Runs
+    before any metadata or price call; `metadata` is what the local cache
+    already knows about these contracts; the dust check is skipped for
+    contracts whose decimals it does not know yet. Balance heuristics
+    depend on the wallet, so only contract-level decisions are stored.
+    """
+    _, allow = contract_lists()
+    skips = contract_skips(chain, (c for c, _ in balances), metadata)
+
+    kept, skipped = [], {}
+    for contract, raw in balances:
+        reason = skips.get(contract)
+        if reason is None and (chain, contract) not in allow:
+            reason = _balance_skip(raw, metadata.get(contract))
+        if reason:
+            skipped[contract] = reason
+        else:
+            kept.append((contract, raw))
+
+    with _stats_lock:
+        _stats["checked"] += len(balances)
+    if skipped:
+        _record(chain, skipped, metadata)
+    return kept
+
+
+def _record(chain: str, skipped: Dict[str, str], metadata: Dict[str, dict]) -> None:
+    # A skipped contract without cached metadata would have cost a metadata
+    # lookup, and one with no cached price (or a stale one) a price lookup
+    # unless its resolved symbol then failed the scam filter
+    cached = get_cached_prices(asset_key(chain, c) for c in skipped)
+    metadata_saved = sum(1 for c in skipped if c not in metadata)
+    price_saved = sum(
+        1
+        for c in skipped
+        if not (c in metadata and classify(metadata[c]["symbol"], chain, c)[0])
+        and not getattr(cached.get(asset_key(chain, c)), "fresh", False)
+    )
+
+    with _stats_lock:
+        _stats["skipped"] += len(skipped)
+        _stats.update(f"skipped:{reason}" for reason in skipped.values())
+        _stats["metadata_lookups_saved"] += metadata_saved
+        _stats["price_lookups_saved"] += price_saved
+
+    logger.info(
+        "Reputation pre-filter skipped %d tokens on %s "
+        "(%d metadata and %d price lookups saved)",
+        len(skipped),
+        chain,
+        metadata_saved,
+        price_saved,
+    )
+
+
+def get_reputation_stats() -> Dict[str, int]:
+    """Skip counts per reason and upstream lookups saved, since start."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_reputation_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
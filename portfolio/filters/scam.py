@@ -1,5 +1,22 @@
-from typing import Tuple
-from portfolio.models import Holding
+import os
+import re
+import json
+import logging
+import threading
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+
+from portfolio.chains.tokens import KNOWN_TOKENS
+from portfolio.models import Holding, HoldingTable
+
+logger = logging.getLogger(__name__)
+
+# {"deny": {chain: [contract, ...]}, "allow": {chain: [contract, ...]}}.
+# Allowed contracts (plus KNOWN_TOKENS) are never scam, whatever their symbol.
+SCAM_CONTRACTS_FILE = os.getenv("SCAM_CONTRACTS_FILE", "data/scam_contracts.json")
+
+SCAM_VERDICT_CACHE_SIZE = int(os.getenv("SCAM_VERDICT_CACHE_SIZE", "50000"))
 
 SCAM_KEYWORDS = {
     "claim",
@@ -13,27 +30,129 @@ SCAM_KEYWORDS = {
     ".io",
 }
 
+# Extra protection against known ETH dust scams
+SCAM_SYMBOLS = {"xeth", "ethg", "ethe", "etth", "ethx"}
+
+# One pass over the symbol for every keyword
+_KEYWORD_RE = re.compile("|".join(re.escape(k) for k in sorted(SCAM_KEYWORDS)))
+
+Verdict = Tuple[bool, str]
+
+# A plain dict: an LRU's locking costs more than the check it saves. Reads
+# and writes are atomic under the GIL; it is simply emptied when full.
+_verdicts: Dict[tuple, Verdict] = {}
+_lists: Optional[Tuple[FrozenSet, FrozenSet]] = None
+_lists_lock = threading.Lock()
+
+
+def load_contract_lists(path: Optional[str] = None) -> Tuple[FrozenSet, FrozenSet]:
+    """
+    (Re)load the deny and allow sets of (chain, contract) from `path`
+    (default SCAM_CONTRACTS_FILE) and drop memoized verdicts. A missing
+    file means empty lists.
+    """
+    global _lists
+    path = path or SCAM_CONTRACTS_FILE
+
+    lists = {"deny": {}, "allow": {}}
+    if os.path.exists(path):
+        try:
+            with open(path, "r") as f:
+                lists.update(json.load(f))
+        except Exception:
+            logger.exception("Could not read scam contract lists %s", path)
+
+    deny = frozenset(
+        (chain, addr.lower())
+        for chain, addrs in lists["deny"].items()
+        for addr in addrs
+    )
+    allow = frozenset(
+        (chain, addr.lower())
+        for chain, addrs in list(lists["allow"].items()) + list(KNOWN_TOKENS.items())
+        for addr in addrs
+    )
+
+    with _lists_lock:
+        _lists = (deny, allow)
+        _verdicts.clear()
+    logger.info("Loaded %d denied and %d allowed contracts", len(deny), len(allow))
+    return _lists
+
 
-def is_scam_token(token: Holding) -> Tuple[bool, str]:
-    symbol = getattr(token, "symbol", None)
+def contract_lists() -> Tuple[FrozenSet, FrozenSet]:
+    """(deny, allow) sets of (chain, contract), loaded on first use."""
+    # A racing first load just reads the file twice
+    return _lists or load_contract_lists()
+
+
+def _symbol_verdict(symbol: Optional[str]) -> Verdict:
     if not symbol:
         return True, "missing_symbol"
 
     sym = symbol.lower()
-
-    # Extra protection against known ETH dust scams
-    if sym in {"xeth", "ethg", "ethe", "etth", "ethx"}:
+    if sym in SCAM_SYMBOLS:
         return True, "known_scam_symbol"
 
-    for k in SCAM_KEYWORDS:
-        if k in sym:
-            return True, f"keyword:{k}"
+    match = _KEYWORD_RE.search(sym)
+    if match:
+        return True, f"keyword:{match.group()}"
 
     if not symbol.isalnum():
         return True, "non_alphanumeric"
 
-    # Never mark native tokens as scam
-    if not token.is_erc20:
-        return False, ""
-
     return False, ""
+
+
+def _memo_key(symbol: Optional[str], chain: str, contract: Optional[str]) -> tuple:
+    return (chain, contract.lower() if contract else None, symbol)
+
+
+def classify(
+    symbol: Optional[str], chain: str, contract: Optional[str] = None
+) -> Verdict:
+    """
+    (is_scam, reason) for a token. Contracts on the allow or deny list are
+    decided by the list; everything else by its symbol. Verdicts are
+    memoized per (chain, contract, symbol): the same contract can arrive
+    with a placeholder symbol first and its real one later.
+    """
+    memo_key = _memo_key(symbol, chain, contract)
+    verdict = _verdicts.get(memo_key)
+    if verdict is not None:
+        return verdict
+
+    key = (chain, contract.lower()) if contract else (None, symbol)
+    deny, allow = contract_lists()
+    if key in allow:
+        verdict = (False, "")
+    elif key in deny:
+        verdict = (True, "denylisted_contract")
+    else:
+        verdict = _symbol_verdict(symbol)
+
+    if len(_verdicts) >= SCAM_VERDICT_CACHE_SIZE:
+        _verdicts.clear()
+    _verdicts[memo_key] = verdict
+    return verdict
+
+
+def is_scam_token(token: Holding) -> Verdict:
+    return classify(
+        getattr(token, "symbol", None),
+        getattr(token, "chain", None),
+        getattr(token, "contract_address", None),
+    )
+
+
+def classify_table(table: HoldingTable) -> Tuple[np.ndarray, List[str]]:
+    """
+    Boolean scam mask and reasons for every row of `table`; rows of an
+    already classified token cost one dict lookup.
+    """
+    scam, reasons = [], []
+    for symbol, chain, contract in zip(table.symbol, table.chain, table.contract):
+        verdict = classify(symbol, chain, contract)
+        scam.append(verdict[0])
+        reasons.append(verdict[1])
+    return np.array(scam, dtype=bool), reasons
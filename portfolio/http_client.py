@@ -0,0 +1,101 @@
+import os
+import threading
+from collections import defaultdict
+from typing import Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# Pools are kept per upstream host (CoinGecko, GeckoTerminal, Alchemy, RPCs)
+HTTP_POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "16"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "20"))
+
+_stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {"opened": 0, "reused": 0})
+_stats_lock = threading.Lock()
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+def _record(host: str, reused: bool) -> None:
+    with _stats_lock:
+        _stats[host]["reused" if reused else "opened"] += 1
+
+
+class _CountingPoolMixin:
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout)
+        # A checked-out connection with a live socket skips TCP/TLS setup
+        _record(self.host, getattr(conn, "sock", None) is not None)
+        return conn
+
+
+class _CountingHTTPConnectionPool(_CountingPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class _CountingHTTPSConnectionPool(_CountingPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class _PooledAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    adapter = _PooledAdapter(
+        pool_connections=HTTP_POOL_HOSTS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Connection": "keep-alive"})
+    return session
+
+
+def get_session() -> requests.Session:
+    """
+    Process-wide keep-alive session. Also handed to Web3 HTTPProviders so
+    RPC calls share the same connection pools.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def _with_timeout(kwargs: dict) -> dict:
+    kwargs.setdefault("timeout", (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+    return kwargs
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return get_session().get(url, **_with_timeout(kwargs))
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return get_session().post(url, **_with_timeout(kwargs))
+
+
+def get_connection_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Connections opened vs. reused per upstream host since process start.
+    """
+    with _stats_lock:
+        return {host: dict(counts) for host, counts in _stats.items()}
+
+
+def reset_connection_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
@@ -1,4 +1,9 @@
 from collections import defaultdict
+from typing import Dict
+
+import numpy as np
+
+from portfolio.models import HoldingTable
 
 
 def deduplicate_positions(positions: list[dict]) -> list[dict]:
@@ -48,3 +53,39 @@ def deduplicate_positions(positions: list[dict]) -> list[dict]:
 
     result.sort(key=lambda x: x["current_value"], reverse=True)
     return result
+
+
+def deduplicate_table(table: HoldingTable, values: Dict[str, np.ndarray]) -> list[dict]:
+    """
+    deduplicate_positions() over valued table rows (see value_table()),
+    building one dict per merged position rather than per holding.
+    """
+    if not len(table):
+        return []
+
+    # Valued positions carry no is_erc20, so deduplicate_positions() keys
+    # every one as "erc20"; keying on symbol + chain keeps its output
+    keys = list(zip(table.symbol, table.chain))
+    labels = list(dict.fromkeys(keys))
+    index = {k: i for i, k in enumerate(labels)}
+    group = np.fromiter((index[k] for k in keys), np.intp, len(keys))
+
+    # bincount adds in row order from 0.0, like the buckets' +=
+    amount = np.bincount(group, table.amount, len(labels)).tolist()
+    current_value = np.bincount(group, values["current_value"], len(labels))
+    invested = np.bincount(group, values["invested"], len(labels))
+
+    result = [
+        {
+            "symbol": symbol,
+            "chain": chain,
+            "amount": amount[i],
+            "current_value": round(v, 2),
+            "invested": round(c, 2),
+        }
+        for i, ((symbol, chain), v, c) in enumerate(
+            zip(labels, current_value.tolist(), invested.tolist())
+        )
+    ]
+    result.sort(key=lambda x: x["current_value"], reverse=True)
+    return result
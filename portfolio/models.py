@@ -1,8 +1,10 @@
 from dataclasses import dataclass
-from typing import Optional
+from typing import Iterator, List, Optional, Sequence
 
+import numpy as np
 
-@dataclass
+
+@dataclass(slots=True)
 class Holding:
     symbol: str
     amount: float
@@ -16,3 +18,76 @@ class Holding:
     is_erc20: bool = False
 
     source: Optional[str] = None
+
+
+@dataclass(slots=True)
+class HoldingTable:
+    """
+    Holdings as columns, for wallets with thousands of tokens: numbers live
+    in float64/int arrays and strings in lists that share the holdings' own
+    str objects, so pricing, valuation and merging index into columns
+    instead of building a dict per token.
+    """
+
+    symbol: List[str]
+    chain: List[str]
+    contract: List[Optional[str]]
+    source: List[Optional[str]]
+    amount: np.ndarray
+    cost_basis: np.ndarray
+    # -1 where a holding's decimals are unknown
+    decimals: np.ndarray
+    is_erc20: np.ndarray
+
+    @classmethod
+    def from_holdings(cls, holdings: Sequence[Holding]) -> "HoldingTable":
+        n = len(holdings)
+        return cls(
+            symbol=[h.symbol for h in holdings],
+            chain=[h.chain for h in holdings],
+            contract=[h.contract_address for h in holdings],
+            source=[h.source for h in holdings],
+            amount=np.fromiter((h.amount for h in holdings), float, n),
+            cost_basis=np.fromiter((h.cost_basis for h in holdings), float, n),
+            decimals=np.fromiter(
+                (-1 if h.decimals is None else h.decimals for h in holdings),
+                np.int16,
+                n,
+            ),
+            is_erc20=np.fromiter((bool(h.is_erc20) for h in holdings), bool, n),
+        )
+
+    def __len__(self) -> int:
+        return len(self.symbol)
+
+    def take(self, index: Sequence[int]) -> "HoldingTable":
+        """The rows at `index`, in that order."""
+        index = np.asarray(index, dtype=np.intp)
+        rows = index.tolist()
+        return HoldingTable(
+            symbol=[self.symbol[i] for i in rows],
+            chain=[self.chain[i] for i in rows],
+            contract=[self.contract[i] for i in rows],
+            source=[self.source[i] for i in rows],
+            amount=self.amount[index],
+            cost_basis=self.cost_basis[index],
+            decimals=self.decimals[index],
+            is_erc20=self.is_erc20[index],
+        )
+
+    def holdings(self) -> Iterator[Holding]:
+        """Rows back as Holdings (price is not kept by the table)."""
+        decimals = self.decimals.tolist()
+        for i, (amount, cost_basis, is_erc20) in enumerate(
+            zip(self.amount.tolist(), self.cost_basis.tolist(), self.is_erc20.tolist())
+        ):
+            yield Holding(
+                symbol=self.symbol[i],
+                amount=amount,
+                chain=self.chain[i],
+                cost_basis=cost_basis,
+                contract_address=self.contract[i],
+                decimals=None if decimals[i] < 0 else decimals[i],
+                is_erc20=is_erc20,
+                source=self.source[i],
+            )
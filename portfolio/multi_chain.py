@@ -1,102 +1,309 @@
+import time
 import logging
-from typing import Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
 
 from portfolio.chains.registry import get_enabled_chains
-from portfolio.filters.scam import is_scam_token
+from portfolio.chains.fetcher import (
+    MULTI_WALLET_WORKERS,
+    STATUS_OK,
+    STATUS_STALE,
+    STATUS_UNAVAILABLE,
+    fetch_chains_concurrently,
+)
+from portfolio.filters.scam import classify_table
 from portfolio.pricing import (
     get_native_prices,
     get_erc20_prices,
     get_price_with_stable_fallback,
+    prioritize_erc20_pricing,
 )
 from portfolio.wallets.normalize import normalize_evm_address
-from portfolio.merge.deduplicate import deduplicate_positions
-from portfolio.calculator import calculate_position
+from portfolio.merge.deduplicate import deduplicate_positions, deduplicate_table
+from portfolio.valuation import value_table
+from portfolio.analytics.engine import portfolio_version
 from portfolio.analytics.summary import build_portfolio_summary
-from portfolio.cache.sqlite import persist_portfolio_snapshot
+from portfolio.analytics.metrics import record_snapshot
+from portfolio.cache.sqlite import get_latest_cached_holdings
+from portfolio.models import Holding, HoldingTable
 
 logger = logging.getLogger(__name__)
 
 
-def fetch_multi_chain_portfolio(wallet_address: str) -> dict:
-    if not wallet_address:
-        raise ValueError("Wallet address is required")
+def _filter_holdings(all_holdings: List[Holding]) -> HoldingTable:
+    # From here on holdings are columns; dicts are only built per merged
+    # position
+    table = HoldingTable.from_holdings(all_holdings)
 
-    wallet_address = normalize_evm_address(wallet_address)
-
-    all_holdings = []
+    scam, reasons = classify_table(table)
+    for i in np.flatnonzero(scam).tolist():
+        logger.info(
+            "Skipped scam token %s on %s (%s)",
+            table.symbol[i],
+            table.chain[i],
+            reasons[i],
+        )
+    table = table.take(np.flatnonzero(~scam))
 
-    for chain in get_enabled_chains():
-        try:
-            logger.info("Fetching holdings for %s on %s", wallet_address, chain.name)
-            holdings = chain.fetch_holdings(wallet_address)
-            if holdings:
-                all_holdings.extend(holdings)
-        except Exception:
-            logger.exception("Failed fetching holdings for chain %s", chain.name)
+    logger.info("Holdings after scam filter: %d → %d", len(all_holdings), len(table))
+    return table
 
-    if not all_holdings:
-        return {"portfolio": [], "total_value": 0.0, "total_pnl": 0.0}
 
-    # Filter scam tokens using your original function (returns tuple)
-    filtered = []
+def _tokens(table: HoldingTable) -> Tuple[Set[str], Dict[str, Dict[str, str]]]:
+    """Chains whose native price is needed, and contract -> symbol per chain."""
     native_chains = set()
-    erc20_by_chain: dict[str, set[str]] = {}
-
-    for h in all_holdings:
-        is_scam, _ = is_scam_token(h)
-        if is_scam:
-            logger.info("Skipped scam token %s on %s", h.symbol, h.chain)
-            continue
-
-        filtered.append(h)
-
-        if h.is_erc20:
-            if h.contract_address:
-                erc20_by_chain.setdefault(h.chain, set()).add(
-                    h.contract_address.lower()
-                )
+    erc20_by_chain: Dict[str, Dict[str, str]] = {}
+    for symbol, chain, contract, erc20 in zip(
+        table.symbol, table.chain, table.contract, table.is_erc20.tolist()
+    ):
+        if erc20:
+            if contract:
+                erc20_by_chain.setdefault(chain, {})[contract.lower()] = symbol
         else:
-            native_chains.add(h.chain)
+            native_chains.add(chain)
+    return native_chains, erc20_by_chain
 
-    logger.info("Holdings after scam filter: %d → %d", len(all_holdings), len(filtered))
 
+def _fetch_prices(
+    native_chains: Set[str], erc20_by_chain: Dict[str, Dict[str, str]]
+) -> Tuple[Dict[str, float], Dict[str, Dict[str, float]], Set[tuple]]:
+    """Native prices, ERC-20 prices per chain, and the deferred long tail."""
     native_prices = get_native_prices(list(native_chains))
 
+    # The long tail is left out of this render while its prices load
     erc20_prices: Dict[str, Dict[str, float]] = {}
-    for chain, contracts in erc20_by_chain.items():
-        erc20_prices[chain] = get_erc20_prices(chain, list(contracts))
+    deferred: Set[tuple] = set()
+    for chain, tokens in erc20_by_chain.items():
+        now, later = prioritize_erc20_pricing(chain, tokens)
+        erc20_prices[chain] = get_erc20_prices(chain, now)
+        deferred.update((chain, c) for c in later)
+
+    return native_prices, erc20_prices, deferred
+
 
-    positions = []
-    for h in filtered:
+def _value(
+    wallet_address: str,
+    table: HoldingTable,
+    chain_status: Dict[str, str],
+    native_prices: Dict[str, float],
+    erc20_prices: Dict[str, Dict[str, float]],
+    deferred: Set[tuple],
+) -> dict:
+    is_erc20 = table.is_erc20.tolist()
+
+    priced, prices, pending = [], [], 0
+    for i, (symbol, chain, contract) in enumerate(
+        zip(table.symbol, table.chain, table.contract)
+    ):
+        if is_erc20[i] and contract and (chain, contract.lower()) in deferred:
+            pending += 1
+            continue
         try:
             price = (
-                erc20_prices.get(h.chain, {}).get(h.contract_address.lower())
-                if h.is_erc20
-                else native_prices.get(h.chain)
+                erc20_prices.get(chain, {}).get(contract.lower())
+                if is_erc20[i]
+                else native_prices.get(chain)
             )
 
-            final_price = get_price_with_stable_fallback(h.symbol, price)
-
-            pos = calculate_position(h, final_price)
-            if pos:
-                pos["chain"] = h.chain
-                positions.append(pos)
+            prices.append(get_price_with_stable_fallback(symbol, price))
+            priced.append(i)
         except Exception:
-            logger.exception("Failed calculating position for %s", h.symbol)
+            logger.exception("Failed pricing position for %s", symbol)
 
-    logger.info("Created %d positions", len(positions))
+    if len(priced) < len(table):
+        table = table.take(priced)
+    table, values = value_table(table, prices)
 
-    merged = deduplicate_positions(positions)
+    logger.info("Created %d positions, %d awaiting prices", len(table), pending)
 
-    summary = build_portfolio_summary(merged)
+    merged = deduplicate_table(table, values)
 
-    try:
-        persist_portfolio_snapshot(wallet_address, summary, merged)
-    except Exception:
-        logger.exception("Snapshot persistence failed")
+    version = portfolio_version(merged)
+    summary = build_portfolio_summary(merged, version)
+
+    # Only complete portfolios go into history; a missing chain or price
+    # would show up there as a drop in value
+    if pending or any(status != STATUS_OK for status in chain_status.values()):
+        logger.info("Not recording a snapshot of a partial portfolio")
+    else:
+        try:
+            record_snapshot(wallet_address, summary, merged)
+        except Exception:
+            logger.exception("Snapshot persistence failed")
 
     return {
         "portfolio": merged,
         "total_value": summary.get("total_value", 0.0),
         "total_pnl": summary.get("total_pnl", 0.0),
+        "version": version,
+        "pending_prices": pending,
+        "chain_status": chain_status,
+    }
+
+
+def _price_and_value(
+    wallet_address: str, all_holdings: List[Holding], chain_status: Dict[str, str]
+) -> dict:
+    """
+    Shared tail of the full fetch and of revaluation: scam filter, pricing,
+    valuation, merge, summary and snapshot. Holdings whose prices are being
+    fetched in the background are left out and counted in pending_prices;
+    the snapshot is only recorded when nothing is pending and every chain
+    in `chain_status` is ok.
+    """
+    table = _filter_holdings(all_holdings)
+    return _value(wallet_address, table, chain_status, *_fetch_prices(*_tokens(table)))
+
+
+def _fetch_holdings(wallet_address: str) -> Tuple[List[Holding], Dict[str, str]]:
+    all_holdings = []
+    chain_status = {}
+
+    logger.info("Fetching holdings for %s on all enabled chains", wallet_address)
+    for result in fetch_chains_concurrently(wallet_address, get_enabled_chains()):
+        chain_status[result.chain] = result.status
+        all_holdings.extend(result.holdings)
+    return all_holdings, chain_status
+
+
+def _cached_holdings(
+    wallet_address: str,
+) -> Tuple[List[Holding], Dict[str, str], Optional[int]]:
+    """
+    Last cached holdings per enabled chain and the oldest one's time. Chains
+    served from the cache are reported as stale, as when a live fetch falls
+    back to it.
+    """
+    all_holdings = []
+    chain_status = {}
+    as_of = []
+
+    for chain in get_enabled_chains():
+        holdings, updated_at = get_latest_cached_holdings(wallet_address, chain.symbol)
+        if updated_at is None:
+            chain_status[chain.symbol] = STATUS_UNAVAILABLE
+            continue
+        chain_status[chain.symbol] = STATUS_STALE
+        all_holdings.extend(holdings)
+        as_of.append(updated_at)
+
+    return all_holdings, chain_status, min(as_of) if as_of else None
+
+
+def _empty_portfolio() -> dict:
+    return {"portfolio": [], "total_value": 0.0, "total_pnl": 0.0}
+
+
+def fetch_multi_chain_portfolio(wallet_address: str) -> dict:
+    if not wallet_address:
+        raise ValueError("Wallet address is required")
+
+    wallet_address = normalize_evm_address(wallet_address)
+
+    all_holdings, chain_status = _fetch_holdings(wallet_address)
+    if not all_holdings:
+        return {**_empty_portfolio(), "chain_status": chain_status}
+
+    return _price_and_value(wallet_address, all_holdings, chain_status)
+
+
+def revalue_portfolio(wallet_address: str) -> dict:
+    """
+    Re-price the wallet's last known holdings from holdings_cache without
+    any RPC, Alchemy or metadata calls. The result carries holdings_as_of
+    (unix time of the oldest chain's balances) and holdings_age seconds.
+    Falls back to a full fetch when nothing is cached for the wallet.
+    """
+    if not wallet_address:
+        raise ValueError("Wallet address is required")
+
+    wallet_address = normalize_evm_address(wallet_address)
+
+    all_holdings, chain_status, as_of = _cached_holdings(wallet_address)
+    if as_of is None:
+        logger.info("No cached holdings for %s, doing a full fetch", wallet_address)
+        return fetch_multi_chain_portfolio(wallet_address)
+
+    result = _price_and_value(wallet_address, all_holdings, chain_status)
+    result["holdings_as_of"] = as_of
+    result["holdings_age"] = int(time.time()) - as_of
+    return result
+
+
+def fetch_multi_wallet_portfolios(
+    wallet_addresses: Iterable[str], revalue: bool = False
+) -> dict:
+    """
+    Portfolios for many wallets in one pass. Holdings are fetched (or, with
+    revalue, read from holdings_cache) for all wallets concurrently; every
+    (chain, contract) in the union is then priced once, so upstream price
+    lookups scale with distinct tokens rather than wallets x tokens.
+
+    Returns {"wallets": {address: portfolio}, "household": portfolio of all
+    wallets merged, "distinct_tokens": n}; each wallet's portfolio is what
+    fetch_multi_chain_portfolio() or revalue_portfolio() would return.
+    """
+    wallets = list(dict.fromkeys(normalize_evm_address(w) for w in wallet_addresses))
+    if not wallets:
+        raise ValueError("At least one wallet address is required")
+
+    def gather(wallet):
+        if revalue:
+            holdings, chain_status, as_of = _cached_holdings(wallet)
+            if as_of is not None:
+                return holdings, chain_status, as_of
+        return (*_fetch_holdings(wallet), None)
+
+    workers = min(MULTI_WALLET_WORKERS, len(wallets))
+    with ThreadPoolExecutor(workers, thread_name_prefix="wallet-fetch") as pool:
+        gathered = dict(zip(wallets, pool.map(gather, wallets)))
+
+    tables = {
+        wallet: _filter_holdings(holdings)
+        for wallet, (holdings, _, _) in gathered.items()
+        if holdings
+    }
+
+    native_chains: Set[str] = set()
+    erc20_by_chain: Dict[str, Dict[str, str]] = {}
+    for table in tables.values():
+        natives, erc20s = _tokens(table)
+        native_chains |= natives
+        for chain, tokens in erc20s.items():
+            erc20_by_chain.setdefault(chain, {}).update(tokens)
+
+    distinct = len(native_chains) + sum(len(t) for t in erc20_by_chain.values())
+    logger.info("Pricing %d distinct tokens for %d wallets", distinct, len(wallets))
+    prices = _fetch_prices(native_chains, erc20_by_chain)
+
+    results = {}
+    for wallet, (_, chain_status, as_of) in gathered.items():
+        table = tables.get(wallet)
+        if table:
+            result = _value(wallet, table, chain_status, *prices)
+        else:
+            result = {**_empty_portfolio(), "chain_status": chain_status}
+        if as_of is not None:
+            result["holdings_as_of"] = as_of
+            result["holdings_age"] = int(time.time()) - as_of
+        results[wallet] = result
+
+    household = deduplicate_positions(
+        [p for result in results.values() for p in result["portfolio"]]
+    )
+    version = portfolio_version(household)
+    summary = build_portfolio_summary(household, version)
+
+    return {
+        "wallets": results,
+        "household": {
+            "portfolio": household,
+            "total_value": summary.get("total_value", 0.0),
+            "total_pnl": summary.get("total_pnl", 0.0),
+            "version": version,
+            "pending_prices": sum(r.get("pending_prices", 0) for r in results.values()),
+        },
+        "distinct_tokens": distinct,
     }
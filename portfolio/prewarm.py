@@ -0,0 +1,180 @@
+import os
+import time
+import logging
+import threading
+from typing import Dict, List, Tuple
+
+from portfolio.cache.sqlite import ensure_db, get_cached_assets
+from portfolio.cache.prices import asset_key, get_cached_prices, price_ttl
+from portfolio.filters.reputation import contract_skips
+from portfolio.filters.scam import classify
+from portfolio.pricing import (
+    ERC20_BATCH_SIZE,
+    NATIVE_SYMBOLS,
+    get_erc20_prices,
+    get_native_prices,
+)
+from portfolio.ratelimit import RATE_LIMITS, TokenBucket
+
+logger = logging.getLogger(__name__)
+
+PREWARM_INTERVAL = float(os.getenv("PRICE_PREWARM_INTERVAL", "60"))
+# Fraction of each upstream's quota the warmer may use
+PREWARM_QUOTA_SHARE = float(os.getenv("PRICE_PREWARM_QUOTA_SHARE", "0.25"))
+# Refresh a price once this fraction of its TTL has elapsed
+PREWARM_REFRESH_AT = float(os.getenv("PRICE_PREWARM_REFRESH_AT", "0.8"))
+# Only tokens of wallets whose holdings were fetched this recently are warmed
+PREWARM_HOLDINGS_MAX_AGE = int(os.getenv("PRICE_PREWARM_HOLDINGS_MAX_AGE", "604800"))
+
+
+def prewarm_enabled() -> bool:
+    # Read on each call, so a .env loaded after import still counts
+    return os.getenv("PRICE_PREWARM_ENABLED", "").lower() in {"1", "true"}
+
+
+def _is_due(key: str, entry, now: int) -> bool:
+    if entry is None:
+        return True
+    return now - entry.updated_at >= price_ttl(key, entry.price) * PREWARM_REFRESH_AT
+
+
+def plan_prewarm() -> Tuple[List[str], List[Tuple[str, str]]]:
+    """
+    Native chains and (chain, contract) pairs whose cached price is missing
+    or close to expiry. Only tokens of wallets seen within
+    PREWARM_HOLDINGS_MAX_AGE count, and tokens the scam filter or the
+    reputation pre-filter would drop are left out. ERC-20s are ordered by
+    how many wallets hold them, then by their cached value across those
+    wallets.
+    """
+    ensure_db()
+    now = int(time.time())
+
+    # holdings_cache is written before scam filtering
+    by_chain: Dict[str, Dict[str, Tuple[str, int, float]]] = {}
+    for chain, contract, symbol, wallets, amount in get_cached_assets(
+        PREWARM_HOLDINGS_MAX_AGE
+    ):
+        if contract and not classify(symbol, chain, contract)[0]:
+            by_chain.setdefault(chain, {})[contract.lower()] = (
+                symbol,
+                wallets,
+                amount or 0.0,
+            )
+
+    holders: Dict[Tuple[str, str], Tuple[int, float]] = {}
+    for chain, assets in by_chain.items():
+        metadata = {c: {"symbol": symbol} for c, (symbol, _, _) in assets.items()}
+        skips = contract_skips(chain, assets, metadata)
+        for contract, (_, wallets, amount) in assets.items():
+            if contract not in skips:
+                holders[(chain, contract)] = (wallets, amount)
+
+    natives = list(NATIVE_SYMBOLS)
+    cached = get_cached_prices(
+        [asset_key(chain) for chain in natives]
+        + [asset_key(chain, contract) for chain, contract in holders]
+    )
+
+    def priority(item):
+        wallets, amount = holders[item]
+        entry = cached.get(asset_key(*item))
+        price = entry.price if entry and entry.price else 0.0
+        return (wallets, amount * price)
+
+    due_natives = [
+        c for c in natives if _is_due(asset_key(c), cached.get(asset_key(c)), now)
+    ]
+    due_erc20 = sorted(
+        (
+            item
+            for item in holders
+            if _is_due(asset_key(*item), cached.get(asset_key(*item)), now)
+        ),
+        key=priority,
+        reverse=True,
+    )
+    return due_natives, due_erc20
+
+
+def _batches(items: List[Tuple[str, str]]) -> List[Tuple[str, List[str]]]:
+    """Per-chain batches, highest-priority batch first."""
+    rank = {item: i for i, item in enumerate(items)}
+    by_chain: Dict[str, List[str]] = {}
+    for chain, contract in items:
+        by_chain.setdefault(chain, []).append(contract)
+
+    batches = []
+    for chain, contracts in by_chain.items():
+        for i in range(0, len(contracts), ERC20_BATCH_SIZE):
+            batch = contracts[i : i + ERC20_BATCH_SIZE]
+            batches.append((rank[(chain, batch[0])], chain, batch))
+
+    return [(chain, batch) for _, chain, batch in sorted(batches)]
+
+
+class PricePrewarmer(threading.Thread):
+    """
+    Daemon that keeps prices for everything in holdings_cache warm, so
+    dashboard requests almost always hit the price cache. It paces itself
+    with its own token buckets sized to a share of each upstream's quota,
+    on top of the shared per-host buckets.
+    """
+
+    def __init__(
+        self,
+        interval: float = PREWARM_INTERVAL,
+        quota_share: float = PREWARM_QUOTA_SHARE,
+    ):
+        super().__init__(name="price-prewarmer", daemon=True)
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._buckets = {
+            host: TokenBucket(rate * quota_share, 1)
+            for host, (rate, _) in RATE_LIMITS.items()
+        }
+
+    def run(self):
+        logger.info("Price pre-warmer started (every %.0fs)", self.interval)
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Price pre-warm cycle failed")
+            self._stop_event.wait(self.interval)
+
+    def run_once(self) -> int:
+        natives, erc20 = plan_prewarm()
+        refreshed = 0
+
+        if natives:
+            self._buckets["api.coingecko.com"].acquire()
+            get_native_prices(natives, refresh=True)
+            refreshed += len(natives)
+
+        for chain, batch in _batches(erc20):
+            if self._stop_event.is_set():
+                break
+            self._buckets["api.geckoterminal.com"].acquire()
+            get_erc20_prices(chain, batch, refresh=True)
+            refreshed += len(batch)
+
+        if refreshed:
+            logger.info("Pre-warmed %d prices", refreshed)
+        return refreshed
+
+    def stop(self):
+        self._stop_event.set()
+
+
+_prewarmer: PricePrewarmer | None = None
+_prewarmer_lock = threading.Lock()
+
+
+def start_price_prewarmer() -> PricePrewarmer:
+    global _prewarmer
+    with _prewarmer_lock:
+        if _prewarmer is None or not _prewarmer.is_alive():
+            _prewarmer = PricePrewarmer()
+            _prewarmer.start()
+        return _prewarmer
@@ -1,7 +1,19 @@
-import logging
-import requests
+import os
 import time
-from typing import Dict, List
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, List, Optional, Tuple
+
+from portfolio.ratelimit import RateLimited, get_with_retry, limited_get
+from portfolio.cache.prices import (
+    asset_key,
+    get_cached_prices,
+    get_priced_before,
+    set_cached_prices,
+)
+from portfolio.filters.scam import contract_lists
 
 log = logging.getLogger(__name__)
 
@@ -17,6 +29,25 @@ NETWORK_SLUGS = {
     "bsc": "bsc",
 }
 
+# GeckoTerminal accepts up to 30 addresses per token_price request
+ERC20_BATCH_SIZE = 30
+
+# 429s a single GeckoTerminal batch may hit before it is given up on
+MAX_BATCH_ATTEMPTS = 4
+
+# How long concurrent callers' misses are collected into shared batches
+PRICE_COALESCE_WINDOW = float(os.getenv("PRICE_COALESCE_WINDOW_MS", "50")) / 1000
+
+# Longest a caller waits on a shared batch before treating its tokens as misses
+PRICE_COALESCE_TIMEOUT = float(os.getenv("PRICE_COALESCE_TIMEOUT", "30"))
+
+# Price long-tail tokens the cache knows nothing about in the background
+# rather than making the dashboard wait for them
+PRICE_TAIL_IN_BACKGROUND = os.getenv("PRICE_TAIL_IN_BACKGROUND", "true").lower() in {
+    "1",
+    "true",
+}
+
 ETH_CHAINS = {"ethereum", "arbitrum", "optimism", "base"}
 
 NATIVE_SYMBOLS = {
@@ -42,14 +73,14 @@ STABLECOIN_SYMBOLS = {
     "EURS",
 }
 
-# Cached prices from CoinGecko
-_cached_eth_price: float | None = None
-_cached_bnb_price: float | None = None
+_revalidator = ThreadPoolExecutor(max_workers=2, thread_name_prefix="price-refresh")
+_revalidating: set = set()
+_revalidating_lock = threading.Lock()
 
 
 def _fetch_coingecko_price(coin_id: str) -> float | None:
     try:
-        r = requests.get(
+        r = get_with_retry(
             COINGECKO_SIMPLE,
             params={"ids": coin_id, "vs_currencies": "usd"},
             timeout=10,
@@ -65,38 +96,51 @@ def _fetch_coingecko_price(coin_id: str) -> float | None:
 
 
 def _fetch_eth_price() -> float | None:
-    global _cached_eth_price
-    if _cached_eth_price is not None:
-        return _cached_eth_price
-
     price = _fetch_coingecko_price("ethereum")
     if price:
-        _cached_eth_price = price
         log.info("CoinGecko ETH price: $%.2f", price)
     return price
 
 
 def _fetch_bnb_price() -> float | None:
-    global _cached_bnb_price
-    if _cached_bnb_price is not None:
-        return _cached_bnb_price
-
     price = _fetch_coingecko_price("binancecoin")
     if price:
-        _cached_bnb_price = price
         log.info("CoinGecko BNB price: $%.2f", price)
     return price
 
 
-def get_native_prices(chains: List[str]) -> Dict[str, float]:
+def _fetch_pol_price() -> float | None:
+    slug = NETWORK_SLUGS["polygon"]
+    try:
+        url = f"{GECKOTERMINAL_BASE}/simple/networks/{slug}/token_price/POL"
+        r = get_with_retry(url, timeout=15)
+        r.raise_for_status()
+        data = r.json()
+        usd_str = (
+            data.get("data", {})
+            .get("attributes", {})
+            .get("token_prices", {})
+            .get("POL")
+        )
+        if usd_str:
+            price = float(usd_str)
+            if price > 0:
+                return price
+    except Exception as e:
+        log.warning("POL price fetch failed: %s", e)
+    return None
+
+
+def _fetch_native_prices(chains: List[str]) -> Dict[str, float]:
     prices = {}
 
     # ETH chains (mainnet + L2s)
-    eth_price = _fetch_eth_price()
-    if eth_price:
-        for chain in chains:
-            if chain in ETH_CHAINS:
-                prices[chain] = eth_price
+    if any(chain in ETH_CHAINS for chain in chains):
+        eth_price = _fetch_eth_price()
+        if eth_price:
+            for chain in chains:
+                if chain in ETH_CHAINS:
+                    prices[chain] = eth_price
 
     # BNB
     if "bsc" in chains:
@@ -108,52 +152,37 @@ def get_native_prices(chains: List[str]) -> Dict[str, float]:
 
     # POL
     if "polygon" in chains:
-        slug = NETWORK_SLUGS["polygon"]
-        try:
-            url = f"{GECKOTERMINAL_BASE}/simple/networks/{slug}/token_price/POL"
-            r = requests.get(url, timeout=15)
-            r.raise_for_status()
-            data = r.json()
-            usd_str = (
-                data.get("data", {})
-                .get("attributes", {})
-                .get("token_prices", {})
-                .get("POL")
-            )
-            if usd_str:
-                price = float(usd_str)
-                if price > 0:
-                    prices["polygon"] = price
-        except Exception as e:
-            log.warning("POL price fetch failed: %s", e)
-
-        time.sleep(1)
+        pol_price = _fetch_pol_price()
+        if pol_price:
+            prices["polygon"] = pol_price
 
     return prices
 
 
-def get_erc20_prices(chain: str, contracts: List[str]) -> Dict[str, float]:
-    if not contracts:
-        return {}
-
-    slug = NETWORK_SLUGS.get(chain)
-    if not slug:
-        return {}
+def _fetch_erc20_prices(chain: str, contracts: List[str]):
+    """
+    Uncached GeckoTerminal lookup. Returns the prices found plus the set of
+    contracts whose batch actually completed, so tokens missing from a
+    successful response can be remembered as unpriceable.
 
-    contracts = list(set(c.lower() for c in contracts if c))
+    Pacing comes from the shared GeckoTerminal token bucket; a batch that
+    gets a 429 goes to the back of the queue instead of being dropped.
+    """
+    slug = NETWORK_SLUGS[chain]
     prices: Dict[str, float] = {}
-    batch_size = 30
-
-    for i in range(0, len(contracts), batch_size):
-        batch = contracts[i : i + batch_size]
+    resolved: set = set()
+    queue = deque(
+        (contracts[i : i + ERC20_BATCH_SIZE], 0)
+        for i in range(0, len(contracts), ERC20_BATCH_SIZE)
+    )
+
+    while queue:
+        batch, attempts = queue.popleft()
         addresses = ",".join(batch)
 
         try:
             url = f"{GECKOTERMINAL_BASE}/simple/networks/{slug}/token_price/{addresses}"
-            r = requests.get(url, timeout=20)
-            if r.status_code == 429:
-                time.sleep(15)
-                continue
+            r = limited_get(url, timeout=20)
             r.raise_for_status()
             data = r.json()
             token_prices = (
@@ -167,14 +196,279 @@ def get_erc20_prices(chain: str, contracts: List[str]) -> Dict[str, float]:
                         prices[addr.lower()] = price
                 except:
                     continue
+            resolved.update(batch)
+        except RateLimited:
+            if attempts + 1 < MAX_BATCH_ATTEMPTS:
+                queue.append((batch, attempts + 1))
+            else:
+                log.error(
+                    "ERC20 batch on %s dropped after %d 429s", chain, attempts + 1
+                )
         except Exception as e:
             log.error("ERC20 batch failed: %s", e)
 
-        time.sleep(2)
+    return prices, resolved
+
+
+def _refresh_native_prices(chains: List[str]) -> Dict[str, float]:
+    prices = _fetch_native_prices(chains)
+    set_cached_prices({asset_key(chain): price for chain, price in prices.items()})
+    return prices
+
+
+def _refresh_erc20_prices(chain: str, contracts: List[str]) -> Dict[str, float]:
+    prices, resolved = _fetch_erc20_prices(chain, contracts)
+    set_cached_prices(
+        {asset_key(chain, c): prices.get(c) for c in contracts if c in resolved}
+    )
+    return prices
+
+
+class _PriceCoalescer:
+    """
+    Singleflight for ERC-20 price lookups across concurrent requests.
+
+    Every (chain, contract) has at most one upstream fetch in flight; other
+    callers wait on its Future. Misses from different callers are collected
+    for PRICE_COALESCE_WINDOW and sent together in shared 30-address
+    GeckoTerminal batches (full batches go out immediately). Windowed
+    batches are flushed by one long-lived worker thread, so its SQLite
+    connection is reused rather than opened per flush.
+    """
+
+    def __init__(
+        self, window: float, batch_size: int, timeout: float = PRICE_COALESCE_TIMEOUT
+    ):
+        self.window = window
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._inflight: Dict[tuple, Future] = {}
+        self._pending: Dict[str, List[str]] = {}
+        self._due: Dict[str, float] = {}
+        self._wakeup = threading.Condition(self._lock)
+        self._worker: Optional[threading.Thread] = None
+
+    def fetch(self, chain: str, contracts: List[str]) -> Dict[str, float]:
+        futures: Dict[str, Future] = {}
+        ready: List[List[str]] = []
+
+        with self._lock:
+            pending = self._pending.setdefault(chain, [])
+            for contract in contracts:
+                future = self._inflight.get((chain, contract))
+                if future is None:
+                    future = Future()
+                    self._inflight[(chain, contract)] = future
+                    pending.append(contract)
+                futures[contract] = future
+
+            while len(pending) >= self.batch_size or (pending and self.window <= 0):
+                ready.append(pending[: self.batch_size])
+                del pending[: self.batch_size]
+
+            if pending and chain not in self._due:
+                self._due[chain] = time.monotonic() + self.window
+                if self._worker is None:
+                    self._worker = threading.Thread(
+                        target=self._run, name="price-coalescer", daemon=True
+                    )
+                    self._worker.start()
+                self._wakeup.notify()
+
+        for batch in ready:
+            self._dispatch(chain, batch)
+
+        prices = {}
+        timed_out = 0
+        deadline = time.monotonic() + self.timeout
+        for contract, future in futures.items():
+            try:
+                price = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeout:
+                timed_out += 1
+                continue
+            if price is not None:
+                prices[contract] = price
+
+        if timed_out:
+            log.warning(
+                "Gave up waiting on %d coalesced ERC20 prices on %s", timed_out, chain
+            )
+        return prices
+
+    def _run(self) -> None:
+        while True:
+            with self._wakeup:
+                while True:
+                    now = time.monotonic()
+                    due = [c for c, at in self._due.items() if at <= now]
+                    if due:
+                        break
+                    next_at = min(self._due.values(), default=None)
+                    self._wakeup.wait(None if next_at is None else next_at - now)
+                flushes = []
+                for chain in due:
+                    del self._due[chain]
+                    flushes.append((chain, self._pending.pop(chain, [])))
+
+            for chain, pending in flushes:
+                for i in range(0, len(pending), self.batch_size):
+                    self._dispatch(chain, pending[i : i + self.batch_size])
+
+    def _dispatch(self, chain: str, batch: List[str]) -> None:
+        prices: Dict[str, float] = {}
+        try:
+            prices = _refresh_erc20_prices(chain, batch)
+        except Exception:
+            log.exception("Coalesced ERC20 price batch failed on %s", chain)
+        finally:
+            # Whatever happened, release every waiter on this batch
+            with self._lock:
+                futures = [self._inflight.pop((chain, c), None) for c in batch]
+            for contract, future in zip(batch, futures):
+                if future is not None and not future.done():
+                    future.set_result(prices.get(contract))
+
+
+_coalescer = _PriceCoalescer(PRICE_COALESCE_WINDOW, ERC20_BATCH_SIZE)
+
+
+def _revalidate(keys: List[str], refresh, *args) -> None:
+    """Fetch `keys` upstream in the background, once per key at a time."""
+    with _revalidating_lock:
+        keys = [k for k in keys if k not in _revalidating]
+        if not keys:
+            return
+        _revalidating.update(keys)
+
+    def run():
+        try:
+            refresh(*args)
+        except Exception:
+            log.exception("Background price refresh failed")
+        finally:
+            with _revalidating_lock:
+                _revalidating.difference_update(keys)
+
+    _revalidator.submit(run)
+
+
+def get_native_prices(chains: List[str], refresh: bool = False) -> Dict[str, float]:
+    """
+    Native USD prices per chain. refresh=True skips the cache read and
+    always goes upstream (used by the pre-warmer).
+    """
+    chains = list(dict.fromkeys(chains))
+    if refresh:
+        return _refresh_native_prices(chains)
+
+    cached = get_cached_prices(asset_key(chain) for chain in chains)
+
+    prices = {}
+    stale, missing = [], []
+    for chain in chains:
+        entry = cached.get(asset_key(chain))
+        if entry is None or entry.price is None:
+            missing.append(chain)
+            continue
+        prices[chain] = entry.price
+        if not entry.fresh:
+            stale.append(chain)
+
+    if stale:
+        _revalidate([asset_key(c) for c in stale], _refresh_native_prices, stale)
+
+    if missing:
+        prices.update(_refresh_native_prices(missing))
+
+    return prices
+
+
+def get_erc20_prices(
+    chain: str, contracts: List[str], refresh: bool = False
+) -> Dict[str, float]:
+    if not contracts:
+        return {}
+
+    slug = NETWORK_SLUGS.get(chain)
+    if not slug:
+        return {}
+
+    contracts = list(set(c.lower() for c in contracts if c))
+    if refresh:
+        return _coalescer.fetch(chain, contracts)
+
+    cached = get_cached_prices(asset_key(chain, c) for c in contracts)
+
+    prices: Dict[str, float] = {}
+    stale, missing = [], []
+    for contract in contracts:
+        entry = cached.get(asset_key(chain, contract))
+        if entry is None:
+            missing.append(contract)
+            continue
+        if entry.price is not None:
+            prices[contract] = entry.price
+        if not entry.fresh:
+            stale.append(contract)
+
+    log.info(
+        "ERC20 prices on %s: %d cached, %d stale, %d to fetch",
+        chain,
+        len(contracts) - len(missing),
+        len(stale),
+        len(missing),
+    )
+
+    if stale:
+        _revalidate(
+            [asset_key(chain, c) for c in stale], _coalescer.fetch, chain, stale
+        )
+
+    if missing:
+        prices.update(_coalescer.fetch(chain, missing))
 
     return prices
 
 
+def prioritize_erc20_pricing(
+    chain: str, tokens: Dict[str, str]
+) -> Tuple[List[str], List[str]]:
+    """
+    Split `tokens` (contract -> symbol) into those to price now and a
+    deferred tail, whose upstream lookup is started in the background and
+    lands in the price cache for later renders. Tokens likely to matter
+    (allowlisted/known, stablecoins, or priced above zero before) and
+    tokens the cache can answer are priced now.
+    """
+    if not PRICE_TAIL_IN_BACKGROUND or not NETWORK_SLUGS.get(chain):
+        return list(tokens), []
+
+    _, allow = contract_lists()
+    tail = [
+        c
+        for c, symbol in tokens.items()
+        if (chain, c) not in allow and (symbol or "").upper() not in STABLECOIN_SYMBOLS
+    ]
+    if tail:
+        priced = get_priced_before(asset_key(chain, c) for c in tail)
+        cached = get_cached_prices(asset_key(chain, c) for c in tail)
+        tail = [
+            c
+            for c in tail
+            if asset_key(chain, c) not in priced and asset_key(chain, c) not in cached
+        ]
+
+    deferred = set(tail)
+    if tail:
+        log.info(
+            "Pricing %d long-tail tokens on %s in the background", len(tail), chain
+        )
+        _revalidate([asset_key(chain, c) for c in tail], _coalescer.fetch, chain, tail)
+    return [c for c in tokens if c not in deferred], tail
+
+
 def get_price_with_stable_fallback(symbol: str, chain_price: float | None) -> float:
     if chain_price is not None and chain_price > 0:
         return chain_price
@@ -0,0 +1,150 @@
+import os
+import time
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Dict
+from urllib.parse import urlsplit
+
+import requests
+
+from portfolio import http_client
+
+logger = logging.getLogger(__name__)
+
+# Requests per minute and burst size for each upstream host
+RATE_LIMITS = {
+    "api.geckoterminal.com": (
+        float(os.getenv("GECKOTERMINAL_RATE_PER_MIN", "30")),
+        float(os.getenv("GECKOTERMINAL_BURST", "5")),
+    ),
+    "api.coingecko.com": (
+        float(os.getenv("COINGECKO_RATE_PER_MIN", "10")),
+        float(os.getenv("COINGECKO_BURST", "3")),
+    ),
+}
+DEFAULT_RATE_LIMIT = (600.0, 20.0)
+
+# Back-off used when a 429 comes without a usable Retry-After header
+DEFAULT_RETRY_AFTER = 15.0
+MAX_RETRY_AFTER = 120.0
+
+
+class RateLimited(Exception):
+    def __init__(self, host: str, retry_after: float):
+        super().__init__(f"{host} rate limited, retry after {retry_after:.1f}s")
+        self.host = host
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    Token bucket shared by every thread talking to one host. Waiters are
+    served strictly in arrival order so concurrent requests share the quota
+    fairly, and a 429 pauses the whole bucket for its Retry-After.
+    """
+
+    def __init__(self, rate_per_min: float, burst: float):
+        self.rate = rate_per_min / 60.0
+        self.capacity = max(1.0, burst)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._next_ticket = 0
+        self._serving = 0
+        self._cond = threading.Condition()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """Block until a token is available; returns seconds spent waiting."""
+        start = time.monotonic()
+        with self._cond:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+
+            while True:
+                now = time.monotonic()
+                if ticket == self._serving:
+                    self._refill(now)
+                    if now >= self._paused_until and self._tokens >= 1:
+                        self._tokens -= 1
+                        self._serving += 1
+                        self._cond.notify_all()
+                        return now - start
+                    wait = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+                    self._cond.wait(wait)
+                else:
+                    self._cond.wait()
+
+    def pause(self, seconds: float) -> None:
+        with self._cond:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._refill(now)
+            self._tokens = 0.0
+            self._cond.notify_all()
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def get_bucket(host: str) -> TokenBucket:
+    with _buckets_lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(*RATE_LIMITS.get(host, DEFAULT_RATE_LIMIT))
+            _buckets[host] = bucket
+        return bucket
+
+
+def _retry_after(response: requests.Response) -> float:
+    header = response.headers.get("Retry-After")
+    if not header:
+        return DEFAULT_RETRY_AFTER
+
+    try:
+        seconds = float(header)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(header).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return DEFAULT_RETRY_AFTER
+
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+def limited_get(url: str, **kwargs) -> requests.Response:
+    """
+    GET through the host's token bucket. A 429 pauses the bucket for every
+    caller and raises RateLimited so the caller can requeue its work.
+    """
+    host = urlsplit(url).hostname or ""
+    bucket = get_bucket(host)
+
+    waited = bucket.acquire()
+    if waited > 0.5:
+        logger.debug("Waited %.1fs for %s quota", waited, host)
+
+    r = http_client.get(url, **kwargs)
+    if r.status_code == 429:
+        retry_after = _retry_after(r)
+        bucket.pause(retry_after)
+        logger.warning("%s returned 429, pausing %.1fs", host, retry_after)
+        raise RateLimited(host, retry_after)
+
+    return r
+
+
+def get_with_retry(url: str, attempts: int = 3, **kwargs) -> requests.Response:
+    """limited_get() that simply tries again (after the pause) on 429."""
+    for attempt in range(attempts):
+        try:
+            return limited_get(url, **kwargs)
+        except RateLimited:
+            if attempt == attempts - 1:
+                raise
@@ -0,0 +1,142 @@
+import logging
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from portfolio.calculator import MAX_REASONABLE_VALUE
+from portfolio.models import Holding, HoldingTable
+
+logger = logging.getLogger(__name__)
+
+
+def value_arrays(
+    amount: np.ndarray, cost_basis: np.ndarray, price: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """
+    Vectorized calculate_position() over columns of float64. The arithmetic
+    is done in the same order as the scalar version, so every element is
+    bit-for-bit what it would compute before rounding.
+    """
+    invested = amount * cost_basis
+    raw_value = amount * price
+
+    capped = raw_value > MAX_REASONABLE_VALUE
+    current_value = np.where(capped, float(MAX_REASONABLE_VALUE), raw_value)
+
+    pnl = current_value - invested
+    has_cost = invested > 0
+    pnl_pct = np.zeros_like(pnl)
+    np.divide(pnl, invested, out=pnl_pct, where=has_cost)
+    np.multiply(pnl_pct, 100, out=pnl_pct, where=has_cost)
+
+    return {
+        "invested": invested,
+        "raw_value": raw_value,
+        "current_value": current_value,
+        "capped": capped,
+        "pnl": pnl,
+        "pnl_pct": pnl_pct,
+    }
+
+
+def _round2(values: np.ndarray) -> List[float]:
+    """
+    round(v, 2) for every element, as Python floats. np.round() scales by
+    100 and rints, which can only disagree with Python's correctly rounded
+    round() when v * 100 lies within float error of a half cent, or is too
+    large to scale exactly; those few elements are redone with round().
+    """
+    scaled = values * 100
+    rounded = np.round(values, 2).tolist()
+
+    with np.errstate(invalid="ignore"):
+        frac = np.abs(scaled - np.trunc(scaled))
+        near_tie = np.abs(frac - 0.5) <= np.abs(scaled) * 2.0**-50
+        unsafe = near_tie | ~(np.abs(values) < 2.0**46)
+
+    for i in np.flatnonzero(unsafe).tolist():
+        rounded[i] = round(float(values[i]), 2)
+    return rounded
+
+
+def value_holdings(holdings: Sequence[Holding], prices: Sequence[float]) -> List[dict]:
+    """
+    Positions for `holdings` priced at `prices`, identical to calling
+    calculate_position() on each pair and dropping the Nones, in one pass.
+    """
+    if not holdings:
+        return []
+
+    amount = np.fromiter((h.amount for h in holdings), float, len(holdings))
+    # `not amount <= 0` rather than `amount > 0`, so NaN is kept like the loop
+    keep = np.flatnonzero(~(amount <= 0))
+
+    cost_basis = np.fromiter((h.cost_basis for h in holdings), float, len(holdings))
+    price = np.asarray(prices, dtype=float)
+    cols = value_arrays(amount[keep], cost_basis[keep], price[keep])
+
+    invested = _round2(cols["invested"])
+    current_value = _round2(cols["current_value"])
+    pnl = _round2(cols["pnl"])
+    pnl_pct = _round2(cols["pnl_pct"])
+    capped = cols["capped"].tolist()
+    zero_value = (cols["current_value"] == 0).tolist()
+
+    positions = []
+    for j, i in enumerate(keep.tolist()):
+        h = holdings[i]
+        note = None
+        if capped[j]:
+            logger.warning(
+                "Capped value for %s: $%.2f → $%.2f",
+                h.symbol,
+                cols["raw_value"][j],
+                MAX_REASONABLE_VALUE,
+            )
+            note = "Value capped (scam/bad price)"
+        if zero_value[j] and not h.is_erc20:
+            note = "Price unavailable (using $0)"
+
+        pos = {
+            "symbol": h.symbol,
+            "amount": h.amount,
+            "invested": invested[j],
+            "current_value": MAX_REASONABLE_VALUE if capped[j] else current_value[j],
+            "pnl": pnl[j],
+            "pnl_pct": pnl_pct[j],
+            "price_available": prices[i] > 0,
+            "chain": h.chain,
+        }
+        if note:
+            pos["note"] = note
+        positions.append(pos)
+
+    return positions
+
+
+def value_table(
+    table: HoldingTable, prices: Sequence[float]
+) -> Tuple[HoldingTable, Dict[str, np.ndarray]]:
+    """
+    value_holdings() without the per-position dicts: the rows that would
+    become positions, plus their rounded invested and current_value columns,
+    which is all merging needs.
+    """
+    keep = np.flatnonzero(~(table.amount <= 0))
+    table = table.take(keep)
+    cols = value_arrays(
+        table.amount, table.cost_basis, np.asarray(prices, dtype=float)[keep]
+    )
+
+    for i in np.flatnonzero(cols["capped"]).tolist():
+        logger.warning(
+            "Capped value for %s: $%.2f → $%.2f",
+            table.symbol[i],
+            cols["raw_value"][i],
+            MAX_REASONABLE_VALUE,
+        )
+
+    return table, {
+        "invested": np.array(_round2(cols["invested"]), dtype=float),
+        "current_value": np.array(_round2(cols["current_value"]), dtype=float),
+    }
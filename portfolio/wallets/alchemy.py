@@ -2,11 +2,18 @@ import os
 import logging
 import time
 import random
+import threading
 import requests
-from typing import List
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Dict, List, Set
 
+from portfolio import http_client
 from portfolio.models import Holding
-from portfolio.cache.token_metadata import load_token_cache, save_token_cache
+from portfolio.filters.reputation import prefilter_balances
+from portfolio.cache.token_metadata import (
+    get_token_metadata_many,
+    save_token_metadata,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -20,8 +27,23 @@ CHAIN_URLS = {
     "base": "https://base-mainnet.g.alchemy.com/v2/",
 }
 
+METADATA_BATCH_SIZE = int(os.getenv("ALCHEMY_METADATA_BATCH_SIZE", "50"))
+METADATA_RETRY_ROUNDS = 2
+# Base pause before each retry round, doubled every round plus jitter
+METADATA_RETRY_BACKOFF = float(os.getenv("ALCHEMY_METADATA_RETRY_BACKOFF", "1"))
 
-def _alchemy_post(chain: str, payload: dict) -> dict:
+UNKNOWN_TOKEN_METADATA = {"symbol": "UNKNOWN", "decimals": 18}
+
+# Longest a wallet waits on another one's lookup of the same contracts
+METADATA_WAIT_TIMEOUT = float(os.getenv("ALCHEMY_METADATA_WAIT_TIMEOUT", "30"))
+
+# (chain, contract) -> Future of (metadata, is_fallback), while a resolution
+# is running
+_inflight: Dict[tuple, Future] = {}
+_inflight_lock = threading.Lock()
+
+
+def _alchemy_post(chain: str, payload: dict | list) -> dict | list:
     if not ALCHEMY_KEY:
         raise RuntimeError("ALCHEMY_API_KEY not set")
 
@@ -29,7 +51,7 @@ def _alchemy_post(chain: str, payload: dict) -> dict:
 
     for attempt in range(5):
         try:
-            r = requests.post(url, json=payload, timeout=30)
+            r = http_client.post(url, json=payload, timeout=30)
             r.raise_for_status()
             return r.json()
         except requests.exceptions.HTTPError as e:
@@ -51,31 +73,146 @@ def _alchemy_post(chain: str, payload: dict) -> dict:
             time.sleep(2**attempt + random.random())
 
 
-def _get_token_metadata(chain: str, contract: str, cache: dict) -> dict:
-    contract_lower = contract.lower()
-    if contract_lower in cache:
-        return cache[contract_lower]
-
-    payload = {
-        "jsonrpc": "2.0",
-        "id": 1,
-        "method": "alchemy_getTokenMetadata",
-        "params": [contract],
+def _parse_token_metadata(result: dict) -> dict:
+    decimals = result.get("decimals")
+    return {
+        "symbol": result.get("symbol") or "UNKNOWN",
+        "decimals": int(decimals) if decimals is not None else 18,
     }
 
-    try:
-        data = _alchemy_post(chain, payload)
-        result = data.get("result", {})
-        symbol = result.get("symbol") or "UNKNOWN"
-        decimals = int(result.get("decimals", 18))
-    except Exception:
+
+def _fetch_metadata_batch(chain: str, contracts: List[str], cache: dict) -> List[str]:
+    """
+    Resolve one JSON-RPC batch of alchemy_getTokenMetadata calls.
+    Returns the contracts whose element came back with an error, so only
+    those are retried.
+    """
+    payload = [
+        {
+            "jsonrpc": "2.0",
+            "id": idx,
+            "method": "alchemy_getTokenMetadata",
+            "params": [contract],
+        }
+        for idx, contract in enumerate(contracts)
+    ]
+
+    responses = _alchemy_post(chain, payload)
+
+    if not isinstance(responses, list):
+        logger.warning("Unexpected metadata batch response on %s", chain)
+        return list(contracts)
+
+    by_id = {r.get("id"): r for r in responses if isinstance(r, dict)}
+
+    failed = []
+    for idx, contract in enumerate(contracts):
+        item = by_id.get(idx) or {}
+        result = item.get("result")
+        if "error" in item or not isinstance(result, dict):
+            failed.append(contract)
+            continue
+
+        try:
+            cache[contract] = _parse_token_metadata(result)
+        except (TypeError, ValueError):
+            failed.append(contract)
+
+    return failed
+
+
+def _resolve_batches(chain: str, pending: List[str], cache: dict) -> Set[str]:
+    """
+    Resolve `pending` into `cache`. Returns the contracts that could not be
+    resolved and got UNKNOWN_TOKEN_METADATA as a stand-in.
+    """
+    given_up: List[str] = []
+    for round_ in range(METADATA_RETRY_ROUNDS + 1):
+        if not pending:
+            break
+        if round_:
+            # Failed elements are often 429s; give the quota time to recover
+            time.sleep(METADATA_RETRY_BACKOFF * (2 ** (round_ - 1) + random.random()))
+
+        failed = []
+        for i in range(0, len(pending), METADATA_BATCH_SIZE):
+            batch = pending[i : i + METADATA_BATCH_SIZE]
+            try:
+                failed.extend(_fetch_metadata_batch(chain, batch, cache))
+            except Exception as e:
+                # _alchemy_post already retried the request itself; don't go again
+                logger.warning(
+                    "Metadata batch of %d failed on %s: %s", len(batch), chain, e
+                )
+                given_up.extend(batch)
+
+        pending = failed
+
+    for contract in pending:
         logger.warning("Failed to fetch metadata for token %s on %s", contract, chain)
-        symbol = "UNKNOWN"
-        decimals = 18
+    given_up.extend(pending)
+
+    for contract in given_up:
+        cache[contract] = dict(UNKNOWN_TOKEN_METADATA)
+    return set(given_up)
+
+
+def resolve_token_metadata(chain: str, contracts: List[str], cache: dict) -> Set[str]:
+    """
+    Fill `cache` with metadata for every contract it doesn't know yet,
+    using batched JSON-RPC calls of METADATA_BATCH_SIZE elements. A
+    contract already being resolved for another wallet is waited on
+    rather than requested again, for up to METADATA_WAIT_TIMEOUT.
+
+    Returns the contracts that only got UNKNOWN_TOKEN_METADATA after a
+    failure or timeout, whether this call or the one it waited on hit it;
+    that is a stand-in for this response and must not be stored.
+    """
+    pending = list(
+        dict.fromkeys(c.lower() for c in contracts if c.lower() not in cache)
+    )
+    if not pending:
+        return set()
+
+    owned, waiting = [], {}
+    with _inflight_lock:
+        for contract in pending:
+            future = _inflight.get((chain, contract))
+            if future is None:
+                _inflight[(chain, contract)] = Future()
+                owned.append(contract)
+            else:
+                waiting[contract] = future
 
-    meta = {"symbol": symbol, "decimals": decimals}
-    cache[contract_lower] = meta
-    return meta
+    fallback: Set[str] = set()
+    try:
+        if owned:
+            logger.info("Resolving metadata for %d tokens on %s", len(owned), chain)
+            fallback = _resolve_batches(chain, owned, cache)
+    finally:
+        with _inflight_lock:
+            futures = [_inflight.pop((chain, c)) for c in owned]
+        for contract, future in zip(owned, futures):
+            meta = cache.get(contract)
+            future.set_result(
+                (meta or UNKNOWN_TOKEN_METADATA, meta is None or contract in fallback)
+            )
+
+    deadline = time.monotonic() + METADATA_WAIT_TIMEOUT
+    for contract, future in waiting.items():
+        try:
+            meta, is_fallback = future.result(
+                timeout=max(0.0, deadline - time.monotonic())
+            )
+        except FutureTimeout:
+            logger.warning("Gave up waiting on metadata for %s on %s", contract, chain)
+            meta, is_fallback = UNKNOWN_TOKEN_METADATA, True
+
+        cache[contract] = dict(meta)
+        if is_fallback:
+            fallback.add(contract)
+
+    return fallback
 
 
 def fetch_erc20_holdings(wallet: str, chain: str) -> List[Holding]:
@@ -88,7 +225,6 @@ def fetch_erc20_holdings(wallet: str, chain: str) -> List[Holding]:
     )
 
     holdings: List[Holding] = []
-    cache = load_token_cache()
     page_key: str | None = None
 
     try:
@@ -115,6 +251,7 @@ def fetch_erc20_holdings(wallet: str, chain: str) -> List[Holding]:
                 page_key or "none",
             )
 
+            page = []
             for token in balances:
                 contract = token.get("contractAddress")
                 if not contract:
@@ -129,9 +266,22 @@ def fetch_erc20_holdings(wallet: str, chain: str) -> List[Holding]:
                 if raw == 0:
                     continue  # Skip zero balances
 
-                contract_lower = contract.lower()
-                meta = _get_token_metadata(chain, contract, cache)
+                page.append((contract.lower(), raw))
+
+            # Metadata is its own stage: one indexed lookup plus one batched
+            # resolution of unknown contracts per balance page. Tokens with a
+            # bad reputation are dropped before anything goes upstream.
+            cache = get_token_metadata_many(chain, [c for c, _ in page])
+            page = prefilter_balances(chain, page, cache)
+            contracts = [c for c, _ in page]
+            unknown = [c for c in contracts if c not in cache]
+            fallback = resolve_token_metadata(chain, unknown, cache)
+            save_token_metadata(
+                chain, {c: cache[c] for c in unknown if c not in fallback}
+            )
 
+            for contract_lower, raw in page:
+                meta = cache[contract_lower]
                 amount = raw / (10 ** meta["decimals"])
 
                 if amount > 0:
@@ -160,5 +310,4 @@ def fetch_erc20_holdings(wallet: str, chain: str) -> List[Holding]:
         logger.error("Failed to fetch ERC20 holdings on %s: %s", chain, str(e))
         holdings = []  # Graceful fallback
 
-    save_token_cache(cache)
     return holdings
@@ -1,7 +1,7 @@
 import logging
-import requests
+from portfolio import http_client
 from portfolio.models import Holding
-from portfolio.cache.token_metadata import load_token_cache, save_token_cache
+from portfolio.cache.token_metadata import get_token_metadata_many
 
 logger = logging.getLogger(__name__)
 
@@ -22,14 +22,16 @@ def fetch_eth_erc20_balances(wallet: str) -> list[Holding]:
     }
 
     try:
-        r = requests.post(ALCHEMY_URL, json=payload, timeout=15)
+        r = http_client.post(ALCHEMY_URL, json=payload, timeout=15)
         r.raise_for_status()
         tokens = r.json().get("result", {}).get("tokenBalances", [])
     except Exception:
         logger.exception("Alchemy ERC20 fetch failed")
         return []
 
-    cache = load_token_cache()
+    cache = get_token_metadata_many(
+        "ethereum", [t.get("contractAddress", "") for t in tokens]
+    )
     holdings = []
 
     for t in tokens:
@@ -50,5 +52,4 @@ def fetch_eth_erc20_balances(wallet: str) -> list[Holding]:
             )
         )
 
-    save_token_cache(cache)
     return holdings
@@ -1,21 +1,14 @@
-from web3 import Web3
 import logging
 
+from portfolio.chains.provider import get_provider
+
 logger = logging.getLogger(__name__)
 
 
-def fetch_eth_balance(wallet_address: str, rpc_url: str) -> float:
+def fetch_eth_balance(wallet_address: str, rpc_url: str, chain: str = "") -> float:
     try:
-        w3 = Web3(Web3.HTTPProvider(rpc_url, request_kwargs={"timeout": 10}))
-
-        if not w3.is_connected():
-            logger.error(f"RPC connection failed: {rpc_url}")
-            return 0.0
-
-        balance_wei = w3.eth.get_balance(wallet_address)
-        balance_eth = w3.from_wei(balance_wei, "ether")
-        return float(balance_eth)
+        return get_provider(chain, rpc_url).fetch_native_balance(wallet_address)
 
-    except Exception as e:
-        logger.exception(f"Error fetching ETH balance via RPC {rpc_url}")
+    except Exception:
+        logger.exception("Error fetching native balance on %s", chain or "RPC")
         return 0.0
@@ -0,0 +1,102 @@
+import os
+import logging
+from typing import Dict, List, Tuple
+
+from eth_abi import decode, encode
+from eth_utils import function_signature_to_4byte_selector, to_checksum_address
+
+from portfolio import http_client
+
+logger = logging.getLogger(__name__)
+
+# Same deterministic deployment on every chain we support
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+# Calls per eth_call; keeps each aggregate3 well under node gas caps
+MULTICALL_CHUNK_SIZE = int(os.getenv("MULTICALL_CHUNK_SIZE", "200"))
+
+AGGREGATE3 = function_signature_to_4byte_selector("aggregate3((address,bool,bytes)[])")
+GET_ETH_BALANCE = function_signature_to_4byte_selector("getEthBalance(address)")
+BALANCE_OF = function_signature_to_4byte_selector("balanceOf(address)")
+
+
+def _encode_aggregate3(calls: List[Tuple[str, bytes]]) -> str:
+    args = [(to_checksum_address(target), True, data) for target, data in calls]
+    return "0x" + (AGGREGATE3 + encode(["(address,bool,bytes)[]"], [args])).hex()
+
+
+def _eth_call(rpc_url: str, to: str, data: str) -> bytes:
+    payload = {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "eth_call",
+        "params": [{"to": to, "data": data}, "latest"],
+    }
+    r = http_client.post(rpc_url, json=payload, timeout=15)
+    r.raise_for_status()
+    body = r.json()
+
+    if "error" in body:
+        raise RuntimeError(f"eth_call failed: {body['error']}")
+
+    return bytes.fromhex(body["result"].removeprefix("0x"))
+
+
+def _decode_uint(success: bool, data: bytes) -> int | None:
+    if not success or len(data) < 32:
+        return None
+    return decode(["uint256"], data[:32])[0]
+
+
+def aggregate3(rpc_url: str, calls: List[Tuple[str, bytes]]) -> List[int | None]:
+    """
+    Run (target, calldata) calls through Multicall3.aggregate3, chunked to
+    MULTICALL_CHUNK_SIZE calls per eth_call. Every call is allowed to fail;
+    failed calls come back as None.
+    """
+    results: List[int | None] = []
+
+    for i in range(0, len(calls), MULTICALL_CHUNK_SIZE):
+        chunk = calls[i : i + MULTICALL_CHUNK_SIZE]
+        raw = _eth_call(rpc_url, MULTICALL3_ADDRESS, _encode_aggregate3(chunk))
+        (decoded,) = decode(["(bool,bytes)[]"], raw)
+
+        if len(decoded) != len(chunk):
+            raise RuntimeError("Multicall3 returned a mismatched result count")
+
+        results.extend(_decode_uint(success, data) for success, data in decoded)
+
+    return results
+
+
+def fetch_balances(
+    rpc_url: str, wallet: str, contracts: List[str]
+) -> Tuple[int, Dict[str, int]]:
+    """
+    Native balance plus balanceOf(wallet) for every contract, in a single
+    eth_call per chunk. Returns raw integer balances; contracts whose call
+    reverted are left out.
+    """
+    wallet_arg = encode(["address"], [to_checksum_address(wallet)])
+
+    calls = [(MULTICALL3_ADDRESS, GET_ETH_BALANCE + wallet_arg)]
+    calls.extend((contract, BALANCE_OF + wallet_arg) for contract in contracts)
+
+    results = aggregate3(rpc_url, calls)
+
+    native = results[0]
+    if native is None:
+        raise RuntimeError("Multicall3 getEthBalance failed")
+
+    balances = {
+        contract.lower(): raw
+        for contract, raw in zip(contracts, results[1:])
+        if raw is not None
+    }
+
+    logger.debug(
+        "Multicall read %d balances via %d call(s)",
+        len(calls),
+        -(-len(calls) // MULTICALL_CHUNK_SIZE),
+    )
+    return native, balances
@@ -0,0 +1,227 @@
+import os
+import json
+import hashlib
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from flask import Blueprint, Response, request
+from werkzeug.exceptions import HTTPException
+
+from portfolio.analytics.engine import DIMENSIONS, analyze_positions
+from portfolio.analytics.metrics import get_performance_metrics
+from portfolio.analytics.performance import DOWNSAMPLE_METHODS, get_portfolio_history
+from portfolio.multi_chain import (
+    fetch_multi_chain_portfolio,
+    fetch_multi_wallet_portfolios,
+    revalue_portfolio,
+)
+from portfolio.wallets.normalize import normalize_evm_address
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# How long clients may reuse a response before revalidating its ETag
+API_CACHE_MAX_AGE = int(os.getenv("API_CACHE_MAX_AGE", "30"))
+
+# Most wallets one /portfolios request may ask for
+API_BATCH_MAX_WALLETS = int(os.getenv("API_BATCH_MAX_WALLETS", "500"))
+
+api = Blueprint("api", __name__, url_prefix="/api")
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def _fields() -> Optional[List[str]]:
+    fields = request.args.get("fields")
+    return [f for f in fields.split(",") if f] if fields else None
+
+
+def _project(rows: Iterable[Dict], fields: Optional[List[str]]) -> List[Dict]:
+    if fields is None:
+        return list(rows)
+    return [{f: row[f] for f in fields if f in row} for row in rows]
+
+
+def _min_value(positions: Iterable[Dict]) -> Iterable[Dict]:
+    min_value = request.args.get("min_value", type=float)
+    if min_value is None:
+        return positions
+    return [p for p in positions if (p.get("current_value") or 0.0) >= min_value]
+
+
+def _json(body: Dict, version: Optional[str] = None) -> Response:
+    """
+    JSON response with Cache-Control and a strong ETag. With a portfolio
+    `version` the ETag is derived from it and the query string, so an
+    If-None-Match hit is a 304 before anything is serialized; otherwise
+    it is a hash of the body.
+    """
+    etag = None
+    if version is not None:
+        key = f"{version}?{request.query_string.decode()}"
+        etag = hashlib.sha1(key.encode()).hexdigest()
+
+    if etag is not None and etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = Response(dumps(body), mimetype="application/json")
+        etag = etag or hashlib.sha1(response.get_data()).hexdigest()
+
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = f"private, max-age={API_CACHE_MAX_AGE}"
+    return response
+
+
+def _error(message: str, status: int) -> Response:
+    return Response(dumps({"error": message}), status, mimetype="application/json")
+
+
+def _portfolio(wallet: str) -> Dict:
+    if request.args.get("mode") == "revalue":
+        return revalue_portfolio(wallet)
+    return fetch_multi_chain_portfolio(wallet)
+
+
+def _state_version(result: Dict) -> Optional[str]:
+    """The portfolio version plus everything else /portfolio reports."""
+    if result.get("version") is None:
+        return None
+    return ":".join(
+        str(part)
+        for part in (
+            result["version"],
+            sorted(result.get("chain_status", {}).items()),
+            result.get("pending_prices", 0),
+            result.get("holdings_age"),
+        )
+    )
+
+
+@api.errorhandler(ValueError)
+def _bad_request(e):
+    return _error(str(e), 400)
+
+
+@api.errorhandler(Exception)
+def _internal_error(e):
+    if isinstance(e, HTTPException):
+        return e
+    logger.exception("API request failed")
+    return _error("Internal Server Error", 500)
+
+
+@api.get("/portfolio")
+def portfolio():
+    """
+    ?wallet=...[&mode=revalue][&fields=symbol,current_value][&min_value=1]
+    """
+    wallet = normalize_evm_address(request.args.get("wallet", ""))
+    result = _portfolio(wallet)
+
+    body = {
+        "wallet": wallet,
+        "version": result.get("version"),
+        "total_value": result["total_value"],
+        "total_pnl": result["total_pnl"],
+        "chain_status": result.get("chain_status", {}),
+        "pending_prices": result.get("pending_prices", 0),
+        "holdings_age": result.get("holdings_age"),
+        "positions": _project(_min_value(result["portfolio"]), _fields()),
+    }
+    return _json(body, _state_version(result))
+
+
+@api.post("/portfolios")
+def portfolios():
+    """
+    Body {"wallets": [...], "mode": "revalue"?}; fields= and min_value=
+    as for /portfolio. Every distinct token is priced once for the whole
+    batch; "household" merges all wallets' positions.
+    """
+    payload = request.get_json(silent=True) or {}
+    wallets = payload.get("wallets")
+    if not isinstance(wallets, list) or not wallets:
+        raise ValueError("Body must be a JSON object with a list of wallets")
+    if len(wallets) > API_BATCH_MAX_WALLETS:
+        raise ValueError(f"At most {API_BATCH_MAX_WALLETS} wallets per request")
+
+    batch = fetch_multi_wallet_portfolios(
+        wallets, revalue=payload.get("mode") == "revalue"
+    )
+
+    fields = _fields()
+
+    def view(result: Dict) -> Dict:
+        out = {k: v for k, v in result.items() if k != "portfolio"}
+        out["positions"] = _project(_min_value(result["portfolio"]), fields)
+        return out
+
+    body = {
+        "wallets": {wallet: view(r) for wallet, r in batch["wallets"].items()},
+        "household": view(batch["household"]),
+        "distinct_tokens": batch["distinct_tokens"],
+    }
+    return _json(body)
+
+
+@api.get("/allocation")
+def allocation():
+    """?wallet=...[&mode=revalue][&fields=asset,chain,class] in percent."""
+    wallet = normalize_evm_address(request.args.get("wallet", ""))
+    result = _portfolio(wallet)
+
+    fields = _fields() or list(DIMENSIONS)
+    unknown = set(fields) - set(DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Unknown allocation dimension: {', '.join(sorted(unknown))}")
+
+    analytics = analyze_positions(result["portfolio"], result.get("version"))
+    body = {
+        "wallet": wallet,
+        "version": result.get("version"),
+        "total_value": analytics.summary["total_value"],
+        "allocation": {d: analytics.allocation(d) for d in fields},
+    }
+    return _json(body, result.get("version"))
+
+
+@api.get("/history")
+def history():
+    """
+    ?wallet=...[&start=&end=][&limit=][&points=&downsample=lttb|bucket]
+    [&positions=1][&fields=snapshot_time,total_value][&min_value=]
+    Snapshots oldest first, plus the running performance metrics.
+    """
+    wallet = normalize_evm_address(request.args.get("wallet", ""))
+    downsample = request.args.get("downsample", "lttb")
+    if downsample not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"Unknown downsample method: {downsample}")
+
+    include_positions = request.args.get("positions") in {"1", "true"}
+    snapshots = get_portfolio_history(
+        wallet,
+        start=request.args.get("start", type=int),
+        end=request.args.get("end", type=int),
+        limit=request.args.get("limit", type=int),
+        points=request.args.get("points", type=int),
+        downsample=downsample,
+        include_positions=include_positions,
+    )
+    if include_positions:
+        for snap in snapshots:
+            snap["positions"] = _min_value(snap["positions"])
+
+    body = {
+        "wallet": wallet,
+        "metrics": get_performance_metrics(wallet),
+        "history": _project(snapshots, _fields()),
+    }
+    return _json(body)
@@ -1,8 +1,171 @@
+import io
+import os
 import csv
+import time
+import zlib
+import itertools
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+
+from portfolio.analytics.performance import iter_portfolio_history
+from portfolio.cache.snapshots import last_seen
+
+# The latest persisted snapshot is exported as is when a complete render
+# produced it within this many seconds; otherwise a fresh fetch
+EXPORT_SNAPSHOT_MAX_AGE = int(os.getenv("EXPORT_SNAPSHOT_MAX_AGE", "300"))
+
+# Rows per chunk of a streamed CSV
+CSV_CHUNK_ROWS = 500
+
+POSITION_HEADER = [
+    "Asset",
+    "Chain",
+    "Quantity",
+    "Value (USD)",
+    "Invested (USD)",
+    "P/L (USD)",
+    "P/L (%)",
+]
+
+POSITION_COLUMNS = [
+    "symbol",
+    "chain",
+    "amount",
+    "current_value",
+    "invested",
+    "pnl",
+    "pnl_pct",
+]
+
+HISTORY_COLUMNS = [
+    "snapshot_time",
+    "total_value",
+    "total_pnl",
+    "symbol",
+    "chain",
+    "amount",
+    "cost_basis",
+    "current_value",
+]
+
+# format -> (mimetype, file extension)
+COLUMNAR_FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.file", "arrow"),
+}
+
+
+def iter_csv(rows: Iterable[list]) -> Iterator[str]:
+    """CSV text for `rows`, CSV_CHUNK_ROWS rows per yielded chunk."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for i, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if i % CSV_CHUNK_ROWS == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+
+def gzip_stream(chunks: Iterable[str]) -> Iterator[bytes]:
+    """gzip-encode a stream of text chunks as it goes."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def latest_snapshot(wallet_address: str) -> Optional[Dict]:
+    """
+    The wallet's latest persisted snapshot, if it is recent enough. Only
+    complete portfolios are persisted and their seen_at refreshed, so an
+    unchanged portfolio stays fresh; snapshots from before seen_at existed
+    may be partial and are never served.
+    """
+    seen = last_seen(wallet_address)
+    if seen is None or time.time() - seen > EXPORT_SNAPSHOT_MAX_AGE:
+        return None
+    return next(iter(iter_portfolio_history(wallet_address, limit=1)), None)
+
+
+def position_records(positions: Iterable[Dict]) -> Iterator[list]:
+    """Positions as rows in POSITION_COLUMNS order."""
+    for item in positions:
+        # Merged and snapshot positions carry value and invested only
+        invested = item.get("invested", item.get("cost_basis")) or 0.0
+        pnl = item["current_value"] - invested
+        yield [
+            item["symbol"],
+            item["chain"],
+            item["amount"],
+            item["current_value"],
+            invested,
+            pnl,
+            pnl / invested * 100 if invested > 0 else 0.0,
+        ]
+
+
+def position_csv_rows(positions: Iterable[Dict], total_value: float) -> Iterator[list]:
+    """Rows of the dashboard CSV export, header and total included."""
+    yield POSITION_HEADER
+    for symbol, chain, amount, value, invested, pnl, pnl_pct in position_records(
+        positions
+    ):
+        yield [
+            symbol,
+            chain.capitalize(),
+            f"{amount:.8g}",
+            f"{value:.2f}",
+            f"{invested:.2f}",
+            f"{pnl:.2f}",
+            f"{pnl_pct:.2f}",
+        ]
+    yield []
+    yield ["Total Portfolio Value", f"{total_value:.2f}"]
+
+
+def history_rows(history: Iterable[Dict]) -> Iterator[list]:
+    """One row per position per snapshot, in HISTORY_COLUMNS order."""
+    for snap in history:
+        head = [snap["snapshot_time"], snap["total_value"], snap["total_pnl"]]
+        for p in snap.get("positions") or [{}]:
+            yield head + [
+                p.get("symbol"),
+                p.get("chain"),
+                p.get("amount"),
+                p.get("cost_basis"),
+                p.get("current_value"),
+            ]
+
+
+def columnar_export(rows: Iterable[list], columns: List[str], fmt: str) -> bytes:
+    """
+    Rows as a Parquet file or an Arrow IPC (Feather v2) file. Both need
+    pyarrow; without it pandas raises ImportError.
+    """
+    if fmt not in COLUMNAR_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    df = pd.DataFrame(list(rows), columns=columns)
+    buf = io.BytesIO()
+    if fmt == "parquet":
+        df.to_parquet(buf, index=False)
+    else:
+        df.to_feather(buf)
+    return buf.getvalue()
 
 
 def export_portfolio(snapshot: list[dict], filepath: str):
+    if not snapshot:
+        return
+
+    fieldnames = list(snapshot[0].keys())
     with open(filepath, "w", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=snapshot[0].keys())
-        writer.writeheader()
-        writer.writerows(snapshot)
+        rows = ([row.get(k) for k in fieldnames] for row in snapshot)
+        for chunk in iter_csv(itertools.chain([fieldnames], rows)):
+            f.write(chunk)
@@ -0,0 +1,12 @@
+import pytest
+
+from portfolio.cache import snapshots, sqlite
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """A fresh, migrated cache database for the test."""
+    monkeypatch.setattr(sqlite, "DB_PATH", str(tmp_path / "cache.db"))
+    snapshots._tips.clear()
+    sqlite.ensure_db()
+    return sqlite.DB_PATH
@@ -14,3 +14,40 @@ def test_alchemy_fetch():
         assert hasattr(t, "contract_address")
         assert hasattr(t, "amount")
         assert t.is_erc20 is True
+
+
+def test_metadata_resolved_in_batches_with_per_element_retry(monkeypatch):
+    from portfolio.wallets import alchemy
+
+    calls = []
+    flaky = {"0xbbb"}
+
+    def fake_post(chain, payload):
+        calls.append([p["params"][0] for p in payload])
+        responses = []
+        for item in payload:
+            contract = item["params"][0]
+            if contract in flaky:
+                flaky.discard(contract)
+                responses.append({"id": item["id"], "error": {"code": 429}})
+            else:
+                responses.append(
+                    {"id": item["id"], "result": {"symbol": "TKN", "decimals": 6}}
+                )
+        return responses
+
+    sleeps = []
+    monkeypatch.setattr(alchemy, "_alchemy_post", fake_post)
+    monkeypatch.setattr(alchemy, "METADATA_BATCH_SIZE", 2)
+    monkeypatch.setattr(alchemy.time, "sleep", sleeps.append)
+
+    cache = {"0xddd": {"symbol": "OLD", "decimals": 18}}
+    alchemy.resolve_token_metadata(
+        "ethereum", ["0xAAA", "0xbbb", "0xccc", "0xddd"], cache
+    )
+
+    assert calls == [["0xaaa", "0xbbb"], ["0xccc"], ["0xbbb"]]
+    # One backoff, before the single retry round
+    assert len(sleeps) == 1 and sleeps[0] >= alchemy.METADATA_RETRY_BACKOFF
+    assert cache["0xbbb"] == {"symbol": "TKN", "decimals": 6}
+    assert cache["0xddd"]["symbol"] == "OLD"
@@ -0,0 +1,52 @@
+from portfolio.analytics import engine
+from portfolio.analytics.allocation import allocation_by_asset, allocation_by_chain
+from portfolio.analytics.exposure import asset_class_exposure
+from portfolio.analytics.summary import build_portfolio_summary
+from portfolio.models import Holding
+
+POSITIONS = [
+    {"symbol": "ETH", "chain": "ethereum", "amount": 1.5, "current_value": 4500.0},
+    {"symbol": "USDC", "chain": "base", "amount": 1000.0, "current_value": 1000.0},
+    {"symbol": "ARB", "chain": "arbitrum", "amount": 900.0, "current_value": 500.0},
+    {"symbol": "ETH", "chain": "base", "amount": 0.1, "current_value": 300.0},
+]
+
+
+def test_breakdowns_from_one_pass():
+    result = engine.analyze_positions(POSITIONS)
+
+    assert result.total_value == 6300.0
+    assert result.value_by["asset"] == {"ETH": 4800.0, "USDC": 1000.0, "ARB": 500.0}
+    assert result.value_by["chain"]["base"] == 1300.0
+    # Merged positions carry no is_erc20: natives are recognised by symbol
+    assert asset_class_exposure(POSITIONS) == {
+        "native": 76.19,
+        "stablecoin": 15.87,
+        "erc20": 7.94,
+    }
+    assert build_portfolio_summary(POSITIONS) == {
+        "total_value": 6300.0,
+        "total_pnl": 0.0,
+    }
+
+
+def test_holdings_are_valued_at_amount_times_price():
+    holdings = [
+        Holding(symbol="ETH", amount=2.0, chain="ethereum", price=3000.0),
+        Holding(
+            symbol="UNI", amount=100.0, chain="ethereum", price=10.0, is_erc20=True
+        ),
+    ]
+
+    assert allocation_by_asset(holdings) == {"ETH": 85.71, "UNI": 14.29}
+    assert allocation_by_chain(holdings) == {"ethereum": 100.0}
+    assert allocation_by_asset([]) == {}
+
+
+def test_results_are_memoized_per_version():
+    version = engine.portfolio_version(POSITIONS)
+    first = engine.analyze_positions(POSITIONS, version)
+
+    assert engine.analyze_positions([], version) is first
+    changed = [dict(POSITIONS[0], current_value=1.0), *POSITIONS[1:]]
+    assert engine.portfolio_version(changed) != version
@@ -0,0 +1,105 @@
+import pytest
+
+import app as webapp
+from portfolio.analytics import metrics
+from portfolio.analytics.engine import portfolio_version
+from portfolio.wallets.normalize import normalize_evm_address
+from services import api
+
+WALLET = normalize_evm_address("0x" + "ef" * 20)
+
+POSITIONS = [
+    {
+        "symbol": "ETH",
+        "chain": "base",
+        "amount": 2.0,
+        "current_value": 6000.0,
+        "invested": 5000.0,
+    },
+    {
+        "symbol": "USDC",
+        "chain": "ethereum",
+        "amount": 90.0,
+        "current_value": 90.0,
+        "invested": 90.0,
+    },
+    {
+        "symbol": "DUST",
+        "chain": "base",
+        "amount": 1e6,
+        "current_value": 0.4,
+        "invested": 0.0,
+    },
+]
+
+
+@pytest.fixture(autouse=True)
+def fake_portfolio(temp_db, monkeypatch):
+    calls = []
+
+    def fetch(wallet):
+        calls.append(wallet)
+        return {
+            "portfolio": POSITIONS,
+            "total_value": 6090.4,
+            "total_pnl": 1000.4,
+            "version": portfolio_version(POSITIONS),
+            "chain_status": {"base": "ok", "ethereum": "ok"},
+        }
+
+    monkeypatch.setattr(api, "fetch_multi_chain_portfolio", fetch)
+    return calls
+
+
+@pytest.fixture
+def client():
+    return webapp.app.test_client()
+
+
+def test_portfolio_projection_filter_and_etag(client):
+    url = f"/api/portfolio?wallet={WALLET}&fields=symbol,current_value&min_value=1"
+    response = client.get(url)
+
+    assert response.status_code == 200
+    assert response.json["positions"] == [
+        {"symbol": "ETH", "current_value": 6000.0},
+        {"symbol": "USDC", "current_value": 90.0},
+    ]
+    assert response.headers["Cache-Control"].startswith("private, max-age=")
+
+    etag = response.headers["ETag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    # Another projection is another representation
+    other = client.get(f"/api/portfolio?wallet={WALLET}")
+    assert other.headers["ETag"] != etag
+    assert len(other.json["positions"]) == 3
+
+
+def test_allocation(client):
+    response = client.get(f"/api/allocation?wallet={WALLET}&fields=chain")
+
+    assert response.json["allocation"] == {"chain": {"base": 98.52, "ethereum": 1.48}}
+    assert (
+        client.get(f"/api/allocation?wallet={WALLET}&fields=sector").status_code == 400
+    )
+
+
+def test_history_and_errors(client):
+    metrics.record_snapshot(
+        WALLET, {"total_value": 6090.4, "total_pnl": 1000.4}, POSITIONS
+    )
+
+    response = client.get(
+        f"/api/history?wallet={WALLET}&positions=1&min_value=1"
+        "&fields=total_value,positions"
+    )
+
+    (snap,) = response.json["history"]
+    assert snap["total_value"] == 6090.4
+    assert [p["symbol"] for p in snap["positions"]] == ["ETH", "USDC"]
+    assert response.json["metrics"]["periods"] == 0
+    assert "ETag" in response.headers
+
+    assert client.get("/api/history?wallet=nope").json == {
+        "error": "Invalid EVM address: nope"
+    }
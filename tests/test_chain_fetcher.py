@@ -0,0 +1,99 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from portfolio.models import Holding
+from portfolio.cache import sqlite
+from portfolio.chains import fetcher
+from portfolio.chains.fetcher import fetch_chains_concurrently
+
+WALLET = "0x000000000000000000000000000000000000dEaD"
+
+
+class FakeChain:
+    def __init__(self, symbol, delay=0.0, fail=False):
+        self.name = symbol.capitalize()
+        self.symbol = symbol
+        self.delay = delay
+        self.fail = fail
+
+    def fetch_holdings(self, wallet_address):
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("rpc down")
+        return [Holding(symbol="ETH", amount=1.0, chain=self.symbol)]
+
+
+pytestmark = pytest.mark.usefixtures("temp_db")
+
+
+def test_chains_are_fetched_in_parallel():
+    chains = [FakeChain(s, delay=0.3) for s in ("ethereum", "arbitrum", "base")]
+
+    start = time.monotonic()
+    results = fetch_chains_concurrently(WALLET, chains, 5, 5)
+
+    assert time.monotonic() - start < 0.8
+    assert [r.status for r in results] == ["ok", "ok", "ok"]
+    assert sum(len(r.holdings) for r in results) == 3
+
+
+def test_slow_chain_is_unavailable_without_blocking():
+    chains = [FakeChain("ethereum"), FakeChain("bsc", delay=2)]
+
+    start = time.monotonic()
+    results = fetch_chains_concurrently(WALLET, chains, 0.2, 5)
+
+    assert time.monotonic() - start < 1
+    status = {r.chain: r.status for r in results}
+    assert status == {"ethereum": "ok", "bsc": "unavailable"}
+
+
+def test_failed_chain_falls_back_to_stale_cache():
+    sqlite.set_cached_holdings(
+        WALLET, "bsc", [Holding(symbol="BNB", amount=2.0, chain="bsc")]
+    )
+
+    results = fetch_chains_concurrently(WALLET, [FakeChain("bsc", fail=True)], 1, 1)
+
+    assert results[0].status == "stale"
+    assert results[0].holdings[0].symbol == "BNB"
+    assert results[0].as_of is not None
+
+
+def test_fan_out_threads_reuse_their_sqlite_connections():
+    seen = set()
+
+    class ConnChain(FakeChain):
+        def fetch_holdings(self, wallet_address):
+            seen.add((threading.get_ident(), id(sqlite._get_conn())))
+            return []
+
+    for _ in range(5):
+        fetch_chains_concurrently(WALLET, [ConnChain("ethereum")], 1, 1)
+
+    # Pool threads outlive each call and keep one connection apiece
+    threads = {thread for thread, _ in seen}
+    assert len(seen) == len(threads)
+    assert threads <= {t.ident for t in fetcher._get_executor()._threads}
+
+
+def test_overrunning_chains_do_not_starve_new_requests(monkeypatch):
+    pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="test-fetch")
+    monkeypatch.setattr(fetcher, "_executor", pool)
+    monkeypatch.setattr(fetcher, "_executor_size", 1)
+    monkeypatch.setattr(fetcher, "_busy", 0)
+
+    # Misses its deadline and keeps the only shared worker busy
+    slow = fetch_chains_concurrently(WALLET, [FakeChain("bsc", delay=1)], 0.1, 0.1)
+    assert slow[0].status == "unavailable"
+
+    start = time.monotonic()
+    results = fetch_chains_concurrently(WALLET, [FakeChain("ethereum")], 0.5, 0.5)
+
+    assert results[0].status == "ok"
+    assert time.monotonic() - start < 0.5
+    pool.shutdown(wait=True)
+    assert fetcher._busy == 0
@@ -0,0 +1,159 @@
+import csv
+import gzip
+import io
+
+import pandas as pd
+import pytest
+
+import app as webapp
+from portfolio.cache import snapshots, sqlite
+from portfolio.wallets.normalize import normalize_evm_address
+from services import exporter
+
+WALLET = normalize_evm_address("0x" + "cd" * 20)
+
+POSITIONS = [
+    {
+        "symbol": "ETH",
+        "chain": "base",
+        "amount": 2.0,
+        "current_value": 6000.0,
+        "invested": 5000.0,
+    },
+    {
+        "symbol": "UNI",
+        "chain": "ethereum",
+        "amount": 10.0,
+        "current_value": 80.0,
+        "invested": 0.0,
+    },
+]
+
+
+pytestmark = pytest.mark.usefixtures("temp_db")
+
+
+@pytest.fixture
+def client():
+    return webapp.app.test_client()
+
+
+def _no_fetch(wallet):
+    raise AssertionError("a fresh snapshot must be exported as is")
+
+
+def _rows(body: bytes):
+    return list(csv.reader(io.StringIO(body.decode())))
+
+
+def test_csv_streams_from_fresh_snapshot(client, monkeypatch):
+    snapshots.persist_portfolio_snapshot(
+        WALLET, {"total_value": 6080.0, "total_pnl": 1080.0}, POSITIONS
+    )
+    monkeypatch.setattr(webapp, "fetch_multi_chain_portfolio", _no_fetch)
+
+    response = client.get(f"/export-csv?wallet={WALLET}")
+    rows = _rows(response.data)
+
+    # Streamed, so the length is not known up front
+    assert "Content-Length" not in response.headers
+    assert rows[0] == exporter.POSITION_HEADER
+    assert rows[1] == ["ETH", "Base", "2", "6000.00", "5000.00", "1000.00", "20.00"]
+    assert rows[2][5:] == ["80.00", "0.00"]
+    assert rows[-1] == ["Total Portfolio Value", "6080.00"]
+
+    zipped = client.get(
+        f"/export-csv?wallet={WALLET}", headers={"Accept-Encoding": "gzip"}
+    )
+    assert zipped.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(zipped.data) == response.data
+
+
+def test_stale_snapshot_falls_back_to_fetch(client, monkeypatch):
+    snapshots.persist_portfolio_snapshot(
+        WALLET, {"total_value": 1.0, "total_pnl": 0.0}, POSITIONS[:1]
+    )
+    monkeypatch.setattr(exporter, "EXPORT_SNAPSHOT_MAX_AGE", -1)
+    monkeypatch.setattr(
+        webapp,
+        "fetch_multi_chain_portfolio",
+        lambda wallet: {"portfolio": POSITIONS, "total_value": 6080.0},
+    )
+
+    rows = _rows(client.get(f"/export?wallet={WALLET}").data)
+
+    assert rows[0] == exporter.POSITION_COLUMNS
+    assert [r[0] for r in rows[1:]] == ["ETH", "UNI"]
+
+
+def test_unchanged_portfolio_snapshot_stays_fresh(client, monkeypatch):
+    summary = {"total_value": 6080.0, "total_pnl": 1080.0}
+    snapshots.persist_portfolio_snapshot(WALLET, summary, POSITIONS)
+    with sqlite._get_conn() as conn:
+        conn.execute("UPDATE portfolio_snapshots SET created_at = 1, seen_at = 1")
+    assert exporter.latest_snapshot(WALLET) is None
+
+    # Seen again unchanged: no new row, but fresh enough to export
+    snapshots.persist_portfolio_snapshot(WALLET, summary, POSITIONS)
+    monkeypatch.setattr(webapp, "fetch_multi_chain_portfolio", _no_fetch)
+
+    rows = _rows(client.get(f"/export-csv?wallet={WALLET}").data)
+    assert rows[-1] == ["Total Portfolio Value", "6080.00"]
+
+
+def test_snapshot_from_before_seen_at_is_not_served():
+    snapshots.persist_portfolio_snapshot(
+        WALLET, {"total_value": 6080.0, "total_pnl": 1080.0}, POSITIONS
+    )
+    with sqlite._get_conn() as conn:
+        conn.execute("UPDATE portfolio_snapshots SET seen_at = NULL")
+
+    # It may have been a partial render, so it is never exported as is
+    assert exporter.latest_snapshot(WALLET) is None
+
+
+def test_history_and_columnar_export(client, monkeypatch):
+    snapshots.persist_portfolio_snapshot(
+        WALLET, {"total_value": 6080.0, "total_pnl": 1080.0}, POSITIONS
+    )
+    monkeypatch.setattr(webapp, "fetch_multi_chain_portfolio", _no_fetch)
+
+    rows = _rows(client.get(f"/export?wallet={WALLET}&history=1").data)
+    assert rows[0] == exporter.HISTORY_COLUMNS
+    assert [r[3] for r in rows[1:]] == ["ETH", "UNI"]
+
+    assert client.get(f"/export?wallet={WALLET}&format=xlsx").status_code == 400
+
+
+def test_columnar_exports_round_trip(client, monkeypatch):
+    snapshots.persist_portfolio_snapshot(
+        WALLET, {"total_value": 6080.0, "total_pnl": 1080.0}, POSITIONS
+    )
+    monkeypatch.setattr(webapp, "fetch_multi_chain_portfolio", _no_fetch)
+
+    response = client.get(f"/export?wallet={WALLET}&format=parquet")
+    assert response.mimetype == exporter.COLUMNAR_FORMATS["parquet"][0]
+    df = pd.read_parquet(io.BytesIO(response.data))
+    assert df.columns.tolist() == exporter.POSITION_COLUMNS
+    assert df["symbol"].tolist() == ["ETH", "UNI"]
+    assert df["pnl"].tolist() == [1000.0, 80.0]
+
+    history = pd.read_feather(
+        io.BytesIO(client.get(f"/export?wallet={WALLET}&format=arrow&history=1").data)
+    )
+    assert history.columns.tolist() == exporter.HISTORY_COLUMNS
+    assert history["current_value"].tolist() == [6000.0, 80.0]
+
+
+def test_columnar_export_without_pyarrow_is_501(client, monkeypatch):
+    def no_pyarrow(*args):
+        raise ImportError("pyarrow")
+
+    monkeypatch.setattr(webapp, "columnar_export", no_pyarrow)
+    monkeypatch.setattr(
+        webapp,
+        "fetch_multi_chain_portfolio",
+        lambda wallet: {"portfolio": POSITIONS, "total_value": 6080.0},
+    )
+
+    assert client.get(f"/export?wallet={WALLET}&format=parquet").status_code == 501
@@ -0,0 +1,49 @@
+import random
+
+from portfolio.merge.deduplicate import deduplicate_positions, deduplicate_table
+from portfolio.models import Holding, HoldingTable
+from portfolio.valuation import value_holdings, value_table
+
+
+def _holdings(n, seed=2):
+    rng = random.Random(seed)
+    holdings, prices = [], []
+    for _ in range(n):
+        holdings.append(
+            Holding(
+                # Few symbols, so rows merge
+                symbol=rng.choice(["ETH", "USDC", "PEPE", "ARB", "OP"]),
+                amount=rng.choice([0.0, rng.random() * 10 ** rng.randint(-8, 9)]),
+                chain=rng.choice(["ethereum", "base", "arbitrum"]),
+                cost_basis=rng.choice([0.0, rng.random() * 3000]),
+                contract_address=rng.choice([None, f"0x{rng.getrandbits(160):040x}"]),
+                decimals=rng.choice([None, 6, 18]),
+                is_erc20=rng.random() < 0.8,
+            )
+        )
+        prices.append(rng.choice([0.0, 1.0, rng.random() * 10 ** rng.randint(-6, 6)]))
+    return holdings, prices
+
+
+def test_table_pipeline_matches_dict_pipeline():
+    holdings, prices = _holdings(3000)
+
+    expected = deduplicate_positions(value_holdings(holdings, prices))
+    table, values = value_table(HoldingTable.from_holdings(holdings), prices)
+
+    assert deduplicate_table(table, values) == expected
+    assert len(expected) < len(table)
+
+
+def test_round_trip_and_take():
+    holdings, _ = _holdings(50)
+    table = HoldingTable.from_holdings(holdings)
+
+    assert list(table.holdings()) == holdings
+    assert list(table.take([3, 1]).holdings()) == [holdings[3], holdings[1]]
+    assert len(HoldingTable.from_holdings([])) == 0
+    assert deduplicate_table(*value_table(HoldingTable.from_holdings([]), [])) == []
+
+
+def test_holding_is_slotted():
+    assert not hasattr(Holding(symbol="ETH", amount=1.0, chain="base"), "__dict__")
@@ -0,0 +1,66 @@
+import time
+
+import pytest
+
+from portfolio.analytics import metrics
+
+START = 1_700_000_000
+
+
+pytestmark = pytest.mark.usefixtures("temp_db")
+
+
+def _persist(monkeypatch, at, eth_amount, eth_price, usdc=1000.0):
+    monkeypatch.setattr(time, "time", lambda: START + at)
+    positions = [
+        {
+            "symbol": "ETH",
+            "chain": "ethereum",
+            "amount": eth_amount,
+            "current_value": eth_amount * eth_price,
+        },
+        {"symbol": "USDC", "chain": "base", "amount": usdc, "current_value": usdc},
+    ]
+    total = sum(p["current_value"] for p in positions)
+    metrics.record_snapshot("0xabc", {"total_value": total}, positions)
+
+
+def test_deposits_are_not_returns(monkeypatch):
+    _persist(monkeypatch, 0, 1.0, 1000.0)
+    # Value doubles from a deposit, prices unchanged
+    _persist(monkeypatch, 3600, 2.0, 1000.0, usdc=2000.0)
+
+    result = metrics.get_performance_metrics("0xabc", now=START + 3600)
+
+    assert result["total_value"] == 4000.0
+    assert result["time_weighted_return"] == pytest.approx(0.0)
+    assert result["periods"] == 1
+
+
+def test_running_return_drawdown_and_volatility(monkeypatch):
+    _persist(monkeypatch, 0, 1.0, 1000.0)
+    _persist(monkeypatch, 3600, 1.0, 2000.0)  # +50% on a 2000 portfolio
+    _persist(monkeypatch, 7200, 1.0, 500.0)  # -50% on 3000
+
+    result = metrics.get_performance_metrics("0xabc", now=START + 7200)
+
+    assert result["time_weighted_return"] == pytest.approx(1.5 * 0.5 - 1)
+    assert result["max_drawdown"] == pytest.approx(-0.5)
+    assert result["current_drawdown"] == pytest.approx(-0.5)
+    assert result["annualized_volatility"] > 0
+
+
+def test_window_returns_seek_the_snapshot_at_window_start(monkeypatch):
+    day = 86_400
+    _persist(monkeypatch, 0, 1.0, 1000.0)
+    _persist(monkeypatch, 5 * day, 1.0, 2000.0)
+    _persist(monkeypatch, 6 * day + 3600, 1.0, 3000.0)
+
+    returns = metrics.get_performance_metrics("0xabc", now=START + 6 * day + 3600)[
+        "returns"
+    ]
+
+    # 24h ago the portfolio was 3000, now 4000; 7d ago predates all history
+    assert returns["24h"] == pytest.approx(4000 / 3000 - 1)
+    assert returns["7d"] is None
+    assert returns["30d"] is None
@@ -0,0 +1,107 @@
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+from portfolio.cache.migrations import (
+    MIGRATIONS,
+    SCHEMA_VERSION,
+    get_schema_version,
+    migrate,
+)
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _at_version(path, version):
+    conn = sqlite3.connect(path)
+    for v, _, statements in MIGRATIONS:
+        if v > version:
+            break
+        for statement in statements:
+            conn.execute(statement)
+    conn.execute(f"PRAGMA user_version = {version}")
+    conn.commit()
+    return conn
+
+
+def _indexes(conn):
+    return {
+        r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")
+    }
+
+
+def test_upgrade_from_base_schema_keeps_data(tmp_path):
+    conn = _at_version(str(tmp_path / "cache.db"), 1)
+    conn.execute(
+        "INSERT INTO portfolio_snapshots (wallet_address, total_value, total_pnl) "
+        "VALUES ('0xabc', 10.0, 1.0)"
+    )
+    conn.commit()
+
+    assert migrate(conn) == SCHEMA_VERSION == get_schema_version(conn)
+
+    # Migration 3 made existing snapshots their own keyframe
+    row = conn.execute("SELECT id, base_id FROM portfolio_snapshots").fetchone()
+    assert row[0] == row[1]
+    assert {"idx_snapshots_wallet_history", "idx_positions_snapshot"} <= _indexes(conn)
+    assert "idx_snapshots_wallet_created" not in _indexes(conn)
+
+
+def test_migrate_twice_is_a_no_op(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "cache.db"))
+    migrate(conn)
+    schema = conn.execute("SELECT sql FROM sqlite_master ORDER BY name").fetchall()
+
+    assert migrate(conn) == SCHEMA_VERSION
+    assert conn.execute("SELECT sql FROM sqlite_master ORDER BY name").fetchall() == (
+        schema
+    )
+
+
+def test_stored_fallbacks_are_dropped_on_every_chain(tmp_path):
+    conn = _at_version(str(tmp_path / "cache.db"), 6)
+    conn.executemany(
+        "INSERT INTO token_metadata VALUES (?, ?, ?, ?, 0)",
+        [
+            ("*", "0xfff", "UNKNOWN", 18),
+            ("base", "0xeee", "UNKNOWN", 18),
+            ("*", "0xbbb", "USDC", 6),
+        ],
+    )
+    conn.commit()
+
+    migrate(conn)
+
+    assert conn.execute("SELECT contract FROM token_metadata").fetchall() == [
+        ("0xbbb",)
+    ]
+
+
+def test_concurrent_processes_migrate_once(tmp_path):
+    path = str(tmp_path / "cache.db")
+    script = (
+        "import sqlite3, sys\n"
+        "from portfolio.cache.migrations import migrate\n"
+        "conn = sqlite3.connect(sys.argv[1], timeout=30)\n"
+        "print(migrate(conn))\n"
+    )
+
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-c", script, path],
+            cwd=ROOT,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        for _ in range(4)
+    ]
+    results = [p.communicate(timeout=60) for p in procs]
+
+    assert [p.returncode for p in procs] == [0] * 4, results
+    assert [out.strip() for out, _ in results] == [str(SCHEMA_VERSION)] * 4
+    # ALTER TABLE ADD COLUMN would fail outright if a step ran twice
+    conn = sqlite3.connect(path)
+    columns = [r[1] for r in conn.execute("PRAGMA table_info(portfolio_snapshots)")]
+    assert columns.count("base_id") == 1
@@ -0,0 +1,191 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+import app as webapp
+from portfolio import multi_chain, pricing
+from portfolio.analytics.performance import get_portfolio_history
+from portfolio.chains.fetcher import ChainFetchResult
+from portfolio.models import Holding
+from portfolio.wallets import alchemy
+from portfolio.wallets.normalize import normalize_evm_address
+
+ALICE = normalize_evm_address("0x" + "a1" * 20)
+BOB = normalize_evm_address("0x" + "b2" * 20)
+CAROL = normalize_evm_address("0x" + "c3" * 20)
+
+
+def _uni(amount):
+    return Holding(
+        symbol="UNI",
+        amount=amount,
+        chain="ethereum",
+        contract_address="0xUNI",
+        is_erc20=True,
+    )
+
+
+HOLDINGS = {
+    ALICE: [Holding(symbol="ETH", amount=1.0, chain="ethereum"), _uni(10.0)],
+    BOB: [_uni(5.0)],
+    CAROL: [],
+}
+
+
+@pytest.fixture
+def upstream(temp_db, monkeypatch):
+    monkeypatch.setattr(pricing, "PRICE_TAIL_IN_BACKGROUND", False)
+
+    calls = []
+    monkeypatch.setattr(
+        multi_chain, "get_enabled_chains", lambda: [SimpleNamespace(symbol="ethereum")]
+    )
+    monkeypatch.setattr(
+        multi_chain,
+        "fetch_chains_concurrently",
+        lambda wallet, chains: [
+            ChainFetchResult(chain="ethereum", status="ok", holdings=HOLDINGS[wallet])
+        ],
+    )
+    monkeypatch.setattr(
+        multi_chain,
+        "get_native_prices",
+        lambda c: calls.append(("native", c)) or {"ethereum": 2000.0},
+    )
+    monkeypatch.setattr(
+        multi_chain,
+        "get_erc20_prices",
+        lambda chain, contracts: calls.append((chain, sorted(contracts)))
+        or {"0xuni": 10.0},
+    )
+    return calls
+
+
+def test_batch_prices_each_token_once(upstream):
+    batch = multi_chain.fetch_multi_wallet_portfolios(
+        [ALICE, BOB, CAROL, ALICE.lower()]
+    )
+
+    assert upstream == [("native", ["ethereum"]), ("ethereum", ["0xuni"])]
+    assert batch["distinct_tokens"] == 2
+    assert list(batch["wallets"]) == [ALICE, BOB, CAROL]
+    assert batch["wallets"][ALICE]["total_value"] == 2100.0
+    assert batch["wallets"][BOB]["total_value"] == 50.0
+    assert batch["wallets"][CAROL]["portfolio"] == []
+
+    household = batch["household"]
+    assert household["total_value"] == 2150.0
+    assert {p["symbol"]: p["amount"] for p in household["portfolio"]} == {
+        "ETH": 1.0,
+        "UNI": 15.0,
+    }
+
+
+def test_batch_endpoint(upstream):
+    client = webapp.app.test_client()
+
+    response = client.post(
+        "/api/portfolios?fields=symbol,current_value",
+        json={"wallets": [ALICE, BOB]},
+    )
+
+    assert response.status_code == 200
+    assert response.json["household"]["positions"] == [
+        {"symbol": "ETH", "current_value": 2000.0},
+        {"symbol": "UNI", "current_value": 150.0},
+    ]
+    assert response.json["wallets"][BOB]["total_value"] == 50.0
+    assert client.post("/api/portfolios", json={"wallets": []}).status_code == 400
+
+
+def test_only_complete_portfolios_are_recorded(upstream, monkeypatch):
+    multi_chain.fetch_multi_chain_portfolio(ALICE)
+    assert len(get_portfolio_history(ALICE)) == 1
+
+    # A chain served from the holdings cache after its fetch failed
+    monkeypatch.setattr(
+        multi_chain,
+        "fetch_chains_concurrently",
+        lambda wallet, chains: [
+            ChainFetchResult(chain="ethereum", status="stale", holdings=HOLDINGS[BOB])
+        ],
+    )
+    multi_chain.fetch_multi_wallet_portfolios([BOB])
+    assert get_portfolio_history(BOB) == []
+
+    # A price still being fetched in the background
+    monkeypatch.setattr(
+        multi_chain,
+        "_fetch_prices",
+        lambda natives, erc20s: ({"ethereum": 2000.0}, {}, {("ethereum", "0xuni")}),
+    )
+    assert multi_chain.fetch_multi_chain_portfolio(ALICE)["pending_prices"] == 1
+    assert len(get_portfolio_history(ALICE)) == 1
+
+
+def test_concurrent_wallets_resolve_shared_metadata_once(monkeypatch):
+    requested = []
+
+    def slow_batch(chain, contracts, cache):
+        requested.append(list(contracts))
+        time.sleep(0.1)
+        for contract in contracts:
+            cache[contract] = {"symbol": "TKN", "decimals": 6}
+        return []
+
+    monkeypatch.setattr(alchemy, "_fetch_metadata_batch", slow_batch)
+
+    def resolve(contracts):
+        cache = {}
+        alchemy.resolve_token_metadata("base", contracts, cache)
+        return cache
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        first = pool.submit(resolve, ["0xaaa", "0xbbb"])
+        time.sleep(0.02)
+        second = pool.submit(resolve, ["0xbbb", "0xccc"])
+        caches = [first.result(), second.result()]
+
+    assert requested == [["0xaaa", "0xbbb"], ["0xccc"]]
+    assert caches[1]["0xbbb"] == {"symbol": "TKN", "decimals": 6}
+
+
+def test_waiters_do_not_keep_fallback_metadata(monkeypatch):
+    release = threading.Event()
+
+    def failing_batch(chain, contracts, cache):
+        release.wait(5)
+        raise RuntimeError("alchemy down")
+
+    monkeypatch.setattr(alchemy, "_fetch_metadata_batch", failing_batch)
+    monkeypatch.setattr(alchemy, "METADATA_WAIT_TIMEOUT", 0.2)
+
+    def resolve(contracts):
+        cache = {}
+        return alchemy.resolve_token_metadata("base", contracts, cache), cache
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        owner = pool.submit(resolve, ["0xaaa"])
+        time.sleep(0.02)
+        # Times out while the owner is still stuck
+        timed_out = pool.submit(resolve, ["0xaaa"]).result()
+        release.set()
+        owner_fallback, _ = owner.result()
+
+    assert owner_fallback == {"0xaaa"}
+    assert timed_out == ({"0xaaa"}, {"0xaaa": alchemy.UNKNOWN_TOKEN_METADATA})
+
+    # A waiter that gets the owner's fallback reports it as one too
+    monkeypatch.setattr(alchemy, "METADATA_WAIT_TIMEOUT", 5)
+    release.clear()
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        owner = pool.submit(resolve, ["0xaaa"])
+        time.sleep(0.02)
+        waiter = pool.submit(resolve, ["0xaaa"])
+        time.sleep(0.02)
+        release.set()
+        assert waiter.result()[0] == {"0xaaa"}
+        assert owner.result()[0] == {"0xaaa"}
@@ -0,0 +1,88 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from eth_abi import decode, encode
+
+from portfolio.wallets import multicall
+
+WALLET = "0x000000000000000000000000000000000000dEaD"
+USDT = "0x55d398326f99059ff775485246999027b3197955"
+BROKEN = "0x0000000000000000000000000000000000000bad"
+
+BALANCES = {USDT: 25 * 10**18}
+NATIVE_WEI = 3 * 10**18
+
+
+class _MulticallNode(BaseHTTPRequestHandler):
+    """Minimal JSON-RPC node that only understands Multicall3.aggregate3."""
+
+    protocol_version = "HTTP/1.1"
+    eth_calls = 0
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        call = request["params"][0]
+        assert request["method"] == "eth_call"
+        assert call["to"].lower() == multicall.MULTICALL3_ADDRESS.lower()
+        type(self).eth_calls += 1
+
+        data = bytes.fromhex(call["data"][2:])
+        assert data[:4] == multicall.AGGREGATE3
+        (calls,) = decode(["(address,bool,bytes)[]"], data[4:])
+
+        results = []
+        for target, _, calldata in calls:
+            selector, target = calldata[:4], target.lower()
+            if selector == multicall.GET_ETH_BALANCE:
+                results.append((True, encode(["uint256"], [NATIVE_WEI])))
+            elif selector == multicall.BALANCE_OF and target in BALANCES:
+                results.append((True, encode(["uint256"], [BALANCES[target]])))
+            else:
+                results.append((False, b""))
+
+        body = json.dumps(
+            {
+                "jsonrpc": "2.0",
+                "id": request["id"],
+                "result": "0x" + encode(["(bool,bytes)[]"], [results]).hex(),
+            }
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def rpc_url():
+    _MulticallNode.eth_calls = 0
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _MulticallNode)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_native_and_token_balances_in_one_call(rpc_url):
+    native, balances = multicall.fetch_balances(rpc_url, WALLET, [USDT, BROKEN])
+
+    assert native == NATIVE_WEI
+    assert balances == {USDT: 25 * 10**18}
+    assert _MulticallNode.eth_calls == 1
+
+
+def test_large_token_sets_are_chunked(rpc_url, monkeypatch):
+    monkeypatch.setattr(multicall, "MULTICALL_CHUNK_SIZE", 2)
+
+    native, balances = multicall.fetch_balances(rpc_url, WALLET, [USDT, BROKEN, BROKEN])
+
+    assert native == NATIVE_WEI
+    assert balances[USDT] == 25 * 10**18
+    assert _MulticallNode.eth_calls == 2
@@ -0,0 +1,71 @@
+import pytest
+
+from portfolio.analytics import performance
+from portfolio.cache import snapshots, sqlite
+
+pytestmark = pytest.mark.usefixtures("temp_db")
+
+
+def _seed(wallet, count):
+    conn = sqlite._get_conn()
+    for i in range(count):
+        snapshot_id = snapshots.persist_portfolio_snapshot(
+            wallet,
+            {"total_value": 100.0 + i, "total_pnl": float(i)},
+            [
+                {"symbol": "ETH", "chain": "ethereum", "amount": 1.0 + i},
+                {"symbol": "USDC", "chain": "base", "amount": 50.0},
+            ],
+        )
+        with conn:
+            conn.execute(
+                "UPDATE portfolio_snapshots SET created_at = ? WHERE id = ?",
+                (1_000 + i * 60, snapshot_id),
+            )
+
+
+def test_history_joins_positions_in_order():
+    _seed("0xabc", 3)
+    _seed("0xother", 2)
+
+    history = performance.get_portfolio_history("0xabc")
+
+    assert [h["snapshot_time"] for h in history] == [1000, 1060, 1120]
+    assert [p["symbol"] for p in history[1]["positions"]] == ["ETH", "USDC"]
+    assert history[2]["positions"][0]["amount"] == 3.0
+
+
+def test_history_window_and_limit():
+    _seed("0xabc", 10)
+
+    window = performance.get_portfolio_history("0xabc", start=1060, end=1240)
+    assert [h["snapshot_time"] for h in window] == [1060, 1120, 1180, 1240]
+
+    latest = performance.get_portfolio_history("0xabc", limit=2)
+    assert [h["total_value"] for h in latest] == [108.0, 109.0]
+
+
+@pytest.mark.parametrize("method", ["lttb", "bucket"])
+def test_history_downsampling_is_bounded(method):
+    _seed("0xabc", 50)
+
+    history = performance.get_portfolio_history(
+        "0xabc", points=8, downsample=method, include_positions=False
+    )
+
+    assert len(history) <= 8
+    assert history[-1]["snapshot_time"] == 1000 + 49 * 60
+    assert "positions" not in history[0]
+
+
+def test_metrics_consume_a_stream():
+    _seed("0xabc", 4)
+
+    metrics = performance.compute_performance_metrics(
+        performance.iter_portfolio_history("0xabc", include_positions=False)
+    )
+
+    assert metrics["initial_value"] == 100.0
+    assert metrics["latest_value"] == 103.0
+    assert metrics["history"][-1]["roi"] == pytest.approx(0.03)
+    assert performance.compute_performance_metrics(iter(())) == {}
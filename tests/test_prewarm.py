@@ -0,0 +1,165 @@
+import pytest
+
+from portfolio import prewarm
+from portfolio.cache import prices, sqlite
+from portfolio.filters import scam
+from portfolio.models import Holding
+
+WETH = "0x4200000000000000000000000000000000000006"
+AERO = "0x940181a94a35a4569e4529a3cdfb74e38fd98631"
+SPAM = "0x00000000000000000000000000000000000000d2"
+UNPRICED = "0x00000000000000000000000000000000000000d3"
+STALE = "0x00000000000000000000000000000000000000d4"
+FRESH = "0x00000000000000000000000000000000000000d5"
+
+WALLETS = ["0x" + c * 40 for c in "abc"]
+
+
+def _token(symbol, contract, amount=1.0):
+    return Holding(
+        symbol=symbol,
+        amount=amount,
+        chain="base",
+        contract_address=contract,
+        is_erc20=True,
+    )
+
+
+@pytest.fixture(autouse=True)
+def caches(temp_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(scam, "SCAM_CONTRACTS_FILE", str(tmp_path / "none.json"))
+    monkeypatch.setattr(scam, "_lists", None)
+    scam._verdicts.clear()
+    prices._lru.clear()
+    yield
+    scam._verdicts.clear()
+    prices._lru.clear()
+
+
+def test_plan_skips_spam_and_wallets_not_seen_lately():
+    sqlite.set_cached_holdings(
+        WALLETS[0],
+        "base",
+        [
+            _token("WETH", WETH),
+            _token("claim-rewards.com", SPAM),
+            _token("NOPE", UNPRICED),
+        ],
+    )
+    sqlite.set_cached_holdings(WALLETS[1], "base", [_token("OLD", STALE)])
+    with sqlite._get_conn() as conn:
+        conn.execute(
+            "UPDATE holdings_cache SET updated_at = updated_at - ? WHERE wallet = ?",
+            (prewarm.PREWARM_HOLDINGS_MAX_AGE + 60, WALLETS[1]),
+        )
+    # A negative entry close enough to expiry to be due again
+    prices.set_cached_prices({prices.asset_key("base", UNPRICED): None})
+    with sqlite._get_conn() as conn:
+        conn.execute(
+            "UPDATE prices_cache SET updated_at = updated_at - ?",
+            (int(prices.NEGATIVE_TTL * 0.9),),
+        )
+    prices._lru.clear()
+
+    _, erc20 = prewarm.plan_prewarm()
+
+    assert erc20 == [("base", WETH)]
+
+
+def test_plan_orders_by_holders_then_value_and_skips_fresh():
+    sqlite.set_cached_holdings(
+        WALLETS[0], "base", [_token("AERO", AERO, 10.0), _token("WETH", WETH, 5.0)]
+    )
+    sqlite.set_cached_holdings(WALLETS[1], "base", [_token("AERO", AERO, 10.0)])
+    sqlite.set_cached_holdings(
+        WALLETS[2], "base", [_token("OLD", STALE, 1.0), _token("FRESH", FRESH, 1.0)]
+    )
+    prices.set_cached_prices(
+        {
+            prices.asset_key("base", WETH): 3000.0,
+            prices.asset_key("base", STALE): 1.0,
+            prices.asset_key("base", FRESH): 2.0,
+            prices.asset_key("base"): 3000.0,
+        }
+    )
+    # WETH and STALE are most of the way to expiry; FRESH and the native
+    # price are still fresh
+    with sqlite._get_conn() as conn:
+        conn.execute(
+            "UPDATE prices_cache SET updated_at = updated_at - ? WHERE asset_key IN (?, ?)",
+            (
+                int(prices.PRICE_TTLS["erc20"] * 0.9),
+                prices.asset_key("base", WETH),
+                prices.asset_key("base", STALE),
+            ),
+        )
+    prices._lru.clear()
+
+    natives, erc20 = prewarm.plan_prewarm()
+
+    assert "base" not in natives
+    assert erc20 == [("base", AERO), ("base", WETH), ("base", STALE)]
+
+
+def test_batches_per_chain_in_priority_order(monkeypatch):
+    monkeypatch.setattr(prewarm, "ERC20_BATCH_SIZE", 2)
+    items = [("base", "0xa"), ("ethereum", "0xb"), ("base", "0xc"), ("base", "0xd")]
+
+    assert prewarm._batches(items) == [
+        ("base", ["0xa", "0xc"]),
+        ("ethereum", ["0xb"]),
+        ("base", ["0xd"]),
+    ]
+
+
+def test_run_once_paces_every_call_through_its_own_buckets(monkeypatch):
+    events = []
+
+    class Bucket:
+        def __init__(self, host):
+            self.host = host
+
+        def acquire(self):
+            events.append(("acquire", self.host))
+            return 0.0
+
+    monkeypatch.setattr(
+        prewarm,
+        "plan_prewarm",
+        lambda: (["base"], [("base", "0xa"), ("base", "0xb"), ("ethereum", "0xc")]),
+    )
+    monkeypatch.setattr(prewarm, "ERC20_BATCH_SIZE", 1)
+    monkeypatch.setattr(
+        prewarm,
+        "get_native_prices",
+        lambda chains, refresh: events.append(("native", tuple(chains))),
+    )
+    monkeypatch.setattr(
+        prewarm,
+        "get_erc20_prices",
+        lambda chain, batch, refresh: events.append((chain, tuple(batch))),
+    )
+
+    warmer = prewarm.PricePrewarmer(quota_share=0.5)
+    gecko_rate, _ = prewarm.RATE_LIMITS["api.geckoterminal.com"]
+    assert warmer._buckets["api.geckoterminal.com"].rate == gecko_rate * 0.5 / 60
+    warmer._buckets = {host: Bucket(host) for host in warmer._buckets}
+
+    assert warmer.run_once() == 4
+    assert events == [
+        ("acquire", "api.coingecko.com"),
+        ("native", ("base",)),
+        ("acquire", "api.geckoterminal.com"),
+        ("base", ("0xa",)),
+        ("acquire", "api.geckoterminal.com"),
+        ("base", ("0xb",)),
+        ("acquire", "api.geckoterminal.com"),
+        ("ethereum", ("0xc",)),
+    ]
+
+
+def test_prewarm_flag_is_read_when_asked(monkeypatch):
+    monkeypatch.setenv("PRICE_PREWARM_ENABLED", "true")
+    assert prewarm.prewarm_enabled()
+    monkeypatch.setenv("PRICE_PREWARM_ENABLED", "0")
+    assert not prewarm.prewarm_enabled()
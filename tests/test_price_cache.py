@@ -0,0 +1,166 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from portfolio import pricing
+from portfolio.cache import prices, sqlite
+
+
+@pytest.fixture(autouse=True)
+def price_lru(temp_db):
+    prices._lru.clear()
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    calls = []
+
+    def fake_fetch(chain, contracts):
+        calls.append(sorted(contracts))
+        return {"0xaaa": 2.5}, set(contracts)
+
+    monkeypatch.setattr(pricing, "_fetch_erc20_prices", fake_fetch)
+    return calls
+
+
+def test_repeat_lookups_hit_cache_including_negatives(upstream):
+    assert pricing.get_erc20_prices("base", ["0xAAA", "0xbbb"]) == {"0xaaa": 2.5}
+    assert pricing.get_erc20_prices("base", ["0xaaa", "0xbbb"]) == {"0xaaa": 2.5}
+
+    # Second call is served from the cache, 0xbbb from the negative entry
+    assert upstream == [["0xaaa", "0xbbb"]]
+
+
+def test_sqlite_tier_survives_lru_eviction(upstream):
+    pricing.get_erc20_prices("base", ["0xaaa"])
+    prices._lru.clear()
+
+    assert pricing.get_erc20_prices("base", ["0xaaa"]) == {"0xaaa": 2.5}
+    assert len(upstream) == 1
+
+
+def test_stale_price_is_served_while_revalidating(upstream, monkeypatch):
+    key = prices.asset_key("base", "0xaaa")
+    prices.set_cached_prices({key: 1.0})
+    expired = int(time.time()) - prices.PRICE_TTLS["erc20"] - 1
+    prices._lru.set(key, (1.0, expired))
+    with sqlite._get_conn() as conn:
+        conn.execute("UPDATE prices_cache SET updated_at = ?", (expired,))
+
+    refreshed = []
+    monkeypatch.setattr(
+        pricing, "_revalidate", lambda keys, refresh, *args: refreshed.extend(keys)
+    )
+
+    assert pricing.get_erc20_prices("base", ["0xaaa"]) == {"0xaaa": 1.0}
+    assert refreshed == [key]
+    assert upstream == []
+
+
+def test_concurrent_callers_share_one_upstream_batch(monkeypatch):
+    calls = []
+
+    def slow_fetch(chain, contracts):
+        calls.append(sorted(contracts))
+        time.sleep(0.1)
+        return {c: 1.0 for c in contracts}, set(contracts)
+
+    monkeypatch.setattr(pricing, "_fetch_erc20_prices", slow_fetch)
+    monkeypatch.setattr(
+        pricing, "_coalescer", pricing._PriceCoalescer(0.1, pricing.ERC20_BATCH_SIZE)
+    )
+
+    requests = [["0xusdc", "0xweth"], ["0xweth", "0xarb"], ["0xusdc", "0xarb"]]
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        results = list(
+            pool.map(
+                lambda contracts: pricing.get_erc20_prices("arbitrum", contracts),
+                requests,
+            )
+        )
+
+    assert calls == [["0xarb", "0xusdc", "0xweth"]]
+    assert [sorted(r) for r in results] == [sorted(r) for r in requests]
+
+
+def test_windowed_flushes_reuse_one_worker_thread(monkeypatch):
+    threads = []
+
+    def fetch(chain, contracts):
+        threads.append(threading.current_thread())
+        return {c: 1.0 for c in contracts}, set(contracts)
+
+    monkeypatch.setattr(pricing, "_fetch_erc20_prices", fetch)
+    monkeypatch.setattr(
+        pricing, "_coalescer", pricing._PriceCoalescer(0.01, pricing.ERC20_BATCH_SIZE)
+    )
+
+    assert pricing.get_erc20_prices("base", ["0xaaa"]) == {"0xaaa": 1.0}
+    assert pricing.get_erc20_prices("arbitrum", ["0xbbb"]) == {"0xbbb": 1.0}
+    assert len(threads) == 2 and threads[0] is threads[1]
+
+
+def test_coalesced_waiters_give_up_after_timeout(monkeypatch):
+    release = threading.Event()
+
+    def hung_fetch(chain, contracts):
+        release.wait(5)
+        return {c: 1.0 for c in contracts}, set(contracts)
+
+    monkeypatch.setattr(pricing, "_fetch_erc20_prices", hung_fetch)
+    coalescer = pricing._PriceCoalescer(0, pricing.ERC20_BATCH_SIZE, timeout=0.2)
+    monkeypatch.setattr(pricing, "_coalescer", coalescer)
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        owner = pool.submit(pricing.get_erc20_prices, "base", ["0xaaa"])
+        time.sleep(0.05)
+
+        start = time.monotonic()
+        assert pricing.get_erc20_prices("base", ["0xaaa"]) == {}
+        assert time.monotonic() - start < 1
+
+        release.set()
+        assert owner.result() == {"0xaaa": 1.0}
+    assert not coalescer._inflight
+
+
+def test_long_tail_is_priced_in_the_background(monkeypatch):
+    base_usdc = "0x833589fcd6edb6e08f4c7c32d4f71b54bda02913"
+    old = int(time.time()) - 30 * 86_400
+    prices.set_cached_prices(
+        {
+            prices.asset_key("base", "0xold"): 3.0,
+            prices.asset_key("base", "0xneg"): None,
+        }
+    )
+    # Priced once, long ago: past every TTL but still worth waiting for
+    prices._lru.set(prices.asset_key("base", "0xold"), (3.0, old))
+    with sqlite._get_conn() as conn:
+        conn.execute(
+            "UPDATE prices_cache SET updated_at = ? WHERE asset_key = ?",
+            (old, prices.asset_key("base", "0xold")),
+        )
+
+    deferred = []
+    monkeypatch.setattr(
+        pricing, "_revalidate", lambda keys, fetch, *args: deferred.append(args)
+    )
+
+    tokens = {
+        base_usdc: "USDC",
+        "0xdai": "DAI",
+        "0xold": "OLD",
+        "0xneg": "NEG",
+        "0xnew1": "NEW",
+        "0xnew2": "NEW",
+    }
+    now, later = pricing.prioritize_erc20_pricing("base", tokens)
+
+    assert now == [base_usdc, "0xdai", "0xold", "0xneg"]
+    assert later == ["0xnew1", "0xnew2"]
+    assert deferred == [("base", ["0xnew1", "0xnew2"])]
+
+    monkeypatch.setattr(pricing, "PRICE_TAIL_IN_BACKGROUND", False)
+    assert pricing.prioritize_erc20_pricing("base", tokens) == (list(tokens), [])
@@ -0,0 +1,62 @@
+import pytest
+
+from portfolio.chains import provider
+
+PRIMARY = "https://rpc.example/primary"
+FALLBACK = "https://rpc.example/fallback"
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    monkeypatch.setattr(provider, "_providers", {})
+    monkeypatch.setattr(provider, "PROVIDER_MAX_FAILURES", 2)
+
+
+def _fail(p, times):
+    for _ in range(times):
+        with pytest.raises(RuntimeError):
+            with p.track():
+                raise RuntimeError("rpc down")
+
+
+def test_same_chain_and_url_share_one_provider():
+    p = provider.get_provider("base", PRIMARY)
+
+    assert provider.get_provider("base", PRIMARY) is p
+    assert provider.get_provider("ethereum", PRIMARY) is not p
+    assert provider.get_provider("base", FALLBACK) is not p
+
+
+def test_benched_provider_is_skipped_for_the_next_url():
+    primary = provider.get_provider("base", PRIMARY)
+    _fail(primary, 1)
+    assert provider.select_provider("base", [PRIMARY, FALLBACK]) is primary
+
+    _fail(primary, 1)
+    assert not primary.is_healthy()
+    assert provider.select_provider("base", [PRIMARY, FALLBACK]).rpc_url == FALLBACK
+
+
+def test_all_benched_returns_the_preferred_provider():
+    for url in (PRIMARY, FALLBACK):
+        _fail(provider.get_provider("base", url), 2)
+
+    assert provider.select_provider("base", [PRIMARY, FALLBACK]).rpc_url == PRIMARY
+    assert provider.select_provider("base", []) is None
+
+
+def test_success_resets_the_failure_count(monkeypatch):
+    p = provider.get_provider("base", PRIMARY)
+    _fail(p, 1)
+    with p.track():
+        pass
+
+    assert p.consecutive_failures == 0
+    _fail(p, 1)
+    assert p.is_healthy()
+    assert (p.successes, p.failures) == (1, 2)
+
+    # The cooldown ends on its own
+    _fail(p, 1)
+    monkeypatch.setattr(provider.time, "monotonic", lambda: p.benched_until)
+    assert p.is_healthy()
@@ -0,0 +1,47 @@
+import time
+
+from portfolio import pricing
+from portfolio.ratelimit import RateLimited, TokenBucket
+
+
+def test_bucket_allows_burst_then_paces():
+    bucket = TokenBucket(rate_per_min=600, burst=2)
+
+    start = time.monotonic()
+    for _ in range(4):
+        bucket.acquire()
+
+    # Two from the burst, then one token every 0.1s
+    assert 0.15 <= time.monotonic() - start < 0.5
+
+
+def test_pause_blocks_all_callers():
+    bucket = TokenBucket(rate_per_min=6000, burst=5)
+    bucket.pause(0.2)
+
+    assert bucket.acquire() >= 0.15
+
+
+def test_rate_limited_batch_is_requeued(monkeypatch):
+    attempts = []
+
+    class Response:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {"data": {"attributes": {"token_prices": {"0xaaa": "1.5"}}}}
+
+    def fake_get(url, **kwargs):
+        attempts.append(url)
+        if len(attempts) == 1:
+            raise RateLimited("api.geckoterminal.com", 0)
+        return Response()
+
+    monkeypatch.setattr(pricing, "limited_get", fake_get)
+
+    prices, resolved = pricing._fetch_erc20_prices("base", ["0xaaa"])
+
+    assert prices == {"0xaaa": 1.5}
+    assert resolved == {"0xaaa"}
+    assert len(attempts) == 2
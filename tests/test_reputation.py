@@ -0,0 +1,144 @@
+import json
+
+import pytest
+
+from portfolio.cache import prices, sqlite, token_metadata
+from portfolio.filters import reputation, scam
+from portfolio.wallets import alchemy
+
+DENIED = "0x00000000000000000000000000000000000000d1"
+SPAM = "0x00000000000000000000000000000000000000d2"
+UNPRICED = "0x00000000000000000000000000000000000000d3"
+GOOD = "0x00000000000000000000000000000000000000d4"
+USDC = "0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48"
+GUSD = "0x056fd409e1d7a124bd7017459dfea2f387b6d5cd"
+
+
+@pytest.fixture(autouse=True)
+def store(temp_db, tmp_path, monkeypatch):
+    lists = tmp_path / "scam_contracts.json"
+    lists.write_text(json.dumps({"deny": {"ethereum": [DENIED]}}))
+    monkeypatch.setattr(scam, "SCAM_CONTRACTS_FILE", str(lists))
+    monkeypatch.setattr(scam, "_lists", None)
+    monkeypatch.setattr(token_metadata, "CACHE_FILE", str(tmp_path / "none.json"))
+    for cache in (scam._verdicts, prices._lru, token_metadata._lru):
+        cache.clear()
+    reputation.reset_reputation_stats()
+    yield
+    scam._verdicts.clear()
+    prices._lru.clear()
+
+
+def test_prefilter_skips_before_upstream_calls():
+    prices.set_cached_prices({prices.asset_key("ethereum", UNPRICED): None})
+    metadata = {
+        SPAM: {"symbol": "claim-rewards", "decimals": 18},
+        GOOD: {"symbol": "GOOD", "decimals": 18},
+    }
+    balances = [
+        (DENIED, 10**20),
+        (SPAM, 10**20),
+        (UNPRICED, 10**20),
+        (GOOD, 10),
+        (GOOD.replace("d4", "d5"), 2**130),
+        (GOOD.replace("d4", "d6"), 10**20),
+        # Allowlisted tokens skip the balance heuristics too
+        (USDC, 5),
+    ]
+
+    kept = reputation.prefilter_balances("ethereum", balances, metadata)
+
+    assert kept == [(GOOD.replace("d4", "d6"), 10**20), (USDC, 5)]
+    stats = reputation.get_reputation_stats()
+    assert stats["checked"] == 7
+    assert stats["skipped"] == 5
+    assert stats["skipped:dust_balance"] == stats["skipped:unpriceable"] == 1
+    assert stats["metadata_lookups_saved"] == 3
+    # The spam symbol and the cached "no price" would not have been priced
+    assert stats["price_lookups_saved"] == 3
+
+
+def test_dust_threshold_follows_token_decimals():
+    six = GOOD.replace("d4", "d7")
+    metadata = {
+        GOOD: {"symbol": "GOOD", "decimals": 18},
+        six: {"symbol": "SIX", "decimals": 6},
+        GUSD: {"symbol": "GUSD", "decimals": 2},
+    }
+    balances = [
+        (GOOD, 999),
+        # 0.001 SIX is not dust, though 1000 units of an 18-decimal token are
+        (six, 1000),
+        # $5.00 of a 2-decimal stablecoin
+        (GUSD, 500),
+        # Decimals not known yet: nothing to scale the threshold by
+        (UNPRICED, 5),
+    ]
+
+    kept = reputation.prefilter_balances("ethereum", balances, metadata)
+
+    assert kept == balances[1:]
+    assert reputation.get_reputation_stats()["skipped:dust_balance"] == 1
+
+
+def test_skip_decisions_are_stored_per_contract(monkeypatch):
+    prices.set_cached_prices({prices.asset_key("ethereum", UNPRICED): None})
+    assert reputation.contract_skips("ethereum", [UNPRICED], {}) == {
+        UNPRICED: "unpriceable"
+    }
+
+    # The negative price entry is gone, the stored decision is not
+    prices._lru.clear()
+    with sqlite._get_conn() as conn:
+        conn.execute("DELETE FROM prices_cache")
+    assert reputation.contract_skips("ethereum", [UNPRICED], {}) == {
+        UNPRICED: "unpriceable"
+    }
+    assert reputation.contract_skips("base", [UNPRICED], {}) == {}
+
+    monkeypatch.setattr(reputation, "REPUTATION_TTL", -1)
+    assert reputation.contract_skips("ethereum", [UNPRICED], {}) == {}
+
+
+def test_unpriceable_stablecoin_is_kept_for_the_dollar_fallback():
+    stable = {UNPRICED: {"symbol": "usdd", "decimals": 18}}
+    prices.set_cached_prices({prices.asset_key("ethereum", UNPRICED): None})
+
+    assert reputation.contract_skips("ethereum", [UNPRICED], stable) == {}
+    assert reputation.prefilter_balances(
+        "ethereum", [(UNPRICED, 10**20)], stable
+    ) == [(UNPRICED, 10**20)]
+
+    # Nor does a decision stored before its symbol was known drop it
+    assert reputation.contract_skips("ethereum", [UNPRICED], {}) == {
+        UNPRICED: "unpriceable"
+    }
+    assert reputation.contract_skips("ethereum", [UNPRICED], stable) == {}
+
+
+def test_alchemy_fetch_never_resolves_skipped_tokens(monkeypatch):
+    requested = []
+
+    def fake_post(chain, payload):
+        if isinstance(payload, dict):
+            return {
+                "result": {
+                    "tokenBalances": [
+                        {"contractAddress": DENIED, "tokenBalance": hex(10**20)},
+                        {"contractAddress": GOOD, "tokenBalance": hex(10**20)},
+                    ]
+                }
+            }
+        requested.extend(p["params"][0] for p in payload)
+        return [
+            {"id": p["id"], "result": {"symbol": "GOOD", "decimals": 18}}
+            for p in payload
+        ]
+
+    monkeypatch.setattr(alchemy, "ALCHEMY_KEY", "test")
+    monkeypatch.setattr(alchemy, "_alchemy_post", fake_post)
+
+    holdings = alchemy.fetch_erc20_holdings("0xwallet", "ethereum")
+
+    assert requested == [GOOD]
+    assert [h.contract_address for h in holdings] == [GOOD]
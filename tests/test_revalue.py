@@ -0,0 +1,71 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from portfolio import multi_chain, pricing
+from portfolio.cache import sqlite
+from portfolio.models import Holding
+from portfolio.wallets.normalize import normalize_evm_address
+
+WALLET = normalize_evm_address("0x" + "ab" * 20)
+
+
+@pytest.fixture(autouse=True)
+def upstream(temp_db, monkeypatch):
+    # Every token is priced up front here; see test_price_cache for the tail
+    monkeypatch.setattr(pricing, "PRICE_TAIL_IN_BACKGROUND", False)
+
+    chains = [SimpleNamespace(symbol="ethereum"), SimpleNamespace(symbol="base")]
+    monkeypatch.setattr(multi_chain, "get_enabled_chains", lambda: chains)
+    monkeypatch.setattr(
+        multi_chain, "get_native_prices", lambda c: {"ethereum": 2000.0}
+    )
+    monkeypatch.setattr(
+        multi_chain, "get_erc20_prices", lambda chain, contracts: {"0xuni": 10.0}
+    )
+
+
+def test_revalue_reprices_cached_holdings_without_fetching(monkeypatch):
+    def no_fetch(*args, **kwargs):
+        raise AssertionError("revalue must not fetch balances")
+
+    monkeypatch.setattr(multi_chain, "fetch_chains_concurrently", no_fetch)
+
+    sqlite.set_cached_holdings(
+        WALLET,
+        "ethereum",
+        [
+            Holding(symbol="ETH", amount=1.5, chain="ethereum"),
+            Holding(
+                symbol="UNI",
+                amount=20.0,
+                chain="ethereum",
+                contract_address="0xUNI",
+                is_erc20=True,
+            ),
+            Holding(
+                symbol="claim-rewards.com",
+                amount=1e6,
+                chain="ethereum",
+                contract_address="0xscam",
+                is_erc20=True,
+            ),
+        ],
+    )
+
+    result = multi_chain.revalue_portfolio(WALLET)
+
+    assert result["total_value"] == 3200.0
+    assert [p["symbol"] for p in result["portfolio"]] == ["ETH", "UNI"]
+    assert result["chain_status"] == {"ethereum": "stale", "base": "unavailable"}
+    assert 0 <= result["holdings_age"] <= 5
+    assert result["holdings_as_of"] <= int(time.time())
+
+
+def test_revalue_falls_back_to_full_fetch(monkeypatch):
+    monkeypatch.setattr(
+        multi_chain, "fetch_multi_chain_portfolio", lambda wallet: {"full": wallet}
+    )
+
+    assert multi_chain.revalue_portfolio(WALLET) == {"full": WALLET}
@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from portfolio.filters import scam
+from portfolio.models import Holding, HoldingTable
+
+DENIED = "0x00000000000000000000000000000000000000aa"
+BRIDGED_USDC = "0xff970a61a04b1ca14834a43f5de4533ebddb5cc8"
+
+
+@pytest.fixture
+def lists(tmp_path, monkeypatch):
+    path = tmp_path / "scam_contracts.json"
+    path.write_text(
+        json.dumps(
+            {"deny": {"base": [DENIED.upper()]}, "allow": {"arbitrum": [BRIDGED_USDC]}}
+        )
+    )
+    monkeypatch.setattr(scam, "SCAM_CONTRACTS_FILE", str(path))
+    monkeypatch.setattr(scam, "_lists", None)
+    scam._verdicts.clear()
+    yield
+    scam._verdicts.clear()
+
+
+def test_symbol_rules(lists):
+    assert scam.classify("ETH", "ethereum") == (False, "")
+    assert scam.classify("", "ethereum") == (True, "missing_symbol")
+    assert scam.classify("ETHG", "base", "0x1") == (True, "known_scam_symbol")
+    assert scam.classify("VisitRewards", "base", "0x2")[1] in {
+        "keyword:visit",
+        "keyword:reward",
+    }
+    assert scam.classify("PEPE$", "base", "0x3") == (True, "non_alphanumeric")
+
+
+def test_contract_lists_override_symbols(lists):
+    assert scam.classify("PEPE", "base", DENIED) == (True, "denylisted_contract")
+    # Same contract on another chain is not denied
+    assert scam.classify("PEPE", "ethereum", DENIED) == (False, "")
+    assert scam.classify("USDC.e", "arbitrum", BRIDGED_USDC.upper()) == (False, "")
+    assert scam.is_scam_token(
+        Holding(symbol="USDC.e", amount=1.0, chain="polygon", is_erc20=True)
+    ) == (True, "non_alphanumeric")
+
+
+def test_classify_table_matches_rows(lists):
+    holdings = [
+        Holding(symbol="ETH", amount=1.0, chain="base"),
+        Holding(symbol="PEPE", amount=1.0, chain="base", contract_address=DENIED),
+        Holding(symbol="claim.io", amount=1.0, chain="base", contract_address="0x4"),
+        Holding(symbol="ARB", amount=1.0, chain="arbitrum", contract_address="0x5"),
+    ] * 3
+
+    mask, reasons = scam.classify_table(HoldingTable.from_holdings(holdings))
+
+    expected = [scam.is_scam_token(h) for h in holdings]
+    assert mask.tolist() == [v[0] for v in expected]
+    assert reasons == [v[1] for v in expected]
+    assert mask.tolist()[:4] == [False, True, True, False]
+
+
+def test_placeholder_symbol_does_not_stick_to_contract(lists):
+    assert scam.classify("UNKNOWN", "ethereum", "0xabc") == (False, "")
+    assert scam.classify("claim-eth.com", "ethereum", "0xabc") == (
+        True,
+        "keyword:claim",
+    )
+
+    table = HoldingTable.from_holdings(
+        [
+            Holding(
+                symbol="claim-eth.com",
+                amount=1.0,
+                chain="ethereum",
+                contract_address="0xabc",
+            )
+        ]
+    )
+    assert scam.classify_table(table)[0].tolist() == [True]
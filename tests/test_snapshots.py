@@ -0,0 +1,139 @@
+import random
+
+import pytest
+
+from portfolio.analytics.performance import get_portfolio_history
+from portfolio.cache import snapshots, sqlite
+
+
+@pytest.fixture(autouse=True)
+def short_keyframes(temp_db, monkeypatch):
+    monkeypatch.setattr(snapshots, "SNAPSHOT_KEYFRAME_INTERVAL", 4)
+
+
+def _position(symbol, value, chain="ethereum"):
+    return {
+        "symbol": symbol,
+        "chain": chain,
+        "amount": value / 10,
+        "invested": 0.0,
+        "current_value": value,
+    }
+
+
+def _persist(positions):
+    total = sum(p["current_value"] for p in positions)
+    return snapshots.persist_portfolio_snapshot(
+        "0xabc", {"total_value": total, "total_pnl": 0.0}, positions
+    )
+
+
+def _rows(snapshot_id):
+    return (
+        sqlite._get_conn()
+        .execute(
+            "SELECT symbol, removed FROM portfolio_positions WHERE snapshot_id = ?",
+            (snapshot_id,),
+        )
+        .fetchall()
+    )
+
+
+def test_identical_snapshot_is_skipped():
+    positions = [_position("ETH", 100.0), _position("USDC", 50.0)]
+
+    first = _persist(positions)
+    assert _persist(list(positions)) == first
+
+    count = sqlite._get_conn().execute("SELECT COUNT(*) FROM portfolio_snapshots")
+    assert count.fetchone()[0] == 1
+
+
+def test_identical_snapshot_is_marked_seen():
+    positions = [_position("ETH", 100.0)]
+    first = _persist(positions)
+    with sqlite._get_conn() as conn:
+        conn.execute("UPDATE portfolio_snapshots SET created_at = 1, seen_at = 1")
+
+    assert _persist(positions) == first
+
+    assert snapshots.last_seen("0xabc") > 1
+    # History keeps the time the portfolio first looked like this
+    assert get_portfolio_history("0xabc")[0]["snapshot_time"] == 1
+    assert snapshots.last_seen("0xdef") is None
+
+
+def test_delta_stores_changes_and_tombstones():
+    unchanged = [_position("USDC", 50.0), _position("DAI", 40.0), _position("OP", 8.0)]
+    _persist([_position("ETH", 100.0), *unchanged, _position("ARB", 5.0)])
+    delta = _persist([_position("ETH", 120.0), *unchanged])
+
+    assert sorted(_rows(delta)) == [("ARB", 1), ("ETH", 0)]
+
+    latest = get_portfolio_history("0xabc")[-1]["positions"]
+    assert [(p["symbol"], p["current_value"]) for p in latest] == [
+        ("ETH", 120.0),
+        ("USDC", 50.0),
+        ("DAI", 40.0),
+        ("OP", 8.0),
+    ]
+
+
+def test_reconstruction_matches_every_written_snapshot():
+    rng = random.Random(7)
+    symbols = ["ETH", "USDC", "ARB", "OP", "LINK", "UNI"]
+    written = []
+
+    for _ in range(30):
+        positions = [
+            _position(s, float(rng.randint(1, 3)) * 10)
+            for s in symbols
+            if rng.random() < 0.7
+        ]
+        # Same symbol twice on one chain (e.g. native and a token)
+        positions.append(_position("ETH", 1.0))
+        snapshot_id = _persist(positions)
+        if not written or written[-1][0] != snapshot_id:
+            written.append((snapshot_id, positions))
+        # Writes must not depend on the in-process tip cache
+        if rng.random() < 0.3:
+            snapshots._tips.clear()
+
+    history = get_portfolio_history("0xabc")
+    assert len(history) == len(written)
+
+    for snap, (_, positions) in zip(history, written):
+        got = sorted((p["symbol"], p["current_value"]) for p in snap["positions"])
+        assert got == sorted((p["symbol"], p["current_value"]) for p in positions)
+
+    # Windows starting mid-chain replay from the keyframe before them
+    tail = get_portfolio_history("0xabc", limit=3)
+    assert tail == history[-3:]
+
+    keyframes, deltas = (
+        sqlite._get_conn()
+        .execute(
+            "SELECT SUM(base_id = id), SUM(base_id != id) FROM portfolio_snapshots"
+        )
+        .fetchone()
+    )
+    assert keyframes and deltas
+
+
+def test_write_hook_sees_previous_and_new_state():
+    seen = []
+
+    def hook(conn, wallet, snapshot_id, prev, curr, total_value, now):
+        seen.append((snapshot_id, prev, dict(curr), total_value))
+
+    ids = [
+        snapshots.persist_portfolio_snapshot(
+            "0xabc", {"total_value": value}, [_position("ETH", value)], on_write=hook
+        )
+        for value in (10.0, 20.0)
+    ]
+
+    assert [s[0] for s in seen] == ids
+    assert seen[0][1] is None
+    assert seen[1][1] == seen[0][2]
+    assert seen[1][3] == 20.0
@@ -0,0 +1,59 @@
+import sqlite3
+import threading
+
+import pytest
+
+from portfolio.cache import sqlite
+
+
+@pytest.fixture(autouse=True)
+def own_connections(temp_db):
+    yield
+    sqlite.close_thread_connections()
+
+
+def test_connection_is_reused_per_thread():
+    conn = sqlite._get_conn()
+    assert sqlite._get_conn() is conn
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(sqlite._get_conn()))
+    thread.start()
+    thread.join()
+
+    assert other[0] is not conn
+
+
+def test_pragmas_are_applied_on_open():
+    conn = sqlite._get_conn()
+
+    def pragma(name):
+        return conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+    assert pragma("journal_mode") == "wal"
+    assert pragma("synchronous") == 1  # NORMAL
+    assert pragma("cache_size") == -sqlite.SQLITE_CACHE_SIZE_KB
+    assert pragma("busy_timeout") == sqlite.SQLITE_BUSY_TIMEOUT_MS
+    assert pragma("temp_store") == 2  # MEMORY
+
+
+def test_new_db_path_gets_its_own_connection(tmp_path, monkeypatch):
+    first = sqlite._get_conn()
+    path = sqlite.DB_PATH
+
+    monkeypatch.setattr(sqlite, "DB_PATH", str(tmp_path / "other" / "cache.db"))
+    second = sqlite._get_conn()
+    assert second is not first
+    assert (tmp_path / "other" / "cache.db").exists()
+
+    monkeypatch.setattr(sqlite, "DB_PATH", path)
+    assert sqlite._get_conn() is first
+
+
+def test_close_thread_connections():
+    conn = sqlite._get_conn()
+    sqlite.close_thread_connections()
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+    assert sqlite._get_conn() is not conn
@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from portfolio.cache import sqlite, token_metadata
+
+
+@pytest.fixture(autouse=True)
+def temp_store(temp_db, tmp_path, monkeypatch):
+    legacy = tmp_path / "token_metadata.json"
+    legacy.write_text(
+        json.dumps(
+            {
+                "0xAAA": {"symbol": "OLD", "decimals": 18},
+                "0xbbb": {"symbol": "USDC", "decimals": 6},
+                "0xfff": {"symbol": "UNKNOWN", "decimals": 18},
+            }
+        )
+    )
+    monkeypatch.setattr(token_metadata, "CACHE_FILE", str(legacy))
+    token_metadata._lru.clear()
+
+
+def test_legacy_json_is_migrated_once():
+    assert token_metadata.get_token_metadata("base", "0xaaa") == {
+        "symbol": "OLD",
+        "decimals": 18,
+    }
+
+    def row_count():
+        with sqlite._get_conn() as conn:
+            return conn.execute("SELECT COUNT(*) FROM token_metadata").fetchone()[0]
+
+    count = row_count()
+    token_metadata._migrate_legacy_file()
+    assert row_count() == count == 2
+
+
+def test_entries_are_chain_scoped():
+    token_metadata.save_token_metadata(
+        "bsc", {"0xbbb": {"symbol": "USDC", "decimals": 18}}
+    )
+    token_metadata._lru.clear()
+
+    assert token_metadata.get_token_metadata("bsc", "0xBBB")["decimals"] == 18
+    assert token_metadata.get_token_metadata("ethereum", "0xbbb")["decimals"] == 6
+    assert token_metadata.get_token_metadata("bsc", "0xccc") is None
+
+
+def test_save_only_inserts_new_entries():
+    token_metadata.save_token_metadata(
+        "ethereum", {"0xddd": {"symbol": "FIRST", "decimals": 8}}
+    )
+    token_metadata.save_token_metadata(
+        "ethereum", {"0xddd": {"symbol": "SECOND", "decimals": 8}}
+    )
+    token_metadata._lru.clear()
+
+    assert token_metadata.get_token_metadata("ethereum", "0xddd")["symbol"] == "FIRST"
+
+
+def test_failed_lookup_is_not_stored(monkeypatch):
+    from portfolio.wallets import alchemy
+
+    contract = "0x" + "ab" * 20
+
+    def fake_post(chain, payload):
+        if isinstance(payload, list):
+            raise RuntimeError("alchemy down")
+        return {
+            "result": {
+                "tokenBalances": [
+                    {"contractAddress": contract, "tokenBalance": hex(10**18)}
+                ]
+            }
+        }
+
+    monkeypatch.setattr(alchemy, "ALCHEMY_KEY", "test")
+    monkeypatch.setattr(alchemy, "_alchemy_post", fake_post)
+
+    holdings = alchemy.fetch_erc20_holdings("0x" + "01" * 20, "base")
+
+    # Served as UNKNOWN for this response, looked up again next time
+    assert [h.symbol for h in holdings] == ["UNKNOWN"]
+    assert token_metadata.get_token_metadata("base", contract) is None
+
+
+def test_legacy_lookup_fallbacks_are_not_imported():
+    assert token_metadata.get_token_metadata("base", "0xfff") is None
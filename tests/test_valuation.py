@@ -0,0 +1,54 @@
+import random
+
+import numpy as np
+
+from portfolio.calculator import MAX_REASONABLE_VALUE, calculate_position
+from portfolio.models import Holding
+from portfolio.valuation import _round2, value_holdings
+
+
+def _holdings(n, seed=1):
+    rng = random.Random(seed)
+    holdings, prices = [], []
+    for i in range(n):
+        holdings.append(
+            Holding(
+                symbol=f"T{i}",
+                amount=rng.choice(
+                    [0.0, -1.0, rng.random() * 10 ** rng.randint(-8, 12)]
+                ),
+                chain=rng.choice(["ethereum", "base"]),
+                cost_basis=rng.choice([0.0, rng.random() * 3000]),
+                is_erc20=rng.random() < 0.8,
+            )
+        )
+        prices.append(rng.choice([0.0, 1.0, rng.random() * 10 ** rng.randint(-6, 6)]))
+    return holdings, prices
+
+
+def test_matches_calculate_position_exactly():
+    holdings, prices = _holdings(5000)
+
+    expected = [calculate_position(h, p) for h, p in zip(holdings, prices)]
+    expected = [pos for pos in expected if pos]
+
+    assert value_holdings(holdings, prices) == expected
+    assert any(pos["current_value"] == MAX_REASONABLE_VALUE for pos in expected)
+    assert any("note" in pos for pos in expected)
+
+
+def test_empty_and_all_zero():
+    assert value_holdings([], []) == []
+    assert (
+        value_holdings([Holding(symbol="ETH", amount=0.0, chain="base")], [1.0]) == []
+    )
+
+
+def test_rounding_matches_python_round_on_ties():
+    rng = random.Random(3)
+    values = [2.675, 1.005, 0.125, -0.375, 1234.565, 2.0**47 + 0.5, 1e300, 0.0]
+    # Thousandths sit right on half-cent boundaries
+    values += [rng.randint(-(10**9), 10**9) / 1000 for _ in range(20000)]
+    values += [rng.uniform(-1e6, 1e6) for _ in range(20000)]
+
+    assert _round2(np.array(values)) == [round(v, 2) for v in values]